@@ -101,11 +101,15 @@ class Context(Configuration):
     max_shlvl = PrimitiveParameter(2)
     path_conflict = PrimitiveParameter(PathConflict.clobber)
     pinned_packages = SequenceParameter(string_types, string_delimiter='&')  # TODO: consider a different string delimiter  # NOQA
+    profile = PrimitiveParameter(None, element_type=string_types + (NoneType,))
     rollback_enabled = PrimitiveParameter(True)
     track_features = SequenceParameter(string_types)
+    transaction_threads = PrimitiveParameter(1)
     use_pip = PrimitiveParameter(True)
     skip_safety_checks = PrimitiveParameter(False)
+    staged_transactions = PrimitiveParameter(False)
     use_index_cache = PrimitiveParameter(False)
+    unsatisfiable_core_timeout_secs = PrimitiveParameter(30.)
 
     _root_prefix = PrimitiveParameter("", aliases=('root_dir', 'root_prefix'))
     _envs_dirs = SequenceParameter(string_types, aliases=('envs_dirs', 'envs_path'),
@@ -114,6 +118,7 @@ class Context(Configuration):
     _subdir = PrimitiveParameter('', aliases=('subdir',))
     _subdirs = SequenceParameter(string_types, aliases=('subdirs',))
 
+    use_sharded_repodata = PrimitiveParameter(False)
     local_repodata_ttl = PrimitiveParameter(1, element_type=(bool, int))
     # number of seconds to cache repodata locally
     #   True/1: respect Cache-Control max-age header
@@ -548,6 +553,8 @@ def reset_context(search_path=SEARCH_PATH, argparse_args=None):
     context.__init__(search_path, APP_NAME, argparse_args)
     from ..models.channel import Channel
     Channel._reset_state()
+    from ..models.match_spec import MatchSpec
+    MatchSpec._reset_state()
     # need to import here to avoid circular dependency
     from ..core.repodata import RepoData
     RepoData.clear()
@@ -710,6 +717,13 @@ def get_help_dict():
             install time. Packages not locally available are downloaded and extracted
             into the first writable directory.
             """),
+        'profile': dals("""
+            A path to write a JSON profiling report to when a conda command finishes. The
+            report gives the calls, wall time and CPU time of each phase of the command
+            (loading channels, solving, downloading and extracting packages, and preparing,
+            verifying and executing the transaction), with counts such as records loaded,
+            clauses, SAT calls, files linked and bytes downloaded.
+            """),
         'proxy_servers': dals("""
             A mapping to enable proxy settings. Keys can be either (1) a scheme://hostname
             form, which will match any request to the given scheme and exact hostname, or
@@ -757,15 +771,42 @@ def get_help_dict():
             be (1) a path to a CA bundle file, or (2) a path to a directory containing
             certificates of trusted CA.
             """),
+        'staged_transactions': dals("""
+            Build the new state of an environment in a staging directory next to it,
+            hardlinking files that don't change, and swap it into place with directory
+            renames once the transaction succeeds. The live environment stays consistent
+            until the swap, and a failed transaction only discards the staging directory.
+            A new environment is built in the staging directory and renamed into place.
+            Not used on Windows, for environments that contain package caches or other
+            environments, such as the root environment, or when a package being linked or
+            unlinked has link or unlink scripts, which must see the environment's own path.
+            """),
         'track_features': dals("""
             A list of features that are tracked by default. An entry here is similar to
             adding an entry to the create_default_packages list.
             """),
+        'transaction_threads': dals("""
+            The number of environments in a transaction that are prepared, verified, and
+            executed at the same time. Only transactions that change several environments at
+            once use more than one thread. If an environment fails, the changes to all of
+            them are rolled back, as when the environments are handled one after another.
+            """),
+        'unsatisfiable_core_timeout_secs': dals("""
+            When a request can't be satisfied, conda searches for a minimal set of
+            conflicting specs to report. The search stops after this many seconds, and the
+            conflicts found so far, which may include specs that aren't strictly needed,
+            are reported instead.
+            """),
         'use_pip': dals("""
             Include non-conda-installed python packages with conda list. This does not
             affect any conda command or functionality other than the output of the
             command conda list.
             """),
+        'use_sharded_repodata': dals("""
+            For channels that publish per-package-name repodata shards, fetch only the
+            shards reachable from the packages being solved for, rather than each
+            subdir's complete repodata.json. Channels without shards are unaffected.
+            """),
         'verbosity': dals("""
             Sets output log level. 0 is warn. 1 is info. 2 is debug. 3 is trace.
             """),
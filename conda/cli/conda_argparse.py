@@ -137,6 +137,7 @@ def add_parser_create_install_update(p):
     add_parser_quiet(p)
     add_parser_copy(p)
     add_parser_insecure(p)
+    add_parser_profile(p)
     p.add_argument(
         "--update-dependencies", "--update-deps",
         action="store_true",
@@ -384,3 +385,14 @@ def add_parser_insecure(p):
         help="Allow conda to perform \"insecure\" SSL connections and transfers."
              "Equivalent to setting 'ssl_verify' to 'false'."
     )
+
+
+def add_parser_profile(p):
+    p.add_argument(
+        "--profile",
+        action="store",
+        default=NULL,
+        metavar="PATH",
+        help="Write a JSON report of the time spent in each phase of the command, and of "
+             "counts such as records loaded, SAT calls and files linked, to PATH.",
+    )
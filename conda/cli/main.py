@@ -35,8 +35,11 @@ Additional help for each command can be accessed by using:
     conda <command> -h
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
+from logging import getLogger
 import sys
 
+log = getLogger(__name__)
+
 PARSER = None
 
 
@@ -133,7 +136,19 @@ def _main(*args):
     context.__init__(SEARCH_PATH, 'conda', args)
     init_loggers(context)
 
-    exit_code = args.func(args, p)
+    if not context.profile:
+        exit_code = args.func(args, p)
+    else:
+        from ..common.profiling import profiler
+        profiler.enable()
+        try:
+            exit_code = args.func(args, p)
+        finally:
+            profiler.disable()
+            try:
+                profiler.write_report(context.profile)
+            except (IOError, OSError) as e:
+                log.warning("Unable to write profile report to %s\n  %r", context.profile, e)
     if isinstance(exit_code, int):
         return exit_code
 
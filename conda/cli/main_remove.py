@@ -16,8 +16,9 @@ from conda.cli.install import handle_txn
 from conda.core.solve import Solver
 from .conda_argparse import (add_parser_channels, add_parser_help, add_parser_insecure,
                              add_parser_json, add_parser_no_pin, add_parser_offline,
-                             add_parser_prefix, add_parser_pscheck, add_parser_quiet,
-                             add_parser_use_index_cache, add_parser_use_local, add_parser_yes)
+                             add_parser_prefix, add_parser_profile, add_parser_pscheck,
+                             add_parser_quiet, add_parser_use_index_cache, add_parser_use_local,
+                             add_parser_yes)
 
 help = "%s a list of packages from a specified conda environment."
 descr = help + """
@@ -88,6 +89,7 @@ def configure_parser(sub_parsers, name='remove'):
     add_parser_offline(p)
     add_parser_pscheck(p)
     add_parser_insecure(p)
+    add_parser_profile(p)
     p.add_argument(
         'package_names',
         metavar='package_name',
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import namedtuple
+from logging import getLogger
+from threading import RLock
+
+from .compat import odict
+
+log = getLogger(__name__)
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+_MISSING = object()
+
+
+class LRUCache(object):
+    """A bounded, thread-safe mapping that evicts the least recently used entries.
+
+    Intended for interning immutable objects (version orders, channels, dists, parsed specs)
+    in long-running processes.  Supports the subset of the dict interface those caches use,
+    where `setdefault()` is an atomic get-or-insert, plus `cache_info()` statistics mirroring
+    `functools.lru_cache`.  A maxsize of None disables eviction.
+
+    Hit and miss counts are not synchronized, and may be slightly low under concurrent use.
+    """
+
+    def __init__(self, maxsize=None):
+        self._maxsize = maxsize
+        self._data = odict()
+        self._lock = RLock()
+        self._hits = self._misses = 0
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            self._evict()
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def setdefault(self, key, value):
+        """Return the value already cached for key, or cache and return value."""
+        with self._lock:
+            existing = self._lookup(key)
+            if existing is not _MISSING:
+                return existing
+            self._data[key] = value
+            self._evict()
+            return value
+
+    def pop(self, key, *default):
+        with self._lock:
+            return self._data.pop(key, *default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = 0
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._maxsize, len(self._data))
+
+    if hasattr(odict, 'move_to_end'):
+        # The C implementation of OrderedDict makes a single lookup or move_to_end atomic, so
+        # cache hits don't need to take the lock.
+        def _lookup(self, key):
+            data = self._data
+            value = data.get(key, _MISSING)
+            if value is _MISSING:
+                self._misses += 1
+                return value
+            try:
+                data.move_to_end(key)
+            except KeyError:
+                # evicted by another thread since the lookup; still a valid hit
+                pass
+            self._hits += 1
+            return value
+
+    else:  # pragma: py3 no cover
+        def _lookup(self, key):
+            with self._lock:
+                data = self._data
+                value = data.pop(key, _MISSING)
+                if value is _MISSING:
+                    self._misses += 1
+                    return value
+                data[key] = value
+                self._hits += 1
+                return value
+
+    def _evict(self):
+        maxsize = self._maxsize
+        if maxsize is not None:
+            data = self._data
+            while len(data) > maxsize:
+                data.popitem(last=False)
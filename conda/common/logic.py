@@ -27,14 +27,92 @@ through the Require and Prevent functions.
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from array import array
+from bisect import bisect_right
+from functools import partial
 from itertools import chain, combinations
 from logging import getLogger
+from math import ceil, sqrt
+from time import time
 import pycosat
 
-from .compat import iteritems
+from .compat import iteritems, itervalues, string_types
+from .profiling import profiler
 
 log = getLogger(__name__)
 
+# Encodings for Clauses.LinearBound; see LB_Costs_
+LB_ENCODINGS = ('bdd', 'totalizer', 'counter', 'sortnet')
+
+
+class ClauseArray(object):
+    """A list of clauses, stored as one flat array of literals plus the end offset of each clause.
+
+    Compared to a list of tuples, this needs a fraction of the memory for large problems, and
+    discarding the most recently added clauses (see truncate) doesn't copy the rest.  Iterating
+    yields each clause as an array of literals, which is what pycosat expects.
+    """
+
+    def __init__(self, clauses=()):
+        self._lits = array('i')
+        self._ends = array('l')
+        self.extend(clauses)
+
+    def append(self, clause):
+        lits = self._lits
+        lits.extend(clause)
+        self._ends.append(len(lits))
+
+    def extend(self, clauses):
+        lits = self._lits
+        extend_lits, append_end = lits.extend, self._ends.append
+        for clause in clauses:
+            extend_lits(clause)
+            append_end(len(lits))
+
+    def truncate(self, n):
+        """Discard all but the first n clauses."""
+        ends = self._ends
+        if n < len(ends):
+            del self._lits[ends[n - 1] if n else 0:]
+            del ends[n:]
+
+    def copy(self):
+        result = ClauseArray()
+        result._lits.extend(self._lits)
+        result._ends.extend(self._ends)
+        return result
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __iter__(self):
+        lits = self._lits
+        start = 0
+        for end in self._ends:
+            yield lits[start:end]
+            start = end
+
+    def __getitem__(self, index):
+        ends = self._ends
+        end = ends[index]
+        if index < 0:
+            index += len(ends)
+        return tuple(self._lits[ends[index - 1] if index else 0:end])
+
+    def __eq__(self, other):
+        if isinstance(other, ClauseArray):
+            return self._ends == other._ends and self._lits == other._lits
+        return list(map(tuple, self)) == list(map(tuple, other))
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'ClauseArray(%r)' % list(map(tuple, self))
+
 
 # Code that uses special cases (generates no clauses) is in ADTs/FEnv.h in
 # minisatp. Code that generates clauses is in Hardware_clausify.cc (and are
@@ -42,19 +120,26 @@ log = getLogger(__name__)
 # SAT," Eén and Sörensson).
 class Clauses(object):
     def __init__(self, m=0):
-        self.clauses = []
+        self.clauses = ClauseArray()
         self.names = {}
         self.indices = {}
         self.unsat = False
         self.m = m
 
+    def copy(self):
+        C = Clauses(self.m)
+        C.clauses = self.clauses.copy()
+        C.names = self.names.copy()
+        C.indices = self.indices.copy()
+        C.unsat = self.unsat
+        return C
+
     def name_var(self, m, name):
-        nname = '!' + name
+        # Only the positive literal is recorded.  For string names, the negation can be looked
+        # up with a '!' prefix; see from_name and from_index.  Any hashable can be a name.
         self.names[name] = m
-        self.names[nname] = -m
         if type(m) is not bool and m not in self.indices:
             self.indices[m] = name
-            self.indices[-m] = nname
         return m
 
     def new_var(self, name=None):
@@ -65,11 +150,27 @@ class Clauses(object):
         return m
 
     def from_name(self, name):
-        return self.names.get(name)
+        m = self.names.get(name)
+        if m is None and isinstance(name, string_types) and name.startswith('!'):
+            m = self.names.get(name[1:])
+            if m is not None:
+                m = self.Not_(m)
+        return m
 
     def from_index(self, m):
+        if m < 0:
+            name = self.indices.get(-m)
+            return None if name is None else '!%s' % (name,)
         return self.indices.get(m)
 
+    def Literal_(self, x):
+        # convert a name to its literal; literals and constants pass through unchanged
+        tx = type(x)
+        if tx is int or tx is bool:
+            return x
+        m = self.from_name(x)
+        return x if m is None else m
+
     def Assign_(self, vals, name=None):
         tvals = type(vals)
         if tvals is tuple:
@@ -87,7 +188,7 @@ class Clauses(object):
         tx = type(x)
         if tx in (tuple, list):
             return tx(map(self.Convert_, x))
-        return self.names.get(x, x)
+        return self.Literal_(x)
 
     def Eval_(self, func, args, polarity, name, conv=True):
         if conv:
@@ -103,7 +204,7 @@ class Clauses(object):
         elif tvals is not bool:
             self.clauses.append((vals if polarity else -vals,))
         else:
-            self.clauses = self.clauses[:nz]
+            self.clauses.truncate(nz)
             self.unsat = self.unsat or polarity != vals
 
     def Combine_(self, args, polarity):
@@ -120,11 +221,11 @@ class Clauses(object):
         else:
             return self.All_(map(self.Assign_, args), polarity)
 
-    def Prevent(self, what, *args):
-        return what.__get__(self, Clauses)(*args, polarity=False, name=False)
+    def Prevent(self, what, *args, **kwargs):
+        return what.__get__(self, Clauses)(*args, polarity=False, name=False, **kwargs)
 
-    def Require(self, what, *args):
-        return what.__get__(self, Clauses)(*args, polarity=True, name=False)
+    def Require(self, what, *args, **kwargs):
+        return what.__get__(self, Clauses)(*args, polarity=True, name=False, **kwargs)
 
     def Not_(self, x, polarity=None):
         return (not x) if type(x) is bool else -x
@@ -281,10 +382,102 @@ class Clauses(object):
     def AtMostOne_BDD(self, vals, polarity=None, name=None):
         return self.Eval_(self.AtMostOne_BDD_, (list(vals),), polarity, name)
 
+    # The sequential counter, commander, and product encodings below introduce auxiliary
+    # variables, so they only preserve satisfiability rather than define an equivalent literal.
+    # That suffices for polarity=True (e.g. Require), which is how gen_clauses constrains every
+    # package group.  For any other polarity they fall back to the BDD encoding.
+
+    def AtMostOne_Seq_(self, vals, polarity=None, exactly=False):
+        # Sinz's sequential counter: s[k] is true if any of the first k+1 literals is
+        vals = list(vals)
+        if polarity is not True or any(type(v) is bool for v in vals) or len(vals) < 2:
+            return (self.ExactlyOne_BDD_ if exactly else self.AtMostOne_BDD_)(vals, polarity)
+        s = [self.new_var() for _ in vals[1:]]
+        clauses = [(-vals[0], s[0])]
+        for k in range(1, len(vals) - 1):
+            x = vals[k]
+            clauses.extend(((-x, s[k]), (-s[k - 1], s[k]), (-x, -s[k - 1])))
+        clauses.append((-vals[-1], -s[-1]))
+        if exactly:
+            clauses.append(tuple(vals))
+        return clauses, []
+
+    def AtMostOne_Seq(self, vals, polarity=None, name=None):
+        return self.Eval_(self.AtMostOne_Seq_, (list(vals),), polarity, name)
+
+    def AtMostOne_Commander_(self, vals, polarity=None, exactly=False):
+        # Klieber and Kwon's commander encoding: split the literals into groups of three, with
+        # a commander variable implied by each member of its group, and repeat on the commanders
+        vals = list(vals)
+        if polarity is not True or any(type(v) is bool for v in vals) or len(vals) < 2:
+            return (self.ExactlyOne_BDD_ if exactly else self.AtMostOne_BDD_)(vals, polarity)
+        clauses = []
+        while len(vals) > 3:
+            commanders = []
+            for k in range(0, len(vals), 3):
+                group = vals[k:k + 3]
+                if len(group) == 1:
+                    commanders.append(group[0])
+                    continue
+                c = self.new_var()
+                clauses.extend((-x, -y) for x, y in combinations(group, 2))
+                clauses.extend((-x, c) for x in group)
+                if exactly:
+                    clauses.append((-c,) + tuple(group))
+                commanders.append(c)
+            vals = commanders
+        clauses.extend((-x, -y) for x, y in combinations(vals, 2))
+        if exactly:
+            clauses.append(tuple(vals))
+        return clauses, []
+
+    def AtMostOne_Commander(self, vals, polarity=None, name=None):
+        return self.Eval_(self.AtMostOne_Commander_, (list(vals),), polarity, name)
+
+    def AtMostOne_Product_(self, vals, polarity=None, exactly=False):
+        # Chen's 2-product encoding: lay the literals out in a grid, where each literal implies
+        # its row and column variables, and at most one row and one column may be true
+        vals = list(vals)
+        if polarity is not True or any(type(v) is bool for v in vals) or len(vals) < 2:
+            return (self.ExactlyOne_BDD_ if exactly else self.AtMostOne_BDD_)(vals, polarity)
+        clauses = [tuple(vals)] if exactly else []
+        if len(vals) <= 4:
+            clauses.extend((-x, -y) for x, y in combinations(vals, 2))
+            return clauses, []
+        p = int(ceil(sqrt(len(vals))))
+        q = -(-len(vals) // p)
+        rows = [self.new_var() for _ in range(p)]
+        cols = [self.new_var() for _ in range(q)]
+        for k, x in enumerate(vals):
+            i, j = divmod(k, q)
+            clauses.append((-x, rows[i]))
+            clauses.append((-x, cols[j]))
+        clauses.extend(self.AtMostOne_Product_(rows, True)[0])
+        clauses.extend(self.AtMostOne_Product_(cols, True)[0])
+        return clauses, []
+
+    def AtMostOne_Product(self, vals, polarity=None, name=None):
+        return self.Eval_(self.AtMostOne_Product_, (list(vals),), polarity, name)
+
+    def AMO_Encoding_(self, vals, polarity):
+        # the encoding with the fewest clauses for this group size, or None to use the defaults
+        if polarity is not True or any(type(v) is bool for v in vals):
+            return None
+        costs = _amo_costs(len(vals))
+        return min(costs, key=costs.get)
+
     def AtMostOne(self, vals, polarity=None, name=None):
         vals = list(vals)
         nv = len(vals)
-        if nv < 5 - (polarity is not True):
+        encoding = self.AMO_Encoding_(vals, polarity)
+        if encoding is not None:
+            what = {
+                'nsq': self.AtMostOne_NSQ,
+                'seq': self.AtMostOne_Seq,
+                'commander': self.AtMostOne_Commander,
+                'product': self.AtMostOne_Product,
+            }[encoding]
+        elif nv < 5 - (polarity is not True):
             what = self.AtMostOne_NSQ
         else:
             what = self.AtMostOne_BDD
@@ -306,10 +499,36 @@ class Clauses(object):
     def ExactlyOne_BDD(self, vals, polarity=None, name=None):
         return self.Eval_(self.ExactlyOne_BDD_, (list(vals),), polarity, name)
 
+    def ExactlyOne_Seq_(self, vals, polarity):
+        return self.AtMostOne_Seq_(vals, polarity, exactly=True)
+
+    def ExactlyOne_Seq(self, vals, polarity=None, name=None):
+        return self.Eval_(self.ExactlyOne_Seq_, (list(vals),), polarity, name)
+
+    def ExactlyOne_Commander_(self, vals, polarity):
+        return self.AtMostOne_Commander_(vals, polarity, exactly=True)
+
+    def ExactlyOne_Commander(self, vals, polarity=None, name=None):
+        return self.Eval_(self.ExactlyOne_Commander_, (list(vals),), polarity, name)
+
+    def ExactlyOne_Product_(self, vals, polarity):
+        return self.AtMostOne_Product_(vals, polarity, exactly=True)
+
+    def ExactlyOne_Product(self, vals, polarity=None, name=None):
+        return self.Eval_(self.ExactlyOne_Product_, (list(vals),), polarity, name)
+
     def ExactlyOne(self, vals, polarity=None, name=None):
         vals = list(vals)
         nv = len(vals)
-        if nv < 2:
+        encoding = self.AMO_Encoding_(vals, polarity) if nv >= 2 else None
+        if encoding is not None:
+            what = {
+                'nsq': self.ExactlyOne_NSQ,
+                'seq': self.ExactlyOne_Seq,
+                'commander': self.ExactlyOne_Commander,
+                'product': self.ExactlyOne_Product,
+            }[encoding]
+        elif nv < 2:
             what = self.ExactlyOne_NSQ
         else:
             what = self.ExactlyOne_BDD
@@ -317,7 +536,7 @@ class Clauses(object):
 
     def LB_Preprocess_(self, equation):
         if type(equation) is dict:
-            equation = [(c, self.names.get(a, a)) for a, c in iteritems(equation)]
+            equation = [(c, self.Literal_(a)) for a, c in iteritems(equation)]
         if any(c <= 0 or type(a) is bool for c, a in equation):
             offset = sum(c for c, a in equation if a is True or a is not False and c <= 0)
             equation = [(c, a) if c > 0 else (-c, -a) for c, a in equation
@@ -365,7 +584,171 @@ class Clauses(object):
             ret[call_stack.pop()] = self.ITE(abs(LA), thi, tlo, polarity)
         return ret[target]
 
-    def LinearBound_(self, equation, lo, hi, preprocess, polarity):
+    def LB_Directions_(self, lo, hi, total, polarity):
+        # Which implications the sum outputs of the totalizer, counter, and sorting network
+        # encodings need: "up" forces an output true when its sum is reached, "down" forces it
+        # false when it isn't.  A one-sided bound with a known polarity needs only one.
+        lower = lo > 0
+        upper = hi < total
+        up = upper and polarity is not False or lower and polarity is not True
+        down = upper and polarity is not True or lower and polarity is not False
+        return up, down
+
+    def LB_Costs_(self, equation, nterms, lo, hi, polarity):
+        """
+        Estimate the number of clauses each encoding of lo <= S <= hi needs, where S is the
+        weighted sum of the first nterms terms of the (sorted, preprocessed) equation.  Each
+        estimate is a dry run of the encoding that counts, rather than adds, clauses.
+        Encodings that are found to cost more than another one may be left out.
+        """
+        terms = equation[:nterms]
+        total = sum(c for c, _ in terms)
+        costs = {}
+
+        # BDD: one ITE per node that doesn't resolve to a constant
+        nodes = 0
+        sums = {0}
+        remaining = total
+        for c, _ in reversed(terms):
+            sums = {s for s in sums if not (lo <= s and s + remaining <= hi or
+                                            s + remaining < lo or s > hi)}
+            nodes += len(sums)
+            remaining -= c
+            sums.update([q + c for q in sums])
+        costs['bdd'] = nodes * (6 if polarity is None else 3)
+
+        # Sorting network: cardinality constraints only; an OR and an AND per comparator
+        if terms[0][0] == terms[-1][0]:
+            costs['sortnet'] = 6 * sum(1 for _ in _odd_even_merge_sort(_next_power_of_2(nterms)))
+
+        # Totalizer and sequential counter: one clause per pair of input values and direction,
+        # plus the ordering clauses.  These dry runs stop once they can't be the cheapest.
+        up, down = self.LB_Directions_(lo, hi, total, polarity)
+        ndir = up + down
+        cap = hi + 1
+
+        def merge_cost(A, B):
+            values = {min(a + b, cap) for a in A for b in B}
+            return len(A) * len(B) * ndir + len(values) * (ndir > 0), values
+
+        best = min(itervalues(costs))
+        nodes = [{min(c, cap)} for c, _ in terms]
+        cost = 0
+        while len(nodes) > 1 and cost <= best:
+            merged = []
+            for k in range(0, len(nodes) - 1, 2):
+                A, B = nodes[k], nodes[k + 1]
+                ncost, values = merge_cost(A | {0}, B | {0})
+                cost += ncost
+                merged.append(values - {0})
+            if len(nodes) % 2:
+                merged.append(nodes[-1])
+            nodes = merged
+        if cost <= best:
+            costs['totalizer'] = best = cost
+
+        A = set()
+        cost = 0
+        for c, _ in terms:
+            ncost, values = merge_cost(A | {0}, {0, min(c, cap)})
+            cost += ncost
+            if cost > best:
+                break
+            A = values - {0}
+        else:
+            costs['counter'] = cost
+        return costs
+
+    def LB_Merge_(self, A, B, cap, up, down):
+        # A and B map each attainable value v > 0 of a partial sum to a literal for "sum >= v".
+        # Returns the same mapping for the sum of both, with values above cap clamped to cap.
+        A0 = [0] + sorted(A)
+        B0 = [0] + sorted(B)
+        values = sorted(set(min(a + b, cap) for a in A0 for b in B0))[1:]
+        out = {v: self.new_var() for v in values}
+        clauses = self.clauses
+        if up or down:
+            # the clauses below only relate specific values, so chain the outputs in order
+            for v, vnext in zip(values, values[1:]):
+                clauses.append((-out[vnext], out[v]))
+        if up:
+            for a in A0:
+                for b in B0:
+                    s = min(a + b, cap)
+                    if s:
+                        clauses.append([out[s]] + ([-A[a]] if a else []) + ([-B[b]] if b else []))
+        if down:
+            # sum(A) <= a AND sum(B) <= b implies the sum is below the next value after a + b
+            for ka, a in enumerate(A0):
+                sa = A0[ka + 1] if ka + 1 < len(A0) else None
+                for kb, b in enumerate(B0):
+                    ks = bisect_right(values, a + b)
+                    if ks == len(values):
+                        continue
+                    sb = B0[kb + 1] if kb + 1 < len(B0) else None
+                    clauses.append([-out[values[ks]]] + ([A[sa]] if sa else []) +
+                                   ([B[sb]] if sb else []))
+        return out
+
+    def LB_Outputs_(self, node, lo, hi, polarity):
+        # the bound lo <= S <= hi in terms of the "S >= v" literals of node
+        values = sorted(node)
+        parts = []
+        if lo > 0:
+            k = bisect_right(values, lo - 1)
+            parts.append(node[values[k]] if k < len(values) else False)
+        k = bisect_right(values, hi)
+        if k < len(values):
+            parts.append(-node[values[k]])
+        return self.All_(parts, polarity)
+
+    def Totalizer_(self, equation, nterms, lo, hi, polarity):
+        # Generalized totalizer: merge the terms pairwise in a balanced tree.  It needs
+        # O(n log n) output variables when the coefficients are similar and the bound is loose.
+        terms = equation[:nterms]
+        up, down = self.LB_Directions_(lo, hi, sum(c for c, _ in terms), polarity)
+        cap = hi + 1
+        nodes = [{min(c, cap): a} for c, a in terms]
+        while len(nodes) > 1:
+            merged = [self.LB_Merge_(nodes[k], nodes[k + 1], cap, up, down)
+                      for k in range(0, len(nodes) - 1, 2)]
+            if len(nodes) % 2:
+                merged.append(nodes[-1])
+            nodes = merged
+        return self.LB_Outputs_(nodes[0], lo, hi, polarity)
+
+    def Counter_(self, equation, nterms, lo, hi, polarity):
+        # Sequential weight counter: add the terms to a running sum one at a time.  Its size
+        # grows with the number of terms times the number of distinct sums below the bound.
+        terms = equation[:nterms]
+        up, down = self.LB_Directions_(lo, hi, sum(c for c, _ in terms), polarity)
+        cap = hi + 1
+        node = {}
+        for c, a in terms:
+            leaf = {min(c, cap): a}
+            node = self.LB_Merge_(node, leaf, cap, up, down) if node else leaf
+        return self.LB_Outputs_(node, lo, hi, polarity)
+
+    def SortingNetwork_(self, equation, nterms, lo, hi, polarity):
+        # Batcher's odd-even merge sort on the inputs of a cardinality constraint, so that
+        # the k-th output from the top is true if and only if at least k inputs are.
+        c = equation[0][0]
+        assert all(q == c for q, _ in equation[:nterms]), "sortnet requires equal coefficients"
+        lo = -(-lo // c)
+        hi = hi // c
+        n = _next_power_of_2(nterms)
+        outputs = [a for _, a in equation[:nterms]] + [False] * (n - nterms)
+        for i, j in _odd_even_merge_sort(n):
+            a, b = outputs[i], outputs[j]
+            outputs[i], outputs[j] = self.And(a, b), self.Or(a, b)
+        parts = []
+        if lo > 0:
+            parts.append(outputs[n - lo])
+        if hi < nterms:
+            parts.append(self.Not_(outputs[n - hi - 1]))
+        return self.All_(parts, polarity)
+
+    def LinearBound_(self, equation, lo, hi, preprocess, polarity, encoding='bdd'):
         if preprocess:
             equation, offset = self.LB_Preprocess_(equation)
             lo -= offset
@@ -387,34 +770,64 @@ class Clauses(object):
         if nterms == 0:
             res = lo == 0
         else:
-            res = self.BDD_(equation, nterms, lo, hi, polarity)
+            if encoding is None:
+                costs = self.LB_Costs_(equation, nterms, lo, hi, polarity)
+                encoding = min(LB_ENCODINGS, key=lambda e: costs.get(e, float('inf')))
+                log.trace('LinearBound encoding costs: %s; using %s', costs, encoding)
+            if encoding == 'bdd':
+                res = self.BDD_(equation, nterms, lo, hi, polarity)
+            elif encoding == 'totalizer':
+                res = self.Totalizer_(equation, nterms, lo, hi, polarity)
+            elif encoding == 'counter':
+                res = self.Counter_(equation, nterms, lo, hi, polarity)
+            elif encoding == 'sortnet':
+                res = self.SortingNetwork_(equation, nterms, lo, hi, polarity)
+            else:
+                raise ValueError("unknown LinearBound encoding: %r" % (encoding,))
         if nprune:
             prune = self.All_([-a for c, a in equation[nterms:]], polarity)
+            if type(res) is tuple and polarity is not True:
+                # Combine_ can only merge the clauses of both when they are required
+                res = self.Assign_(res)
             res = self.Combine_((res, prune), polarity)
         return res
 
-    def LinearBound(self, equation, lo, hi, preprocess=True, polarity=None, name=None):
-        return self.Eval_(self.LinearBound_, (equation, lo, hi, preprocess),
-                          polarity, name, conv=False)
+    def LinearBound(self, equation, lo, hi, preprocess=True, polarity=None, name=None,
+                    encoding=None):
+        """
+        lo <= sum of the (coefficient, literal) terms of equation <= hi
 
-    def sat(self, additional=None, includeIf=False, names=False, limit=0):
+        The encoding is one of LB_ENCODINGS.  By default, the one with the fewest estimated
+        clauses is used.
+        """
+        return self.Eval_(partial(self.LinearBound_, encoding=encoding),
+                          (equation, lo, hi, preprocess), polarity, name, conv=False)
+
+    def sat(self, additional=None, includeIf=False, names=False, limit=0, hint=None):
         """
         Calculate a SAT solution for the current clause set.
 
         Returned is the list of those solutions.  When the clauses are
         unsatisfiable, an empty list is returned.
 
+        If given, hint is a sequence of literals the solution should preferably
+        satisfy, e.g. the packages already installed.  pycosat offers no way to
+        set the initial phase of a variable, so the hint is first tried as a set
+        of temporary unit clauses; if that is unsatisfiable, the clauses are
+        solved again without it.
+
         """
         if self.unsat:
             return None
         if not self.m:
             return set() if names else []
+        profiler.count('sat_calls')
         clauses = self.clauses
         if additional:
             def preproc(eqs):
                 def preproc_(cc):
                     for c in cc:
-                        c = self.names.get(c, c)
+                        c = self.Literal_(c)
                         if c is False:
                             continue
                         yield c
@@ -428,17 +841,27 @@ class Clauses(object):
                     if cc[-1] is not True:
                         yield cc
             additional = list(preproc(additional))
-            if additional:
-                if not additional[-1]:
-                    return None
-                clauses = chain(clauses, additional)
-        solution = pycosat.solve(clauses, vars=self.m, prop_limit=limit)
+            if additional and not additional[-1]:
+                return None
+        if hint:
+            hint = [(lit,) for lit in map(self.Literal_, hint) if type(lit) is int]
+        solution = None
+        if hint:
+            solution = pycosat.solve(chain(clauses, additional or (), hint), vars=self.m,
+                                     prop_limit=limit)
+            if solution in ("UNSAT", "UNKNOWN"):
+                log.trace('Solution hint rejected')
+                solution = None
+        if solution is None:
+            solution = pycosat.solve(chain(clauses, additional or ()), vars=self.m,
+                                     prop_limit=limit)
         if solution in ("UNSAT", "UNKNOWN"):
             return None
         if additional and includeIf:
             self.clauses.extend(additional)
         if names:
-            return set(nm for nm in (self.indices.get(s) for s in solution) if nm and nm[0] != '!')
+            return set(nm for nm in (self.indices.get(s) for s in solution if s > 0)
+                       if nm is not None)
         return solution
 
     def itersolve(self, constraints=None, m=None):
@@ -456,25 +879,71 @@ class Clauses(object):
             yield sol
             exclude.append([-k for k in sol if -m <= k <= m])
 
-    def minimize(self, objective, bestsol=None, trymax=False):
+    def minimize(self, objective, bestsol=None, trymax=False, hint=None):
         """
         Minimize the objective function given either by (coeff, integer)
         tuple pairs, or a dictionary of varname: coeff values. The actual
         minimization is multiobjective: first, we minimize the largest
         active coefficient value, then we minimize the sum.
+
+        If the initial solution must be (re)computed, the hint is passed on to
+        sat().  Starting from a solution close to the optimum lets the bisection
+        skip most of its solver calls.
         """
         if bestsol is None or len(bestsol) < self.m:
             log.debug('Clauses added, recomputing solution')
-            bestsol = self.sat()
+            bestsol = self.sat(hint=hint)
         if bestsol is None or self.unsat:
             log.debug('Constraints are unsatisfiable')
             return bestsol, sum(abs(c) for c, a in objective) + 1 if objective else 1
         if not objective:
             log.debug('Empty objective, trivial solution')
             return bestsol, 0
+        return self._minimize(objective, bestsol, trymax)
 
+    def minimize_lexicographic(self, objectives, bestsol=None, trymax=False, hint=None,
+                               names=None):
+        """
+        Minimize a sequence of objectives in order of priority: each objective is
+        minimized subject to the optimal values of the ones before it. This gives
+        the same values as chaining calls to minimize(), but the best solution and
+        the clause set are carried from one objective to the next, so the solution
+        is only recomputed once, up front. Any clauses needed to build the
+        objectives should therefore be added before calling this. As with
+        minimize(), trymax applies to the last objective, and the hint is used
+        for the initial solution. If given, names label the objectives in the
+        profiler's phases.
+
+        Returns the solution and a list of the objective values.
+        """
+        if bestsol is None or len(bestsol) < self.m:
+            log.debug('Clauses added, recomputing solution')
+            bestsol = self.sat(hint=hint)
+        values = []
+        last = len(objectives) - 1
+        for k, objective in enumerate(objectives):
+            if bestsol is None or self.unsat:
+                log.debug('Constraints are unsatisfiable')
+                if type(objective) is dict:
+                    coeffs = itervalues(objective)
+                else:
+                    coeffs = (c for c, a in objective)
+                values.append(sum(abs(c) for c in coeffs) + 1)
+            elif not objective:
+                values.append(0)
+            else:
+                name = 'minimize: %s' % (names[k] if names else k)
+                with profiler.phase(name):
+                    bestsol, bestval = self._minimize(objective, bestsol,
+                                                      trymax and k == last)
+                values.append(bestval)
+        return bestsol, values
+
+    def _minimize(self, objective, bestsol, trymax):
+        # bestsol must satisfy the current clauses, but needn't assign variables that were
+        # added after it was found; only the objective's variables are evaluated
         if type(objective) is dict:
-            objective = [(v, self.names.get(k, k)) for k, v in iteritems(objective)]
+            objective = [(v, self.Literal_(k)) for k, v in iteritems(objective)]
 
         objective, offset = self.LB_Preprocess_(objective)
         maxval = max(c for c, a in objective)
@@ -521,7 +990,14 @@ class Clauses(object):
                     self.Require(self.LinearBound, objective, lo, mid, False)
                 log.trace('Bisection attempt: (%d,%d), (%d+%d) clauses' %
                           (lo, mid, nz, len(self.clauses)-nz))
-                newsol = self.sat()
+                if bestval <= mid:
+                    # Since bestval >= lo, the incumbent already satisfies the new bound and
+                    # there's no need to call the solver.  This is the case whenever the range
+                    # is tight, including the first attempt after peak minimization.
+                    log.trace('Bisection skipped; incumbent is within range')
+                    newsol = bestsol
+                else:
+                    newsol = self.sat()
                 if newsol is None:
                     lo = mid + 1
                     log.trace("Bisection failure, new range=(%d,%d)" % (lo, hi))
@@ -537,8 +1013,7 @@ class Clauses(object):
                     if done:
                         break
                 self.m = m_orig
-                if len(self.clauses) > nz:
-                    self.clauses = self.clauses[:nz]
+                self.clauses.truncate(nz)
                 self.unsat = False
                 try0 = None
 
@@ -559,13 +1034,57 @@ class Clauses(object):
         return bestsol, bestval
 
 
+def _amo_costs(n):
+    # Dict[encoding, number of clauses] for an at-most-one constraint over n literals
+    def commander(n):
+        if n <= 3:
+            return n * (n - 1) // 2
+        groups, rest = divmod(n, 3)
+        return groups * 6 + (rest * (rest - 1) // 2 + rest if rest > 1 else 0) + \
+            commander(groups + (rest > 0))
+
+    def product(n):
+        if n <= 4:
+            return n * (n - 1) // 2
+        p = int(ceil(sqrt(n)))
+        return 2 * n + product(p) + product(-(-n // p))
+
+    return {
+        'nsq': n * (n - 1) // 2,
+        'seq': 3 * n - 4,
+        'commander': commander(n),
+        'product': product(n),
+    }
+
+
+def _next_power_of_2(n):
+    p = 1
+    while p < n:
+        p *= 2
+    return p
+
+
+def _odd_even_merge_sort(n):
+    # comparator index pairs (i, j), i < j, of Batcher's network for n a power of 2
+    p = 1
+    while p < n:
+        k = p
+        while k >= 1:
+            for j in range(k % p, n - k, 2 * k):
+                for i in range(min(k, n - j - k)):
+                    if (i + j) // (2 * p) == (i + j + k) // (2 * p):
+                        yield i + j, i + j + k
+            k //= 2
+        p *= 2
+
+
 def evaluate_eq(eq, sol):
     if type(eq) is not dict:
         eq = {c: v for v, c in eq if type(c) is not bool}
     return sum(eq.get(s, 0) for s in sol if type(s) is not bool)
 
 
-def minimal_unsatisfiable_subset(clauses, sat):
+def minimal_unsatisfiable_subset(clauses, sat, timeout=None):
     """
     Given a set of clauses, find a minimal unsatisfiable subset (an
     unsatisfiable core)
@@ -580,76 +1099,54 @@ def minimal_unsatisfiable_subset(clauses, sat):
     the order False < True), that is, any function where (A <= B) iff (sat(B)
     <= sat(A)), where A <= B means A is a subset of B and False < True).
 
+    If timeout (in seconds) is given and the search takes longer, the subset
+    found so far is returned.  It is unsatisfiable, but may not be minimal.
+
     Algorithm
     =========
 
-    Algorithm suggested from
-    http://www.slideshare.net/pvcpvc9/lecture17-31382688. We do a binary
-    search on the clauses by splitting them in halves A and B. If A or B is
-    UNSAT, we use that and repeat. Otherwise, we recursively check A, but each
-    time we do a sat query, we include B, until we have a minimal subset A* of
-    A such that A* U B is UNSAT. Then we find a minimal subset B* of B such
-    that A* U B* is UNSAT. Then A* U B* will be a minimal unsatisfiable subset
-    of the original set of clauses.
-
-    Proof: If some proper subset C of A* U B* is UNSAT, then there is some
-    clause c in A* U B* not in C. If c is in A*, then that means (A* - {c}) U
-    B* is UNSAT, and hence (A* - {c}) U B is UNSAT, since it is a superset,
-    which contradicts A* being the minimal subset of A with such
-    property. Similarly, if c is in B, then A* U (B* - {c}) is UNSAT, but B* -
-    {c} is a strict subset of B*, contradicting B* being the minimal subset of
-    B with this property.
+    Deletion-based search with adaptive chunk sizes.  We keep a tuple of
+    critical clauses, which are known to belong to the result, and a tuple of
+    candidates, such that critical + candidates is always unsatisfiable.  At
+    each step we try to drop a chunk from the front of the candidates.  If
+    what's left is still unsatisfiable, the chunk is discarded; otherwise we
+    halve the chunk, and a chunk of one clause that can't be dropped is moved
+    to the critical clauses.  The search ends when there are no candidates
+    left, so the number of sat calls grows with the size of the result times
+    the logarithm of the number of clauses.
+
+    Proof: A clause c only becomes critical if critical + candidates - {c} is
+    satisfiable.  Every later set we test is a subset of that one, so c is
+    needed for it to be unsatisfiable, and the final set critical is
+    unsatisfiable with every clause necessary.
 
     """
     clauses = tuple(clauses)
     if sat(clauses):
         raise ValueError("Clauses are not unsatisfiable")
-
-    def split(S):
-        """
-        Split S into two equal parts
-        """
-        S = tuple(S)
-        L = len(S)
-        return S[:L//2], S[L//2:]
-
-    def minimal_unsat(clauses, include=()):
-        """
-        Return a minimal subset A of clauses such that A + include is
-        unsatisfiable.
-
-        Implicitly assumes that clauses + include is unsatisfiable.
-        """
-        global L, d
-
-        # assert not sat(clauses + include), (len(clauses), len(include))
-
-        # Base case: Since clauses + include is implicitly assumed to be
-        # unsatisfiable, if clauses has only one element, it must be its own
-        # minimal subset
-        if len(clauses) == 1:
-            return clauses
-
-        A, B = split(clauses)
-
-        # If one half is unsatisfiable (with include), we can discard the
-        # other half.
-
-        # To display progress, every time we discard clauses, we update the
-        # progress by that much.
-        if not sat(A + include):
-            d += len(B)
-            return minimal_unsat(A, include)
-        if not sat(B + include):
-            d += len(A)
-            return minimal_unsat(B, include)
-
-        Astar = minimal_unsat(A, B + include)
-        Bstar = minimal_unsat(B, Astar + include)
-        return Astar + Bstar
-
-    global L, d
-    L = len(clauses)
-    d = 0
-    ret = minimal_unsat(clauses)
-    return ret
+    deadline = None if timeout is None else time() + timeout
+
+    critical = ()
+    candidates = clauses
+    chunk = max(len(candidates) // 2, 1)
+    while candidates:
+        if deadline is not None and time() > deadline:
+            log.warning("Stopped searching for a minimal unsatisfiable subset after %s seconds; "
+                        "%d of %d clauses may not be needed", timeout, len(candidates),
+                        len(clauses))
+            return critical + candidates
+        chunk = min(chunk, len(candidates))
+        rest = candidates[chunk:]
+        subset = critical + rest
+        if subset and not sat(subset):  # the empty set is trivially satisfiable
+            candidates = rest
+        elif chunk > 1:
+            chunk //= 2
+            continue
+        else:
+            critical += candidates[:1]
+            candidates = rest
+            chunk = max(len(candidates) // 2, 1)
+        log.debug("Unsatisfiable subset search: %d critical, %d candidates, %d discarded",
+                  len(critical), len(candidates), len(clauses) - len(critical) - len(candidates))
+    return critical
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Phase timings and counters for a conda command, reported as JSON.
+
+Instrumented code wraps its phases in `profiler.phase(name)` and reports quantities with
+`profiler.count(counter, n)`.  Both do nothing unless the profiler has been enabled, which the
+command line does for `--profile PATH` (or the `profile` configuration parameter), writing
+the report to PATH when the command finishes.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from contextlib import contextmanager
+from functools import wraps
+import json
+from logging import getLogger
+import os
+import sys
+from threading import RLock, local
+from time import time
+
+from .compat import odict
+
+log = getLogger(__name__)
+
+REPORT_VERSION = 1
+
+
+# CPU time is for the whole process, so phases running in concurrent threads each include the
+# others' CPU time.
+try:
+    from time import process_time as _cpu_time
+except ImportError:  # pragma: py3 no cover
+    def _cpu_time():
+        t = os.times()
+        return t[0] + t[1]
+
+
+class Profiler(object):
+    """
+    Records the calls, wall time and CPU time of named phases, along with counters (records
+    loaded, clauses, SAT calls, ...) that are attributed to the innermost phase running in
+    the current thread.  A phase entered inside another is named "outer/inner", and phases
+    entered more than once accumulate.  Work handed to other threads is attributed to the
+    phase that handed it over only when wrapped with `in_current_phase()`; otherwise its
+    counts are reported at the top level.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = RLock()
+        self._local = local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._phases = odict()
+            self._counts = {}
+            self._start = time(), _cpu_time()
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    def _phase_entry(self, name):
+        entry = self._phases.get(name)
+        if entry is None:
+            entry = self._phases[name] = {
+                'calls': 0,
+                'wall_time': 0.0,
+                'cpu_time': 0.0,
+                'counts': {},
+            }
+        return entry
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        if stack:
+            name = '%s/%s' % (stack[-1], name)
+        with self._lock:
+            # registered on entry, so that phases are reported in the order they started
+            self._phase_entry(name)
+        stack.append(name)
+        wall, cpu = time(), _cpu_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time() - wall, _cpu_time() - cpu
+            stack.pop()
+            with self._lock:
+                entry = self._phase_entry(name)
+                entry['calls'] += 1
+                entry['wall_time'] += wall
+                entry['cpu_time'] += cpu
+
+    def profiled(self, name):
+        """Decorator running each call of the function as the phase `name`."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def in_current_phase(self, func):
+        """
+        Wrap func, to be called on other threads, so that its phases and counts are attributed
+        to the phase running in the current thread.
+        """
+        if not self.enabled:
+            return func
+        parent_stack = tuple(self._stack())
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            saved_stack = stack[:]
+            stack[:] = parent_stack
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stack[:] = saved_stack
+        return wrapper
+
+    def count(self, counter, n=1):
+        if not self.enabled:
+            return
+        stack = self._stack()
+        with self._lock:
+            counts = self._phase_entry(stack[-1])['counts'] if stack else self._counts
+            counts[counter] = counts.get(counter, 0) + n
+
+    def report(self):
+        from .. import __version__
+        with self._lock:
+            start_wall, start_cpu = self._start
+            return odict((
+                ('report_version', REPORT_VERSION),
+                ('conda_version', __version__),
+                ('argv', list(sys.argv)),
+                ('wall_time', time() - start_wall),
+                ('cpu_time', _cpu_time() - start_cpu),
+                ('phases', [odict((
+                    ('name', name),
+                    ('calls', entry['calls']),
+                    ('wall_time', entry['wall_time']),
+                    ('cpu_time', entry['cpu_time']),
+                    ('counts', dict(entry['counts'])),
+                )) for name, entry in self._phases.items()]),
+                ('counts', dict(self._counts)),
+            ))
+
+    def write_report(self, path):
+        report = self.report()
+        with open(path, 'w') as fh:
+            json.dump(report, fh, indent=2)
+            fh.write('\n')
+        log.debug("wrote profile report to %s", path)
+
+
+profiler = Profiler()
@@ -50,8 +50,10 @@ def get_index(channel_urls=(), prepend=True, platform=None,
     return index
 
 
-def fetch_index(channel_urls, use_cache=False, index=None):
-    # type: (prioritize_channels(), bool, bool, Dict[Dist, IndexRecord]) -> Dict[Dist, IndexRecord]
+def fetch_index(channel_urls, use_cache=False, index=None, package_names=None):
+    # type: (prioritize_channels(), bool, bool, Dict[Dist, IndexRecord], Set[str]) -> Dict[Dist, IndexRecord]  # NOQA
+    # When package_names is given and context.use_sharded_repodata is set, sharded channels
+    # only contribute the records reachable from those names.
     log.debug('channel_urls=' + repr(channel_urls))
 
     use_cache = use_cache or context.use_index_cache
@@ -59,7 +61,7 @@ def fetch_index(channel_urls, use_cache=False, index=None):
     # channel_urls reversed to build up index in correct order
     CollectTask = namedtuple('CollectTask', ('url', 'schannel', 'priority'))
     tasks = (CollectTask(url, *channel_urls[url]) for url in reversed(channel_urls))
-    index = collect_all_repodata_as_index(use_cache, tasks)
+    index = collect_all_repodata_as_index(use_cache, tasks, package_names)
 
     return index
 
@@ -76,7 +78,7 @@ def _supplement_index_with_prefix(index, prefix, channels):
             # knows this package is installed.
             old_record = index[dist]
             link = info.get('link') or EMPTY_LINK
-            index[dist] = IndexRecord.from_objects(old_record, link=link)
+            index[dist] = IndexRecord.from_trusted_objects(old_record, link=link)
         else:
             # If the package is not in the repodata, use the local data. If
             # the 'depends' field is not present, we need to set it; older
@@ -89,7 +91,8 @@ def _supplement_index_with_prefix(index, prefix, channels):
             # it is in a channel we don't know about, assign it a value just
             # above the priority of all known channels.
             priority = MAX_CHANNEL_PRIORITY if dist.channel in channels else maxp
-            index[dist] = IndexRecord.from_objects(info, depends=depends, priority=priority)
+            index[dist] = IndexRecord.from_trusted_objects(info, depends=depends,
+                                                           priority=priority)
 
 
 def _supplement_index_with_cache(index, channels):
@@ -105,7 +108,7 @@ def _supplement_index_with_cache(index, channels):
         index_json_record = read_index_json(pkg_dir)
         # See the discussion above about priority assignments.
         priority = MAX_CHANNEL_PRIORITY if dist.channel in channels else maxp
-        repodata_record = PackageRecord.from_objects(
+        repodata_record = PackageRecord.from_trusted_objects(
             index_json_record,
             fn=dist.to_filename(),
             schannel=dist.channel,
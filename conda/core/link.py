@@ -4,7 +4,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 from collections import defaultdict, namedtuple
 from logging import getLogger
 import os
-from os.path import basename, dirname, isdir, join
+from os.path import abspath, basename, dirname, isdir, join, normpath
 from subprocess import CalledProcessError
 import sys
 from tempfile import mkdtemp
@@ -13,7 +13,8 @@ import warnings
 
 from .linked_data import PrefixData, get_python_version_for_prefix, linked_data as get_linked_data
 from .package_cache import PackageCache
-from .path_actions import (CompilePycAction, CreatePrefixRecordAction, CreateNonadminAction,
+from .path_actions import (CompilePycAction, CreateInPrefixPathAction, CreatePrefixRecordAction,
+                           CreateNonadminAction,
                            CreatePythonEntryPointAction, LinkPathAction, MakeMenuAction,
                            RegisterEnvironmentLocationAction, RemoveLinkedPackageRecordAction,
                            RemoveMenuAction, UnlinkPathAction, UnregisterEnvironmentLocationAction,
@@ -26,13 +27,18 @@ from ..common.compat import ensure_text_type, iteritems, itervalues, odict, on_w
 from ..common.io import spinner
 from ..common.path import (explode_directories, get_all_directories, get_major_minor_version,
                            get_python_site_packages_short_path)
+from ..common.profiling import profiler
 from ..common.signals import signal_handler
-from ..exceptions import (KnownPackageClobberError, LinkError, RemoveError,
-                          SharedLinkPathClobberError, UnknownPackageClobberError, maybe_raise)
+from ..exceptions import (CondaSignalInterrupt, KnownPackageClobberError, LinkError,
+                          RemoveError, SharedLinkPathClobberError, UnknownPackageClobberError,
+                          maybe_raise)
 from ..gateways.disk import mkdir_p
+from ..gateways.disk.create import hardlink_tree, unshare_hardlink
 from ..gateways.disk.delete import rm_rf
+from ..gateways.disk.link import islink
 from ..gateways.disk.read import isfile, lexists, read_package_info
-from ..gateways.disk.test import hardlink_supported, softlink_supported
+from ..gateways.disk.test import link_capabilities
+from ..gateways.disk.update import exchange_paths
 from ..gateways.subprocess import subprocess_call
 from ..models.enums import LinkType
 from ..resolve import MatchSpec
@@ -45,15 +51,20 @@ except ImportError:  # pragma: no cover
 log = getLogger(__name__)
 
 
-def determine_link_type(extracted_package_dir, target_prefix):
+def determine_link_type(extracted_package_dir, target_prefix, link_capabilities_cache=None):
+    # link_capabilities_cache is shared by the packages in a transaction, so that link
+    # capabilities are only probed once for each pair of filesystems
     source_test_file = join(extracted_package_dir, 'info', 'index.json')
     if context.always_copy:
         return LinkType.copy
     if context.always_softlink:
         return LinkType.softlink
-    if hardlink_supported(source_test_file, target_prefix):
+    if link_capabilities_cache is None:
+        link_capabilities_cache = {}
+    capabilities = link_capabilities(source_test_file, target_prefix, link_capabilities_cache)
+    if capabilities.hardlink:
         return LinkType.hardlink
-    if context.allow_softlinks and softlink_supported(source_test_file, target_prefix):
+    if context.allow_softlinks and capabilities.softlink:
         return LinkType.softlink
     return LinkType.copy
 
@@ -102,6 +113,92 @@ def make_unlink_actions(transaction_context, target_prefix, prefix_record):
     ))
 
 
+def _batch_actions(actions):
+    # Yields (index of the last action, batch of actions), where each run of consecutive
+    # UnlinkPathActions is one batch and every other action is a batch on its own.  When a
+    # batch fails, rolling back from its last index reverses the whole batch.
+    batch = []
+    for axn_idx, action in enumerate(actions):
+        if type(action) is UnlinkPathAction:
+            batch.append(action)
+            continue
+        if batch:
+            yield axn_idx - 1, batch
+            batch = []
+        yield axn_idx, (action,)
+    if batch:
+        yield len(actions) - 1, batch
+
+
+def _can_stage_prefix(target_prefix):
+    # A staged prefix is swapped in with directory renames, so it can't be the prefix conda
+    # runs from, or hold package caches or other environments that would be cloned with it.
+    if on_win or islink(target_prefix):
+        return False
+    if not isdir(target_prefix if lexists(target_prefix) else dirname(target_prefix)):
+        return False
+    target_prefix = normpath(abspath(target_prefix))
+    for path in concatv((context.root_prefix, context.conda_prefix), context.pkgs_dirs,
+                        context.envs_dirs):
+        path = normpath(abspath(path))
+        if path == target_prefix or path.startswith(join(target_prefix, '')):
+            return False
+    return True
+
+
+def _is_new_prefix(target_prefix):
+    # A missing or empty prefix, such as one being created, is built from scratch in its
+    # staging directory, which is then renamed into place rather than exchanged.
+    return not lexists(target_prefix) or not os.listdir(target_prefix)
+
+
+def _map_prefixes(fn, items):
+    # Returns a tuple of fn(item) for each item, which should each be for a different prefix,
+    # running up to context.transaction_threads at a time.
+    threads = min(context.transaction_threads, len(items))
+    if threads > 1:
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError as e:
+            # concurrent.futures is only available in Python >= 3.2 or if futures is installed
+            log.debug(repr(e))
+        else:
+            executor = ThreadPoolExecutor(threads)
+            try:
+                return tuple(executor.map(profiler.in_current_phase(fn), items))
+            finally:
+                executor.shutdown(wait=True)
+    return tuple(fn(item) for item in items)
+
+
+def _read_packages_info(precs, pkg_cache_recs):
+    # Package metadata is read from each extracted package directory concurrently when
+    # context.concurrent allows.
+    executor = None
+    if context.concurrent and len(precs) > 1:
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(10)
+        except (ImportError, RuntimeError) as e:
+            # concurrent.futures is only available in Python >= 3.2 or if futures is installed
+            # RuntimeError is thrown if number of threads are limited by OS
+            log.debug(repr(e))
+    if executor is None:
+        return tuple(read_package_info(prec, pcrec) for prec, pcrec in zip(precs, pkg_cache_recs))
+    try:
+        return tuple(executor.map(profiler.in_current_phase(read_package_info),
+                                  precs, pkg_cache_recs))
+    finally:
+        executor.shutdown(wait=True)
+
+
+def _is_staged(axngroup, staging_prefixes):
+    # Unlink and link groups for a staged prefix only change the staging directory, which is
+    # discarded on failure instead of being rolled back.
+    return (bool(staging_prefixes) and axngroup.type in ('unlink', 'link')
+            and axngroup.target_prefix in staging_prefixes)
+
+
 def match_specs_to_dists(packages_info_to_link, specs):
     matched_specs = [None for _ in range(len(packages_info_to_link))]
     for spec in specs or ():
@@ -155,6 +252,7 @@ class UnlinkLinkTransaction(object):
                       '\n    '.join(prec.dist_str() for prec in stp.unlink_precs),
                       '\n    '.join(prec.dist_str() for prec in stp.link_precs))
 
+        self._pfe = None
         self._prepared = False
         self._verified = False
 
@@ -164,29 +262,40 @@ class UnlinkLinkTransaction(object):
                        for stp in itervalues(self.prefix_setups))
 
     def get_pfe(self):
-        from .package_cache import ProgressiveFetchExtract
-        if not self.prefix_setups:
-            return ProgressiveFetchExtract(())
-        else:
+        # one ProgressiveFetchExtract covers the packages for every prefix
+        if self._pfe is None:
+            from .package_cache import ProgressiveFetchExtract
             link_precs = set(concat(stp.link_precs for stp in itervalues(self.prefix_setups)))
-            return ProgressiveFetchExtract(link_precs)
+            self._pfe = ProgressiveFetchExtract(link_precs)
+        return self._pfe
 
     def prepare(self):
         if self._prepared:
             return
 
-        self.transaction_context = {}
+        # each prefix gets its own context, since prefixes may be handled concurrently
+        self.transaction_contexts = odict((target_prefix, {})
+                                          for target_prefix in self.prefix_setups)
+
+        def _prepare_prefix(stp):
+            return self._prepare(self.transaction_contexts[stp.target_prefix],
+                                 stp.target_prefix, stp.unlink_precs, stp.link_precs,
+                                 stp.remove_specs, stp.update_specs)
 
         with spinner("Preparing transaction", not context.verbosity and not context.quiet,
-                     context.json):
-            for stp in itervalues(self.prefix_setups):
-                grps = self._prepare(self.transaction_context, stp.target_prefix,
-                                     stp.unlink_precs, stp.link_precs,
-                                     stp.remove_specs, stp.update_specs)
+                     context.json), profiler.phase('transaction.prepare'):
+            setups = tuple(itervalues(self.prefix_setups))
+            profiler.count('packages_to_unlink', sum(len(stp.unlink_precs) for stp in setups))
+            profiler.count('packages_to_link', sum(len(stp.link_precs) for stp in setups))
+            for stp, grps in zip(setups, _map_prefixes(_prepare_prefix, setups)):
                 self.prefix_action_groups[stp.target_prefix] = PrefixActionGroup(*grps)
 
         self._prepared = True
 
+    def _remove_temp_dirs(self):
+        for transaction_context in itervalues(self.transaction_contexts):
+            rm_rf(transaction_context['temp_dir'])
+
     def verify(self):
         if not self._prepared:
             self.prepare()
@@ -198,13 +307,13 @@ class UnlinkLinkTransaction(object):
             return
 
         with spinner("Verifying transaction", not context.verbosity and not context.quiet,
-                     context.json):
+                     context.json), profiler.phase('transaction.verify'):
             exceptions = self._verify(self.prefix_setups, self.prefix_action_groups)
             if exceptions:
                 try:
                     maybe_raise(CondaMultiError(exceptions), context)
                 except:
-                    rm_rf(self.transaction_context['temp_dir'])
+                    self._remove_temp_dirs()
                     raise
                 log.info(exceptions)
 
@@ -216,10 +325,109 @@ class UnlinkLinkTransaction(object):
 
         assert not context.dry_run
 
+        if context.transaction_threads > 1 and len(self.prefix_action_groups) > 1:
+            # each prefix's action groups run in order, alongside the other prefixes
+            action_group_sequences = tuple(tuple(concat(prefix_group)) for prefix_group
+                                           in itervalues(self.prefix_action_groups))
+        else:
+            action_group_sequences = (
+                tuple(concat(interleave(itervalues(self.prefix_action_groups)))),
+            )
+
+        with profiler.phase('transaction.execute'):
+            staging_prefixes = self._get_staging_prefixes()
+            try:
+                if staging_prefixes:
+                    self._stage_prefixes(staging_prefixes)
+                    for transaction_context in itervalues(self.transaction_contexts):
+                        transaction_context['staging_prefixes'] = staging_prefixes
+                self._execute(action_group_sequences, staging_prefixes)
+            finally:
+                for transaction_context in itervalues(self.transaction_contexts):
+                    transaction_context.pop('staging_prefixes', None)
+                for staging_prefix in itervalues(staging_prefixes):
+                    # once every prefix is swapped, this is the old state of the prefix
+                    rm_rf(staging_prefix)
+                self._remove_temp_dirs()
+            if profiler.enabled:
+                axngroups = tuple(concat(action_group_sequences))
+                profiler.count('files_unlinked', sum(
+                    1 for axngroup in axngroups if axngroup.type == 'unlink'
+                    for axn in axngroup.actions if isinstance(axn, UnlinkPathAction)))
+                profiler.count('files_linked', sum(
+                    1 for axngroup in axngroups if axngroup.type == 'link'
+                    for axn in axngroup.actions
+                    if isinstance(axn, LinkPathAction) and axn.link_type != LinkType.directory))
+
+    def _get_staging_prefixes(self):
+        # Staging covers every prefix in the transaction or none of them, so that rolling back
+        # is either entirely needed or entirely unneeded.
+        if not context.staged_transactions:
+            return {}
+        target_prefixes = tuple(stp.target_prefix for stp in itervalues(self.prefix_setups)
+                                if stp.unlink_precs or stp.link_precs)
+        if not target_prefixes or not all(_can_stage_prefix(p) for p in target_prefixes):
+            log.debug("not staging transaction for %s", ', '.join(target_prefixes))
+            return {}
+        # Link and unlink scripts run against the prefix's real path, since whatever paths
+        # they write or register must still exist after the swap.
+        if any(_has_link_scripts(axngroup) for axngroup
+               in concat(concat(itervalues(self.prefix_action_groups)))):
+            log.debug("not staging transaction with link or unlink scripts")
+            return {}
+        return odict((p, p + '.c~staging') for p in target_prefixes)
+
+    @staticmethod
+    def _stage_prefixes(staging_prefixes):
+        def _stage_prefix(prefixes):
+            target_prefix, staging_prefix = prefixes
+            if lexists(staging_prefix):
+                # left behind by an interrupted transaction
+                rm_rf(staging_prefix)
+            log.debug("staging %s in %s", target_prefix, staging_prefix)
+            if _is_new_prefix(target_prefix):
+                mkdir_p(join(staging_prefix, 'conda-meta'))
+            else:
+                # history and package records are modified in place, so they're copied
+                hardlink_tree(target_prefix, staging_prefix, copy_directories=('conda-meta',))
+            # package records are removed by renaming them away first, as for the live prefix
+            PrefixData(staging_prefix).load()
+
+        _map_prefixes(_stage_prefix, tuple(iteritems(staging_prefixes)))
+
+    @staticmethod
+    def _swap_staged_prefixes(staging_prefixes):
+        # Every prefix is swapped into place, or, if any swap fails, the ones already swapped
+        # are swapped back before the error is raised.  A new prefix is renamed over the empty
+        # directory (or nothing) it replaces, and renamed back to swap it back.
+        swapped = []
         try:
-            self._execute(tuple(concat(interleave(itervalues(self.prefix_action_groups)))))
+            for target_prefix, staging_prefix in iteritems(staging_prefixes):
+                log.debug("swapping staged %s into place", target_prefix)
+                if _is_new_prefix(target_prefix):
+                    existed = lexists(target_prefix)
+                    os.rename(staging_prefix, target_prefix)
+                    swapped.append((target_prefix, staging_prefix, existed))
+                else:
+                    exchange_paths(target_prefix, staging_prefix)
+                    swapped.append((target_prefix, staging_prefix, None))
+        except (IOError, OSError):
+            for target_prefix, staging_prefix, existed in reversed(swapped):
+                log.debug("swapping %s back", target_prefix)
+                if existed is None:
+                    exchange_paths(target_prefix, staging_prefix)
+                else:
+                    os.rename(target_prefix, staging_prefix)
+                    if existed:
+                        mkdir_p(target_prefix)
+            raise
         finally:
-            rm_rf(self.transaction_context['temp_dir'])
+            for staging_prefix in itervalues(staging_prefixes):
+                PrefixData._cache_.pop(staging_prefix, None)
+        for target_prefix in staging_prefixes:
+            prefix_data = PrefixData._cache_.get(target_prefix)
+            if prefix_data is not None:
+                prefix_data.load()
 
     @classmethod
     def _prepare(cls, transaction_context, target_prefix, unlink_precs, link_precs,
@@ -244,10 +452,11 @@ class UnlinkLinkTransaction(object):
         pkg_cache_recs_to_link = tuple(PackageCache.get_entry_to_link(prec)
                                        for prec in link_precs)
         assert all(pkg_cache_recs_to_link)
-        packages_info_to_link = tuple(read_package_info(prec, pcrec)
-                                      for prec, pcrec in zip(link_precs, pkg_cache_recs_to_link))
+        packages_info_to_link = _read_packages_info(link_precs, pkg_cache_recs_to_link)
 
-        link_types = tuple(determine_link_type(pkg_info.extracted_package_dir, target_prefix)
+        link_capabilities_cache = {}
+        link_types = tuple(determine_link_type(pkg_info.extracted_package_dir, target_prefix,
+                                               link_capabilities_cache)
                            for pkg_info in packages_info_to_link)
 
         # make all the path actions
@@ -447,66 +656,107 @@ class UnlinkLinkTransaction(object):
 
     @classmethod
     def _verify(cls, prefix_setups, prefix_action_groups):
+        def _verify_prefix(item):
+            target_prefix, prefix_group = item
+            return tuple(concatv(cls._verify_individual_level(prefix_group),
+                                 cls._verify_prefix_level(target_prefix, prefix_group)))
+
+        prefix_exceptions = _map_prefixes(_verify_prefix, tuple(iteritems(prefix_action_groups)))
         exceptions = tuple(exc for exc in concatv(
-            concat(cls._verify_individual_level(prefix_group)
-                   for prefix_group in itervalues(prefix_action_groups)),
-            concat(cls._verify_prefix_level(target_prefix, prefix_group)
-                   for target_prefix, prefix_group in iteritems(prefix_action_groups)),
+            concat(prefix_exceptions),
             cls._verify_transaction_level(prefix_setups),
         ) if exc)
         return exceptions
 
     @classmethod
-    def _execute(cls, all_action_groups):
-        with signal_handler(conda_signal_handler):
+    def _execute(cls, action_group_sequences, staging_prefixes=None):
+        # Each sequence of action groups is executed in order, and separate sequences may run
+        # concurrently.  If any sequence fails, every executed group is rolled back.
+        results = [(0, None)] * len(action_group_sequences)  # (groups executed, error)
+
+        def _execute_sequence(seq_idx):
             pkg_idx = 0
             try:
-                with spinner("Executing transaction", not context.verbosity and not context.quiet,
-                             context.json):
-                    for pkg_idx, axngroup in enumerate(all_action_groups):
-                        cls._execute_actions(pkg_idx, axngroup)
+                for pkg_idx, axngroup in enumerate(action_group_sequences[seq_idx]):
+                    cls._execute_actions(pkg_idx, axngroup, staging_prefixes)
+                    results[seq_idx] = pkg_idx + 1, None
             except CondaMultiError as e:
-                action, is_unlink = (None, axngroup.type == 'unlink')
-                prec = axngroup.pkg_data
-
-                log.error("An error occurred while %s package '%s'.\n"
-                          "%r\n"
-                          "Attempting to roll back.\n",
-                          'uninstalling' if is_unlink else 'installing',
-                          prec and prec.dist_str(), e.errors[0])
+                results[seq_idx] = pkg_idx, e
 
-                # reverse all executed packages except the one that failed
+        with signal_handler(conda_signal_handler):
+            errors = []
+            try:
+                with spinner("Executing transaction", not context.verbosity and not context.quiet,
+                             context.json):
+                    _map_prefixes(_execute_sequence, range(len(action_group_sequences)))
+            except CondaSignalInterrupt as e:
+                # When sequences run on other threads, the interrupt is raised here once they've
+                # finished, so what they did is rolled back like any failure.
+                log.error("%r\nAttempting to roll back.\n", e)
+                errors.append(e)
+
+            for action_groups, (executed_count, e) in zip(action_group_sequences, results):
+                if e is not None:
+                    axngroup = action_groups[executed_count]
+                    is_unlink, prec = axngroup.type == 'unlink', axngroup.pkg_data
+                    log.error("An error occurred while %s package '%s'.\n"
+                              "%r\n"
+                              "Attempting to roll back.\n",
+                              'uninstalling' if is_unlink else 'installing',
+                              prec and prec.dist_str(), e.errors[0])
+                    errors.extend(e.errors)
+
+            if not errors:
+                cls._cleanup_actions(action_group_sequences)
+                if staging_prefixes:
+                    try:
+                        cls._swap_staged_prefixes(staging_prefixes)
+                    except (IOError, OSError) as e:
+                        log.error("An error occurred while swapping staged environments into "
+                                  "place.\n%r\nAttempting to roll back.\n", e)
+                        errors.append(e)
+
+            if errors:
+                # reverse all executed packages except the ones that failed
                 rollback_excs = []
                 if context.rollback_enabled:
                     with spinner("Rolling back transaction",
                                  not context.verbosity and not context.quiet, context.json):
-                        failed_pkg_idx = pkg_idx
-                        reverse_actions = reversed(tuple(enumerate(
-                            take(failed_pkg_idx, all_action_groups)
-                        )))
-                        for pkg_idx, axngroup in reverse_actions:
-                            excs = cls._reverse_actions(pkg_idx, axngroup)
-                            rollback_excs.extend(excs)
-
-                raise CondaMultiError(tuple(concatv(
-                    (e.errors
-                     if isinstance(e, CondaMultiError)
-                     else (e,)),
-                    rollback_excs,
-                )))
-            else:
-                for axngroup in all_action_groups:
-                    for action in axngroup.actions:
-                        action.cleanup()
+                        for action_groups, (executed_count, _) in zip(action_group_sequences,
+                                                                      results):
+                            reverse_actions = reversed(tuple(enumerate(
+                                take(executed_count, action_groups)
+                            )))
+                            for pkg_idx, axngroup in reverse_actions:
+                                if _is_staged(axngroup, staging_prefixes):
+                                    # discarded along with the staging directory
+                                    continue
+                                excs = cls._reverse_actions(pkg_idx, axngroup)
+                                rollback_excs.extend(excs)
+
+                raise CondaMultiError(tuple(concatv(errors, rollback_excs)))
+
+    @staticmethod
+    def _cleanup_actions(action_group_sequences):
+        unlink_path_actions = []
+        for axngroup in concat(action_group_sequences):
+            for action in axngroup.actions:
+                if isinstance(action, UnlinkPathAction):
+                    unlink_path_actions.append(action)
+                else:
+                    action.cleanup()
+        UnlinkPathAction.cleanup_all(unlink_path_actions)
 
     @staticmethod
-    def _execute_actions(pkg_idx, axngroup):
+    def _execute_actions(pkg_idx, axngroup, staging_prefixes=None):
         target_prefix = axngroup.target_prefix
+        target_root = (staging_prefixes or {}).get(target_prefix, target_prefix)
+        is_staged = _is_staged(axngroup, staging_prefixes)
         axn_idx, action, is_unlink = 0, None, axngroup.type == 'unlink'
         prec = axngroup.pkg_data
 
-        if not isdir(join(target_prefix, 'conda-meta')):
-            mkdir_p(join(target_prefix, 'conda-meta'))
+        if not isdir(join(target_root, 'conda-meta')):
+            mkdir_p(join(target_root, 'conda-meta'))
 
         try:
             if axngroup.type == 'unlink':
@@ -521,12 +771,20 @@ class UnlinkLinkTransaction(object):
                          prec.dist_str(), target_prefix, prec.extracted_package_dir)
 
             if axngroup.type in ('unlink', 'link'):
+                # never staged; see _get_staging_prefixes()
                 run_script(target_prefix if is_unlink else prec.extracted_package_dir,
                            prec,
                            'pre-unlink' if is_unlink else 'pre-link',
                            target_prefix)
-            for axn_idx, action in enumerate(axngroup.actions):
-                action.execute()
+            for axn_idx, batch in _batch_actions(axngroup.actions):
+                action = batch[-1]
+                if len(batch) > 1:
+                    UnlinkPathAction.execute_all(batch)
+                else:
+                    if is_staged and isinstance(action, CreateInPrefixPathAction):
+                        # files in the staging directory may be hardlinks to the live prefix
+                        unshare_hardlink(action.target_full_path)
+                    action.execute()
             if axngroup.type in ('unlink', 'link'):
                 run_script(target_prefix, prec, 'post-unlink' if is_unlink else 'post-link')
         except Exception as e:  # this won't be a multi error
@@ -534,7 +792,7 @@ class UnlinkLinkTransaction(object):
             log.debug("Error in action #%d for pkg_idx #%d %r", axn_idx, pkg_idx, action,
                       exc_info=True)
             reverse_excs = ()
-            if context.rollback_enabled:
+            if context.rollback_enabled and not _is_staged(axngroup, staging_prefixes):
                 # log.error("An error occurred while %s package '%s'.\n"
                 #           "%r\n"
                 #           "Attempting to roll back.\n",
@@ -704,14 +962,29 @@ class UnlinkLinkTransaction(object):
         return legacy_action_groups
 
 
+def _script_path(prefix, prec, action):
+    return join(prefix, 'Scripts' if on_win else 'bin',
+                '.%s-%s.%s' % (prec.name, action, 'bat' if on_win else 'sh'))
+
+
+def _has_link_scripts(axngroup):
+    # Whether run_script() will find a script to run for an action group's package.
+    prec = axngroup.pkg_data
+    if axngroup.type == 'unlink':
+        return any(isfile(_script_path(axngroup.target_prefix, prec, action))
+                   for action in ('pre-unlink', 'post-unlink'))
+    elif axngroup.type == 'link':
+        return any(isfile(_script_path(prec.extracted_package_dir, prec, action))
+                   for action in ('pre-link', 'post-link'))
+    return False
+
+
 def run_script(prefix, prec, action='post-link', env_prefix=None):
     """
     call the post-link (or pre-unlink) script, and return True on success,
     False on failure
     """
-    path = join(prefix,
-                'Scripts' if on_win else 'bin',
-                '.%s-%s.%s' % (prec.name, action, 'bat' if on_win else 'sh'))
+    path = _script_path(prefix, prec, action)
     if not isfile(path):
         return True
 
@@ -7,6 +7,7 @@ from os.path import join, lexists
 
 from ..base.constants import CONDA_TARBALL_EXTENSION
 from ..base.context import context
+from ..common.cache import LRUCache
 from ..common.compat import itervalues, with_metaclass
 from ..common.constants import NULL
 from ..common.serialize import json_load
@@ -23,19 +24,19 @@ log = getLogger(__name__)
 class PrefixDataType(type):
     """Basic caching of PrefixData instance objects."""
     def __call__(cls, prefix_path):
-        if prefix_path in PrefixData._cache_:
-            return PrefixData._cache_[prefix_path]
+        prefix_data_instance = PrefixData._cache_.get(prefix_path)
+        if prefix_data_instance is not None:
+            return prefix_data_instance
         elif isinstance(prefix_path, PrefixData):
             return prefix_path
         else:
             prefix_data_instance = super(PrefixDataType, cls).__call__(prefix_path)
-            PrefixData._cache_[prefix_path] = prefix_data_instance
-            return prefix_data_instance
+            return PrefixData._cache_.setdefault(prefix_path, prefix_data_instance)
 
 
 @with_metaclass(PrefixDataType)
 class PrefixData(object):
-    _cache_ = {}
+    _cache_ = LRUCache(maxsize=256)
 
     def __init__(self, prefix_path):
         self.prefix_path = prefix_path
@@ -16,6 +16,7 @@ from ..common.compat import iteritems, itervalues, odict, text_type, with_metacl
 from ..common.constants import NULL
 from ..common.io import ProgressBar
 from ..common.path import expand, url_to_path
+from ..common.profiling import profiler
 from ..common.signals import signal_handler
 from ..common.url import path_to_url
 from ..gateways.disk.create import (create_package_cache_directory, extract_tarball,
@@ -73,10 +74,13 @@ class PackageCache(object):
         self._package_cache_records[package_cache_record] = package_cache_record
 
     def load(self):
-        self.__package_cache_records = _package_cache_records = {}
+        # records are only published once complete, since transactions for several prefixes
+        # may load the same cache concurrently
+        _package_cache_records = {}
         self._check_writable()  # called here to create the cache if it doesn't exist
         if not isdir(self.pkgs_dir):
             # no directory exists, and we didn't have permissions to create it
+            self.__package_cache_records = _package_cache_records
             return
 
         for base_name in self._dedupe_pkgs_dir_contents(listdir(self.pkgs_dir)):
@@ -88,6 +92,7 @@ class PackageCache(object):
                 package_cache_record = self._make_single_record(base_name)
                 if package_cache_record:
                     _package_cache_records[package_cache_record] = package_cache_record
+        self.__package_cache_records = _package_cache_records
 
     def get(self, package_ref, default=NULL):
         assert isinstance(package_ref, PackageRef)
@@ -112,8 +117,10 @@ class PackageCache(object):
             return (pcrec for pcrec in itervalues(self._package_cache_records)
                     if param.match(pcrec))
         else:
-            # assume isinstance(param, PackageRef)
-            return (pcrec for pcrec in itervalues(self._package_cache_records) if pcrec == param)
+            # assume isinstance(param, PackageRef); records are keyed by themselves, and
+            # PackageRef equality and hashing agree, so this is a single lookup
+            pcrec = self._package_cache_records.get(param)
+            return iter(() if pcrec is None else (pcrec,))
 
     @classmethod
     def query_all(cls, package_ref_or_match_spec, pkgs_dirs=None):
@@ -509,7 +516,9 @@ class ProgressiveFetchExtract(object):
                       '\n    '.join(text_type(ea) for ea in self.extract_actions))
 
         exceptions = []
-        with signal_handler(conda_signal_handler):
+        with signal_handler(conda_signal_handler), profiler.phase('fetch_extract'):
+            profiler.count('packages_fetched', len(self.cache_actions))
+            profiler.count('packages_extracted', len(self.extract_actions))
             for prec_or_spec, prec_actions in iteritems(self.paired_actions):
                 exc = self._execute_actions(prec_or_spec, prec_actions)
                 if exc:
@@ -7,11 +7,13 @@ from logging import getLogger
 from os.path import basename, dirname, getsize, join
 from random import random
 import re
+from threading import RLock
 from time import sleep
 from uuid import uuid4
 
 from .linked_data import PrefixData
-from .portability import _PaddingError, update_prefix
+from .portability import (_PaddingError, copy_and_update_prefix, read_binary_prefix_segments,
+                          record_binary_prefix_segments)
 from .._vendor.auxlib.compat import with_metaclass
 from .._vendor.auxlib.ish import dals
 from ..base.constants import CONDA_TARBALL_EXTENSION
@@ -27,10 +29,10 @@ from ..gateways.connection.download import download
 from ..gateways.disk.create import (compile_pyc, copy, create_hard_link_or_copy,
                                     create_link, create_python_entry_point, extract_tarball,
                                     make_menu, write_as_json_to_file)
-from ..gateways.disk.delete import rm_rf, try_rmdir_all_empty
+from ..gateways.disk.delete import rm_paths, rm_rf, try_rmdir_all_empty
 from ..gateways.disk.read import (compute_md5sum, compute_sha256sum, islink, lexists,
                                   read_index_json)
-from ..gateways.disk.update import backoff_rename, touch
+from ..gateways.disk.update import backoff_rename, backoff_rename_all, touch
 from ..history import History
 from ..models.channel import Channel
 from ..models.enums import LeasedPathType, LinkType, NoarchType, PathType
@@ -100,9 +102,18 @@ class PrefixPathAction(PathAction):
         self.target_prefix = target_prefix
         self.target_short_path = target_short_path
 
+    @property
+    def target_root(self):
+        # Where target_prefix is on disk.  While UnlinkLinkTransaction builds a staged copy of
+        # the prefix, files go there, but anything written into them still uses target_prefix.
+        staging_prefixes = (self.transaction_context or {}).get('staging_prefixes')
+        if staging_prefixes:
+            return staging_prefixes.get(self.target_prefix, self.target_prefix)
+        return self.target_prefix
+
     @property
     def target_full_path(self):
-        trgt, shrt_pth = self.target_prefix, self.target_short_path
+        trgt, shrt_pth = self.target_root, self.target_short_path
         if trgt is not None and shrt_pth is not None:
             return join(trgt, win_path_ok(shrt_pth))
         else:
@@ -111,6 +122,10 @@ class PrefixPathAction(PathAction):
 
 @with_metaclass(ABCMeta)
 class EnvsDirectoryPathAction(PathAction):
+    # environments catalogs are shared by the prefixes of a transaction, which may be
+    # executed concurrently
+    _lock = RLock()
+
     def __init__(self, transaction_context, target_prefix):
         self.transaction_context = transaction_context
         self.target_prefix = target_prefix
@@ -435,19 +450,18 @@ class PrefixReplaceLinkAction(LinkPathAction):
 
         self.intermediate_path = join(self.transaction_context['temp_dir'], text_type(uuid4()))
 
-        log.trace("copying %s => %s", self.source_full_path, self.intermediate_path)
-        create_link(self.source_full_path, self.intermediate_path, LinkType.copy)
-
+        segments = read_binary_prefix_segments(self.source_prefix).get(
+            self.source_short_path)
         try:
-            log.trace("rewriting prefixes in %s", self.target_full_path)
-            update_prefix(self.intermediate_path, self.target_prefix, self.prefix_placeholder,
-                          self.file_mode)
+            log.trace("copying %s => %s and rewriting prefixes for %s", self.source_full_path,
+                      self.intermediate_path, self.target_full_path)
+            sha256_in_prefix = copy_and_update_prefix(
+                self.source_full_path, self.intermediate_path, self.target_prefix,
+                self.prefix_placeholder, self.file_mode, segments)
         except _PaddingError:
             raise PaddingError(self.target_full_path, self.prefix_placeholder,
                                len(self.prefix_placeholder))
 
-        sha256_in_prefix = compute_sha256sum(self.intermediate_path)
-
         self.prefix_path_data = PathDataV1.from_objects(
             self.prefix_path_data,
             file_mode=self.file_mode,
@@ -553,7 +567,7 @@ class CompilePycAction(CreateInPrefixPathAction):
         log.trace("compiling %s", self.target_full_path)
         target_python_version = self.transaction_context['target_python_version']
         python_short_path = get_python_short_path(target_python_version)
-        python_full_path = join(self.target_prefix, win_path_ok(python_short_path))
+        python_full_path = join(self.target_root, win_path_ok(python_short_path))
         compile_pyc(python_full_path, self.source_full_path, self.target_full_path)
         self._execute_successful = True
 
@@ -848,12 +862,12 @@ class CreatePrefixRecordAction(CreateInPrefixPathAction):
         )
 
         log.trace("creating linked package record %s", self.target_full_path)
-        PrefixData(self.target_prefix).insert(self.prefix_record)
+        PrefixData(self.target_root).insert(self.prefix_record)
 
     def reverse(self):
         log.trace("reversing linked package record creation %s", self.target_full_path)
         # TODO: be careful about failure here, and being too strict
-        PrefixData(self.target_prefix).remove(self.package_info.index_json_record.name)
+        PrefixData(self.target_root).remove(self.package_info.index_json_record.name)
 
 
 class UpdateHistoryAction(CreateInPrefixPathAction):
@@ -871,7 +885,9 @@ class UpdateHistoryAction(CreateInPrefixPathAction):
         self.remove_specs = remove_specs
         self.update_specs = update_specs
 
-        self.hold_path = self.target_full_path + '.c~'
+    @property
+    def hold_path(self):
+        return self.target_full_path + '.c~'
 
     def execute(self):
         log.trace("updating environment history %s", self.target_full_path)
@@ -879,7 +895,7 @@ class UpdateHistoryAction(CreateInPrefixPathAction):
         if lexists(self.target_full_path):
             copy(self.target_full_path, self.hold_path)
 
-        h = History(self.target_prefix)
+        h = History(self.target_root)
         h.update()
         h.write_specs(self.remove_specs, self.update_specs)
 
@@ -902,20 +918,25 @@ class RegisterEnvironmentLocationAction(EnvsDirectoryPathAction):
 
         # touches env prefix entry in catalog.json
         from .envs_manager import EnvsDirectory
-        ed = EnvsDirectory(self.envs_dir_path)
-
-        self.envs_dir_state = ed._get_state()
-        ed.register_env(self.target_prefix)
-        ed.write_to_disk()
+        with self._lock:
+            ed = EnvsDirectory(self.envs_dir_path)
+            self._existing_entry = ed.get_registered_env_by_location(self.target_prefix)
+            ed.register_env(self.target_prefix)
+            ed.write_to_disk()
         self._execute_successful = True
 
     def reverse(self):
-        if self._execute_successful:
+        if self._execute_successful and self._existing_entry is None:
             log.trace("reversing environment registration in catalog for %s", self.target_prefix)
             from .envs_manager import EnvsDirectory
-            ed = EnvsDirectory(self.envs_dir_path)
-            ed._set_state(self.envs_dir_state)
-            ed.write_to_disk()
+            with self._lock:
+                # only this prefix's entry is reverted, since other prefixes may have been
+                # registered concurrently
+                ed = EnvsDirectory(self.envs_dir_path)
+                entry = ed.get_registered_env_by_location(self.target_prefix)
+                if entry is not None:
+                    ed._registered_envs.remove(entry)
+                ed.write_to_disk()
 
 
 # class RegisterPrivateEnvAction(EnvsDirectoryPathAction):
@@ -996,9 +1017,12 @@ class UnlinkPathAction(RemoveFromPrefixPathAction):
                                                target_prefix, target_short_path)
         conda_temp_extension = '.c~'
         self.holding_short_path = self.target_short_path + conda_temp_extension
-        self.holding_full_path = self.target_full_path + conda_temp_extension
         self.link_type = link_type
 
+    @property
+    def holding_full_path(self):
+        return join(self.target_root, win_path_ok(self.holding_short_path))
+
     def execute(self):
         if self.link_type != LinkType.directory:
             log.trace("renaming %s => %s", self.target_short_path, self.holding_short_path)
@@ -1015,6 +1039,22 @@ class UnlinkPathAction(RemoveFromPrefixPathAction):
         else:
             rm_rf(self.holding_full_path)
 
+    @staticmethod
+    def execute_all(actions):
+        # Same as calling execute() on each action, with the renames batched.  Safe to reverse()
+        # every action after a failure.
+        backoff_rename_all(((axn.target_full_path, axn.holding_full_path) for axn in actions
+                            if axn.link_type != LinkType.directory), force=True)
+
+    @staticmethod
+    def cleanup_all(actions):
+        # Same as calling cleanup() on each action, with the files removed in one batch before
+        # the emptied directories.
+        rm_paths((axn.holding_full_path for axn in actions
+                  if axn.link_type != LinkType.directory),
+                 (axn.target_full_path for axn in actions
+                  if axn.link_type == LinkType.directory))
+
 
 class RemoveMenuAction(RemoveFromPrefixPathAction):
 
@@ -1053,11 +1093,11 @@ class RemoveLinkedPackageRecordAction(UnlinkPathAction):
 
     def execute(self):
         super(RemoveLinkedPackageRecordAction, self).execute()
-        PrefixData(self.target_prefix).remove(self.linked_package_data.name)
+        PrefixData(self.target_root).remove(self.linked_package_data.name)
 
     def reverse(self):
         super(RemoveLinkedPackageRecordAction, self).reverse()
-        PrefixData(self.target_prefix)._load_single_record(self.target_full_path)
+        PrefixData(self.target_root)._load_single_record(self.target_full_path)
 
 
 class UnregisterEnvironmentLocationAction(EnvsDirectoryPathAction):
@@ -1067,20 +1107,28 @@ class UnregisterEnvironmentLocationAction(EnvsDirectoryPathAction):
 
         # touches env prefix entry in catalog.json
         from .envs_manager import EnvsDirectory
-        ed = EnvsDirectory(self.envs_dir_path)
-
-        self.envs_dir_state = ed._get_state()
-        ed.unregister_env(self.target_prefix)
-        ed.write_to_disk()
+        with self._lock:
+            ed = EnvsDirectory(self.envs_dir_path)
+            entry = ed.get_registered_env_by_location(self.target_prefix)
+            ed.unregister_env(self.target_prefix)
+            if ed.get_registered_env_by_location(self.target_prefix) is None:
+                self._unregistered_entry = entry
+            else:
+                self._unregistered_entry = None
+            ed.write_to_disk()
         self._execute_successful = True
 
     def reverse(self):
-        if self._execute_successful:
+        if self._execute_successful and self._unregistered_entry is not None:
             log.trace("reversing environment unregistration in catalog for %s", self.target_prefix)
             from .envs_manager import EnvsDirectory
-            ed = EnvsDirectory(self.envs_dir_path)
-            ed._set_state(self.envs_dir_state)
-            ed.write_to_disk()
+            with self._lock:
+                # only this prefix's entry is restored, since other prefixes may have been
+                # unregistered concurrently
+                ed = EnvsDirectory(self.envs_dir_path)
+                if ed.get_registered_env_by_location(self.target_prefix) is None:
+                    ed._registered_envs.append(self._unregistered_entry)
+                ed.write_to_disk()
 
 
 # class UnregisterPrivateEnvAction(EnvsDirectoryPathAction):
@@ -1283,6 +1331,7 @@ class ExtractPackageAction(PathAction):
                         progress_update_callback=progress_update_callback)
 
         index_json_record = read_index_json(self.target_full_path)
+        record_binary_prefix_segments(self.target_full_path)
 
         if isinstance(self.record_or_spec, MatchSpec):
             url = self.record_or_spec.get_raw_value('url')
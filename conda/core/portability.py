@@ -1,19 +1,30 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from hashlib import sha256
+import json
 from logging import getLogger
-from os.path import realpath
+import os
+from os.path import join, realpath
 import re
+from shutil import copystat
 import struct
 
 from ..base.constants import PREFIX_PLACEHOLDER
+from ..common.cache import LRUCache
 from ..common.compat import on_win
 from ..exceptions import CondaIOError, BinaryPrefixReplacementError
+from ..gateways.disk.create import write_as_json_to_file
+from ..gateways.disk.read import read_paths_json
 from ..gateways.disk.update import CancelOperation, update_file_in_place_as_binary
 from ..models.enums import FileMode
 
 log = getLogger(__name__)
 
+# Written to the info directory of extracted packages; see record_binary_prefix_segments()
+BINARY_PREFIX_SEGMENTS_FILE = 'binary_prefix_segments.json'
+_binary_prefix_segments_cache = LRUCache(maxsize=64)
+
 
 # three capture groups: whole_shebang, executable, options
 SHEBANG_REGEX = (br'^(#!'  # pretty much the whole match string
@@ -34,29 +45,66 @@ def update_prefix(path, new_prefix, placeholder=PREFIX_PLACEHOLDER, mode=FileMod
         new_prefix = new_prefix.replace('\\', '/')
 
     def _update_prefix(original_data):
+        data = _replace_prefix_data(path, original_data, new_prefix, placeholder, mode)
 
-        # Step 1. do all prefix replacement
-        data = replace_prefix(mode, original_data, placeholder, new_prefix)
-
-        # Step 2. if the shebang is too long, shorten it using /usr/bin/env trick
-        if not on_win:
-            data = replace_long_shebang(mode, data)
-
-        # Step 3. if the before and after content is the same, skip writing
+        # if the before and after content is the same, skip writing
         if data == original_data:
             raise CancelOperation()
-
-        # Step 4. if we have a binary file, make sure the byte size is the same before
-        #         and after the update
-        if mode == FileMode.binary and len(data) != len(original_data):
-            raise BinaryPrefixReplacementError(path, placeholder, new_prefix,
-                                               len(original_data), len(data))
-
         return data
 
     update_file_in_place_as_binary(realpath(path), _update_prefix)
 
 
+def copy_and_update_prefix(src, dst, new_prefix, placeholder=PREFIX_PLACEHOLDER,
+                           mode=FileMode.text, segments=None):
+    """
+    Write src to dst with the placeholder replaced by new_prefix, as update_prefix() would leave
+    a copy of src, and return the sha256 hex digest of dst.  The source is read once, and the
+    digest is computed from the data as it's written rather than by reading dst back.
+    """
+    if on_win and mode == FileMode.text:
+        new_prefix = new_prefix.replace('\\', '/')
+
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        hasher = None
+        if segments is not None and mode == FileMode.binary and not on_win:
+            hasher = _copy_binary_prefix_segments(fsrc, fdst, placeholder, new_prefix, segments)
+            if hasher is None:
+                log.debug("recorded prefix segments don't match %s; rewriting the whole file",
+                          src)
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+        if hasher is None:
+            data = _replace_prefix_data(src, fsrc.read(), new_prefix, placeholder, mode)
+            fdst.write(data)
+            hasher = sha256(data)
+
+    try:
+        copystat(src, dst)
+    except (IOError, OSError) as e:  # pragma: no cover
+        # see gateways.disk.create._do_copy
+        log.debug('%r', e)
+    return hasher.hexdigest()
+
+
+def _replace_prefix_data(path, original_data, new_prefix, placeholder, mode):
+    # Step 1. do all prefix replacement
+    data = replace_prefix(mode, original_data, placeholder, new_prefix)
+
+    # Step 2. if the shebang is too long, shorten it using /usr/bin/env trick
+    if not on_win:
+        data = replace_long_shebang(mode, data)
+
+    # Step 3. if we have a binary file, make sure the byte size is the same before
+    #         and after the update
+    if mode == FileMode.binary and len(data) != len(original_data):
+        raise BinaryPrefixReplacementError(path, placeholder, new_prefix,
+                                           len(original_data), len(data))
+
+    return data
+
+
 def replace_prefix(mode, data, placeholder, new_prefix):
     if mode == FileMode.text:
         data = data.replace(placeholder.encode('utf-8'), new_prefix.encode('utf-8'))
@@ -82,20 +130,120 @@ def binary_replace(data, a, b):
             return data
 
     def replace(match):
-        occurances = match.group().count(a)
-        padding = (len(a) - len(b)) * occurances
-        if padding < 0:
-            raise _PaddingError
-        return match.group().replace(a, b) + b'\0' * padding
+        return _replace_binary_segment(match.group(), a, b)
 
     original_data_len = len(data)
-    pat = re.compile(re.escape(a) + b'([^\0]*?)\0')
+    pat = _binary_segment_pattern(a)
     data = pat.sub(replace, data)
     assert len(data) == original_data_len
 
     return data
 
 
+def _binary_segment_pattern(placeholder):
+    # a segment runs from a placeholder to the end of the null-terminated string containing it
+    return re.compile(re.escape(placeholder) + b'([^\0]*?)\0')
+
+
+def _replace_binary_segment(segment, a, b):
+    occurances = segment.count(a)
+    padding = (len(a) - len(b)) * occurances
+    if padding < 0:
+        raise _PaddingError
+    return segment.replace(a, b) + b'\0' * padding
+
+
+def find_binary_prefix_segments(data, placeholder):
+    """Return the [start, end) byte ranges binary_replace() would rewrite in data."""
+    pat = _binary_segment_pattern(placeholder.encode('utf-8'))
+    return [[match.start(), match.end()] for match in pat.finditer(data)]
+
+
+def record_binary_prefix_segments(extracted_package_dir):
+    """
+    Record, for every binary-mode file with a prefix placeholder in an extracted package, the
+    file size and the byte ranges that prefix replacement will rewrite.  This is done once,
+    at extraction, so that linking doesn't have to search the whole file again.
+    """
+    if on_win:
+        # binary prefix replacement on Windows only applies to pyzzer entry points
+        return
+    paths = {}
+    for path_data in read_paths_json(extracted_package_dir).paths:
+        placeholder = path_data.prefix_placeholder
+        if not placeholder or path_data.file_mode != FileMode.binary:
+            continue
+        path = join(extracted_package_dir, path_data.path)
+        try:
+            with open(path, 'rb') as fh:
+                data = fh.read()
+        except (IOError, OSError) as e:
+            log.debug("%r", e)
+            continue
+        paths[path_data.path] = {
+            'placeholder': placeholder,
+            'size': len(data),
+            'segments': find_binary_prefix_segments(data, placeholder),
+        }
+    if paths:
+        write_as_json_to_file(join(extracted_package_dir, 'info', BINARY_PREFIX_SEGMENTS_FILE),
+                              {'version': 1, 'paths': paths})
+
+
+def read_binary_prefix_segments(extracted_package_dir):
+    """Return the entries written by record_binary_prefix_segments(), by short path."""
+    path = join(extracted_package_dir, 'info', BINARY_PREFIX_SEGMENTS_FILE)
+    try:
+        key = path, os.stat(path).st_mtime
+    except (IOError, OSError):
+        return {}
+    paths = _binary_prefix_segments_cache.get(key)
+    if paths is None:
+        try:
+            with open(path) as fh:
+                data = json.load(fh)
+        except (IOError, OSError, ValueError) as e:
+            log.debug("%r", e)
+            data = {}
+        paths = data.get('paths', {}) if data.get('version') == 1 else {}
+        paths = _binary_prefix_segments_cache.setdefault(key, paths)
+    return paths
+
+
+def _copy_binary_prefix_segments(fsrc, fdst, placeholder, new_prefix, segments,
+                                 bufsize=262144):
+    # Streams fsrc to fdst, rewriting only the recorded segments, and returns a sha256 hasher
+    # over what was written.  Returns None if fsrc doesn't match the recorded segments.
+    if segments.get('placeholder') != placeholder:
+        return None
+    if os.fstat(fsrc.fileno()).st_size != segments['size']:
+        return None
+    a, b = placeholder.encode('utf-8'), new_prefix.encode('utf-8')
+    hasher = sha256()
+
+    def copy_bytes(count):
+        while count > 0:
+            chunk = fsrc.read(min(count, bufsize))
+            if not chunk:
+                break
+            fdst.write(chunk)
+            hasher.update(chunk)
+            count -= len(chunk)
+
+    pos = 0
+    for start, end in segments['segments']:
+        copy_bytes(start - pos)
+        data = fsrc.read(end - start)
+        if not data.startswith(a) or data.find(b'\0') != len(data) - 1:
+            return None
+        data = _replace_binary_segment(data, a, b)
+        fdst.write(data)
+        hasher.update(data)
+        pos = end
+    copy_bytes(segments['size'] - pos)
+    return hasher
+
+
 def has_pyzzer_entry_point(data):
     pos = data.rfind(b'PK\x05\x06')
     return pos >= 0
@@ -9,7 +9,7 @@ import json
 from logging import DEBUG, getLogger
 from mmap import ACCESS_READ, mmap
 from os import makedirs
-from os.path import dirname, join, split as path_split
+from os.path import basename, dirname, isdir, join, split as path_split
 import re
 from textwrap import dedent
 from time import time
@@ -24,6 +24,7 @@ from ..base.constants import CONDA_HOMEPAGE_URL, UNKNOWN_CHANNEL
 from ..base.context import context
 from ..common.compat import (ensure_binary, ensure_text_type, ensure_unicode,
                              text_type, with_metaclass)
+from ..common.profiling import profiler
 from ..common.url import join_url, maybe_unquote
 from ..core.package_cache import PackageCache
 from ..exceptions import CondaDependencyError, CondaHTTPError, CondaIndexError
@@ -37,9 +38,9 @@ from ..models.dist import Dist
 from ..models.index_record import IndexRecord, Priority
 
 try:
-    from cytoolz.itertoolz import concat, take
+    from cytoolz.itertoolz import concat, concatv, take
 except ImportError:  # pragma: no cover
-    from .._vendor.toolz.itertoolz import concat, take  # NOQA
+    from .._vendor.toolz.itertoolz import concat, concatv, take  # NOQA
 
 try:
     import cPickle as pickle
@@ -53,6 +54,7 @@ stderrlog = getLogger('conda.stderrlog')
 
 REPODATA_PICKLE_VERSION = 3
 REPODATA_HEADER_RE = b'"(_etag|_mod|_cache_control)":[ ]?"(.*)"'
+REPODATA_SHARDS_INDEX_FN = 'repodata_shards.json'
 
 
 class RepoDataType(type):
@@ -490,7 +492,7 @@ def process_repodata(repodata, channel_url, schannel, priority):
         if add_pip and info['name'] == 'python' and info['version'].startswith(('2.', '3.')):
             info['depends'].append('pip')
         info.update(meta_in_common)
-        rec = IndexRecord(**info)
+        rec = IndexRecord.from_trusted_objects(info)
         packages[Dist(rec)] = rec
         if rec.features:
             feature_names.update(rec.features)
@@ -562,31 +564,41 @@ def fetch_repodata(url, schannel, priority,
     return repodata
 
 
-def _collect_repodatas_concurrent_as_index(executor, use_cache, tasks):
-    futures = (executor.submit(fetch_repodata, url, schan, pri,
-                               use_cache=use_cache,
-                               session=CondaSession())
+def _fetch_repodata_for_task(url, schannel, priority, use_cache, session, package_names):
+    if package_names is not None and context.use_sharded_repodata and not use_cache:
+        repodata = fetch_repodata_sharded(url, schannel, priority, package_names,
+                                          session=session)
+        if repodata is not None:
+            return repodata
+    return fetch_repodata(url, schannel, priority, use_cache=use_cache, session=session)
+
+
+def _collect_repodatas_concurrent_as_index(executor, use_cache, tasks, package_names=None):
+    fetch_repodata_for_task = profiler.in_current_phase(_fetch_repodata_for_task)
+    futures = (executor.submit(fetch_repodata_for_task, url, schan, pri,
+                               use_cache, CondaSession(), package_names)
                for url, schan, pri in tasks)
     results = (future.result() for future in futures)
     index = dict(concat(iteritems(result.get('packages', {})) for result in results if result))
     return index
 
 
-def _collect_repodatas_serial_as_index(use_cache, tasks):
+def _collect_repodatas_serial_as_index(use_cache, tasks, package_names=None):
     session = CondaSession()
-    results = (fetch_repodata(url, schan, pri, use_cache=use_cache, session=session)
+    results = (_fetch_repodata_for_task(url, schan, pri, use_cache, session, package_names)
                for url, schan, pri in tasks)
     index = dict(concat(iteritems(result.get('packages', {})) for result in results if result))
     return index
 
 
-def collect_all_repodata_as_index(use_cache, tasks):
+def collect_all_repodata_as_index(use_cache, tasks, package_names=None):
     index = executor = None
     if context.concurrent:
         try:
             from concurrent.futures import ThreadPoolExecutor
             executor = ThreadPoolExecutor(10)
-            index = _collect_repodatas_concurrent_as_index(executor, use_cache, tasks)
+            index = _collect_repodatas_concurrent_as_index(executor, use_cache, tasks,
+                                                           package_names)
         except (ImportError, RuntimeError) as e:
             # concurrent.futures is only available in Python >= 3.2 or if futures is installed
             # RuntimeError is thrown if number of threads are limited by OS
@@ -594,10 +606,183 @@ def collect_all_repodata_as_index(use_cache, tasks):
     if executor:
         executor.shutdown(wait=True)
     if index is None:
-        index = _collect_repodatas_serial_as_index(use_cache, tasks)
+        index = _collect_repodatas_serial_as_index(use_cache, tasks, package_names)
     return index
 
 
+# ######################
+# sharded repodata
+# ######################
+#
+# A sharded channel subdir carries, next to the usual repodata.json, a small shard index
+#
+#     <subdir>/repodata_shards.json
+#         {"info": {...}, "shards": {"numpy": "shards/numpy-<sha256[:16]>.json", ...}}
+#
+# and one shard per package name holding only that name's records
+#
+#     <subdir>/shards/numpy-<sha256[:16]>.json
+#         {"packages": {"numpy-1.13.1-py36_0.tar.bz2": {...}, ...}}
+#
+# Shard file names embed a digest of their content, so a shard fetched once never needs
+# revalidating; it is read straight from the local cache until the shard index points
+# somewhere else.
+
+def fetch_repodata_shards_index(session, url):
+    """Fetch the shard index for a channel subdir url.
+
+    Returns None if the subdir does not publish sharded repodata.
+    """
+    if not context.ssl_verify:
+        warnings.simplefilter('ignore', InsecureRequestWarning)
+    session = session or CondaSession()
+    index_url = join_url(url, REPODATA_SHARDS_INDEX_FN)
+    try:
+        timeout = context.remote_connect_timeout_secs, context.remote_read_timeout_secs
+        resp = session.get(index_url, proxies=session.proxies, timeout=timeout)
+        if log.isEnabledFor(DEBUG):
+            log.debug(stringify(resp))
+        resp.raise_for_status()
+        return json.loads(ensure_text_type(resp.content))
+    except (ConnectionError, HTTPError, SSLError) as e:
+        status_code = getattr(e.response, 'status_code', None)
+        if status_code in (403, 404) or url.startswith('file://'):
+            log.debug("No sharded repodata found at %s", index_url)
+            return None
+        raise CondaHTTPError(dals("""
+                             An HTTP error occurred when trying to retrieve this URL.
+                             HTTP errors are often intermittent, and a simple retry will get you
+                             on your way.
+                             %s
+                             """) % maybe_unquote(repr(e)),
+                             index_url,
+                             status_code,
+                             getattr(e.response, 'reason', None),
+                             getattr(e.response, 'elapsed', None),
+                             e.response)
+    except ValueError as e:
+        raise CondaIndexError("Invalid shard index file: {0}: {1}".format(index_url, e))
+
+
+def fetch_repodata_shard(session, url, shard_path, cache_dir=None):
+    """Return the packages dict of a single shard, reading from the local cache if present."""
+    shards_cache_dir = join(cache_dir or create_cache_dir(), 'shards')
+    cache_path = join(shards_cache_dir, basename(shard_path))
+    if isfile(cache_path):
+        try:
+            with open(cache_path) as fh:
+                return json.load(fh).get('packages', {})
+        except ValueError:
+            log.debug("Removing corrupt cached shard %s", cache_path, exc_info=True)
+            rm_rf(cache_path)
+
+    session = session or CondaSession()
+    shard_url = join_url(url, shard_path)
+    timeout = context.remote_connect_timeout_secs, context.remote_read_timeout_secs
+    try:
+        resp = session.get(shard_url, proxies=session.proxies, timeout=timeout)
+        resp.raise_for_status()
+        shard = json.loads(ensure_text_type(resp.content))
+    except (ConnectionError, HTTPError, SSLError) as e:
+        raise CondaHTTPError("Unable to retrieve repodata shard.",
+                             shard_url,
+                             getattr(e.response, 'status_code', None),
+                             getattr(e.response, 'reason', None),
+                             getattr(e.response, 'elapsed', None),
+                             e.response)
+    except ValueError as e:
+        raise CondaIndexError("Invalid repodata shard: {0}: {1}".format(shard_url, e))
+
+    try:
+        if not isdir(shards_cache_dir):
+            makedirs(shards_cache_dir)
+        with open(cache_path, 'w') as fh:
+            json.dump(shard, fh)
+    except (IOError, OSError):
+        log.debug("Failed to cache repodata shard %s", cache_path, exc_info=True)
+    return shard.get('packages', {})
+
+
+def fetch_repodata_sharded(url, schannel, priority, package_names, cache_dir=None,
+                           session=None):
+    """Fetch only the repodata reachable from `package_names` for a sharded channel subdir.
+
+    Starting from `package_names`, the shard for each name is retrieved, and the names of
+    the dependencies of every record in it are followed in turn.  Returns None when the
+    subdir is not sharded, in which case the caller should fall back to `fetch_repodata`.
+
+    Packages reachable only through a `track_features` relationship are not followed.
+    """
+    from ..models.match_spec import MatchSpec
+    if context.offline and not url.startswith('file://'):
+        return None
+    session = session or CondaSession()
+    shards_index = fetch_repodata_shards_index(session, url)
+    if shards_index is None:
+        return None
+    shards = shards_index.get('shards', {})
+    add_pip = context.add_pip_as_python_dependency
+
+    packages = {}
+    seen = set()
+    pending = list(package_names)
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        shard_path = shards.get(name)
+        if not shard_path:
+            continue
+        for fn, info in iteritems(fetch_repodata_shard(session, url, shard_path, cache_dir)):
+            packages[fn] = info
+            pending.extend(MatchSpec(dep).name
+                           for dep in concatv(info.get('depends', ()),
+                                              info.get('constrains', ())))
+        if add_pip and name == 'python':
+            pending.append('pip')
+    log.debug("Loaded %d records in %d shards for %s", len(packages), len(seen), url)
+
+    repodata = {
+        'info': shards_index.get('info', {}),
+        'packages': packages,
+        '_url': url,
+    }
+    process_repodata(repodata, url, schannel, priority)
+    return repodata
+
+
+def write_repodata_shards(repodata, subdir_path):
+    """Write the shard index and one shard per package name for an existing repodata dict.
+
+    The `packages` of `repodata` must be the raw json content of a repodata.json file.
+    Returns the shard index that was written to `subdir_path`.
+    """
+    by_name = {}
+    for fn, info in iteritems(repodata.get('packages', {})):
+        by_name.setdefault(info['name'], {})[fn] = info
+
+    shards_dir = join(subdir_path, 'shards')
+    if not isdir(shards_dir):
+        makedirs(shards_dir)
+    shards = {}
+    for name, packages in iteritems(by_name):
+        content = ensure_binary(json.dumps({'packages': packages}, indent=None,
+                                           sort_keys=True, separators=(',', ':')))
+        shard_fn = '%s-%s.json' % (name, hashlib.sha256(content).hexdigest()[:16])
+        with open(join(shards_dir, shard_fn), 'wb') as fh:
+            fh.write(content)
+        shards[name] = 'shards/' + shard_fn
+
+    shards_index = {
+        'info': repodata.get('info', {}),
+        'shards': shards,
+    }
+    with open(join(subdir_path, REPODATA_SHARDS_INDEX_FN), 'w') as fh:
+        json.dump(shards_index, fh, indent=2, sort_keys=True)
+    return shards_index
+
+
 def cache_fn_url(url):
     # url must be right-padded with '/' to not invalidate any existing caches
     if not url.endswith('/'):
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from functools import partial
 from genericpath import exists
+from itertools import count
 from logging import getLogger
 from os.path import join
+from threading import Lock
 
 from enum import Enum
 
@@ -13,10 +16,11 @@ from .link import PrefixSetup, UnlinkLinkTransaction
 from .linked_data import PrefixData, linked_data
 from .._vendor.boltons.setutils import IndexedSet
 from ..base.context import context
-from ..common.compat import iteritems, itervalues, odict, string_types, text_type
+from ..common.compat import iteritems, itervalues, odict, on_win, string_types, text_type
 from ..common.constants import NULL
 from ..common.io import spinner
 from ..common.path import paths_equal
+from ..common.profiling import profiler
 from ..exceptions import PackagesNotFoundError
 from ..history import History
 from ..models.channel import Channel
@@ -429,22 +433,49 @@ class Solver(object):
                          for subdir_url in c.urls(True, self.subdirs))
 
         with spinner("Loading channels", not context.verbosity and not context.quiet,
-                     context.json):
+                     context.json), profiler.phase('solver.prepare'):
             channel_priority_map = build_channel_priority_map()
             if self._index is None:
-                self._index = fetch_index(channel_priority_map, context.use_index_cache)
+                with profiler.phase('fetch_index'):
+                    package_names = (self._get_root_package_names()
+                                     if context.use_sharded_repodata else None)
+                    self._index = fetch_index(channel_priority_map, context.use_index_cache,
+                                              package_names=package_names)
+                    profiler.count('records', len(self._index))
 
             known_channels = tuple(c.canonical_name for c in self.channels)
 
-            _supplement_index_with_prefix(self._index, self.prefix, known_channels)
-            _supplement_index_with_cache(self._index, known_channels)
-            _supplement_index_with_features(self._index)
+            with profiler.phase('supplement_index'):
+                nrecords = len(self._index)
+                _supplement_index_with_prefix(self._index, self.prefix, known_channels)
+                _supplement_index_with_cache(self._index, known_channels)
+                _supplement_index_with_features(self._index)
+                profiler.count('records', len(self._index) - nrecords)
 
             self._r = Resolve(self._index)
 
         self._prepared = True
         return self._index, self._r
 
+    def _get_root_package_names(self):
+        # The names every solve for this prefix may touch. With sharded repodata, only records
+        # reachable from these names are fetched. Returns None if a spec can't be narrowed to
+        # a single package name, in which case complete repodata is needed.
+        specs = tuple(concatv(
+            self.specs_to_add,
+            self.specs_to_remove,
+            itervalues(History(self.prefix).get_requested_specs_map()),
+            get_pinned_specs(self.prefix),
+            context.aggressive_update_packages,
+        ))
+        if not all(spec.get_exact_value('name') for spec in specs):
+            return None
+        package_names = set(spec.name for spec in specs)
+        package_names.update(rec.name for rec in PrefixData(self.prefix).iter_records())
+        if context.auto_update_conda and paths_equal(self.prefix, context.root_prefix):
+            package_names.add('conda')
+        return package_names
+
     def _check_solution(self, solution, pinned_specs):
         # Ensure that solution is consistent with pinned specs.
         for spec in pinned_specs:
@@ -480,6 +511,100 @@ def get_pinned_specs(prefix):
                  concatv(context.pinned_packages, from_file))
 
 
+def solve_final_states(prefix, channels, subdirs=(), spec_sets=(), processes=None,
+                       **kwargs):
+    """Solve many related sets of specs to add to one prefix, e.g. a build variant matrix.
+
+    The index is loaded once, for all spec sets together, and one :class:`Resolve` instance
+    is shared by every solve, so reduced indexes and clauses are reused wherever the spec
+    sets lead to the same subproblem.
+
+    Args:
+        prefix (str):
+            See :class:`Solver`.
+        channels (Sequence[:class:`Channel`]):
+            See :class:`Solver`.
+        subdirs (Sequence[str]):
+            See :class:`Solver`.
+        spec_sets (Iterable[Iterable[:class:`MatchSpec`]]):
+            The sets of package specs to add to the prefix, each solved separately.
+        processes (int):
+            If greater than one, solve in that many forked worker processes, which inherit
+            the loaded index.  Ignored where the 'fork' start method isn't available.
+        **kwargs:
+            Passed to :meth:`Solver.solve_final_state`.
+
+    Returns:
+        List[Tuple[PackageRef]]:
+            The final state for each spec set, in order.
+
+    """
+    spec_sets = tuple(tuple(MatchSpec(s) for s in specs) for specs in spec_sets)
+    # prepared for the union of all spec sets, so that sharded repodata covers every solve
+    batch_solver = Solver(prefix, channels, subdirs, specs_to_add=concat(spec_sets))
+    index, r = batch_solver._prepare()
+    channels, subdirs = batch_solver.channels, batch_solver.subdirs
+    solvers = []
+    for specs in spec_sets:
+        solver = Solver(prefix, channels, subdirs, specs_to_add=specs)
+        solver._index, solver._r, solver._prepared = index, r, True
+        solvers.append(solver)
+
+    if processes and processes > 1 and len(solvers) > 1:
+        # Workers are forked after the solvers are in place, so they needn't be pickled.  Each
+        # call registers its solvers under its own key, so concurrent calls don't collide.
+        # Only positions in the index are sent back, so that the same record objects are
+        # returned as when solving serially.
+        key = next(_batch_keys)
+        dists = tuple(index)
+        positions = dict((dist, k) for k, dist in enumerate(dists))
+        with _batch_solvers_lock:
+            _batch_solvers[key] = solvers, positions
+        try:
+            pool = _fork_pool(processes)
+            if pool is not None:
+                try:
+                    results = pool.map(partial(_solve_batch_item, key, kwargs=kwargs),
+                                       range(len(solvers)))
+                finally:
+                    pool.terminate()
+                    pool.join()
+                return [IndexedSet(index[dists[k]] for k in ks) for ks in results]
+        finally:
+            with _batch_solvers_lock:
+                del _batch_solvers[key]
+    return [solver.solve_final_state(**kwargs) for solver in solvers]
+
+
+_batch_solvers = {}  # Dict[int, Tuple[List[Solver], Dict[Dist, int]]]; read by forked workers
+_batch_solvers_lock = Lock()
+_batch_keys = count()
+
+
+def _fork_pool(processes):
+    # Returns a pool of forked worker processes, or None where processes can't be forked.
+    # The start method can't be left to the platform default: macOS spawns by default since
+    # Python 3.8, and Linux uses forkserver from Python 3.14.
+    import multiprocessing
+    try:
+        get_context = multiprocessing.get_context
+    except AttributeError:  # pragma: py3 no cover
+        # Python 2 always forks, except on Windows
+        return None if on_win else multiprocessing.Pool(processes)
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    try:
+        return get_context('fork').Pool(processes)
+    except (OSError, ValueError) as e:
+        log.debug(repr(e))
+        return None
+
+
+def _solve_batch_item(key, k, kwargs):
+    solvers, positions = _batch_solvers[key]
+    return tuple(positions[Dist(rec)] for rec in solvers[k].solve_final_state(**kwargs))
+
+
 # NOTE: The remaining code in this module is being left for development reference until
 #  the context.enable_private_envs portion is implemented in :meth:`solve_for_transaction`.
 
@@ -15,6 +15,7 @@ from ..._vendor.auxlib.ish import dals
 from ..._vendor.auxlib.logz import stringify
 from ...base.context import context
 from ...common.compat import text_type
+from ...common.profiling import profiler
 from ...exceptions import (BasicClobberError, CondaDependencyError, CondaHTTPError,
                            MD5MismatchError, maybe_raise)
 
@@ -66,6 +67,8 @@ def download(url, target_full_path, md5sum, progress_update_callback=None):
                         if progress_update_callback:
                             progress_update_callback(streamed_bytes / content_length)
 
+            profiler.count('bytes_downloaded', streamed_bytes)
+
             if content_length and streamed_bytes != content_length:
                 # TODO: needs to be a more-specific error type
                 message = dals("""
@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import errno
 from errno import EACCES, EPERM
 from io import open
 from logging import getLogger
 import os
 from os import X_OK, access
 from os.path import basename, dirname, isdir, isfile, join, splitext
-from shutil import copy as shutil_copy, copystat
+from shutil import copy as shutil_copy, copymode as shutil_copymode, copystat
+from stat import S_ISREG
 import sys
 import tarfile
 
@@ -236,9 +238,110 @@ def copy(src, dst):
     _do_copy(src, dst)
 
 
+# Copy-on-write and in-kernel copies.  Whether each method works depends on the pair of
+# filesystems, so the methods known to work are cached by (source st_dev, destination st_dev).
+# The first copy between two filesystems tries each method in turn; unsupported ones are
+# dropped, and a plain copy is the fallback.
+_FICLONE = 0x40049409  # from linux/fs.h
+_COPY_UNSUPPORTED_ERRNOS = frozenset(getattr(errno, name) for name in (
+    'EBADF', 'EINVAL', 'ENOSYS', 'ENOTSUP', 'ENOTTY', 'EOPNOTSUPP', 'EPERM', 'EXDEV',
+) if hasattr(errno, name))
+_copy_methods = {}  # Dict[Tuple[int, int], Tuple[str, ...]]
+
+
+def _reflink(fsrc, fdst):
+    import fcntl
+    fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+
+
+def _copy_file_range(fsrc, fdst):
+    # os.copy_file_range is new in Python 3.8
+    copy_file_range = os.copy_file_range
+    src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+    size = os.fstat(src_fd).st_size
+    while size > 0:
+        copied = copy_file_range(src_fd, dst_fd, size)
+        if not copied:
+            # Some kernels (5.3 to 5.18 across filesystems) and FUSE, NFS and overlay mounts
+            # return 0 instead of failing.  Treat the method as unsupported rather than leave
+            # a truncated copy.
+            raise OSError(errno.EOPNOTSUPP, "copy_file_range stopped with %d bytes left"
+                          % size)
+        size -= copied
+
+
+if sys.platform.startswith('linux'):
+    _FAST_COPY_METHODS = ('reflink', 'copy_file_range') if hasattr(os, 'copy_file_range') else (
+        'reflink',)
+else:
+    _FAST_COPY_METHODS = ()
+
+
+def _copy_methods_key(src, dst):
+    return os.stat(src).st_dev, os.stat(dirname(dst) or '.').st_dev
+
+
+def _disable_copy_method(key, method):
+    _copy_methods[key] = tuple(m for m in _copy_methods.get(key, _FAST_COPY_METHODS)
+                               if m != method)
+
+
+def reflink_file(src, dst):
+    """
+    Copy src to dst as a copy-on-write clone, and return True if that worked.  If the
+    filesystems of src and dst don't support clones, copies between them stop trying them.
+    Other errors are raised.
+    """
+    if 'reflink' not in _FAST_COPY_METHODS:
+        return False
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            _reflink(fsrc, fdst)
+        except (IOError, OSError) as e:
+            if e.errno not in _COPY_UNSUPPORTED_ERRNOS:
+                raise
+            _disable_copy_method(_copy_methods_key(src, dst), 'reflink')
+            return False
+    return True
+
+
+def _fast_copy(src, dst):
+    # Returns True if src was copied to dst by one of the fast methods.
+    if not _FAST_COPY_METHODS:
+        return False
+    try:
+        key = _copy_methods_key(src, dst)
+    except (IOError, OSError):
+        return False
+    methods = _copy_methods.get(key)
+    if methods is None:
+        methods = _copy_methods[key] = _FAST_COPY_METHODS
+    for method in methods:
+        copy_fn = _reflink if method == 'reflink' else _copy_file_range
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                try:
+                    copy_fn(fsrc, fdst)
+                except (IOError, OSError) as e:
+                    if e.errno not in _COPY_UNSUPPORTED_ERRNOS:
+                        raise
+                    log.debug("%s not supported for %s => %s", method, src, dst)
+                    _disable_copy_method(key, method)
+                    continue
+        except (IOError, OSError) as e:
+            log.debug("%s failed for %s => %s\n  error: %r", method, src, dst, e)
+            return False
+        log.trace("copied %s => %s using %s", src, dst, method)
+        return True
+    return False
+
+
 def _do_copy(src, dst):
     log.trace("copying %s => %s", src, dst)
-    shutil_copy(src, dst)
+    if _fast_copy(src, dst):
+        shutil_copymode(src, dst)
+    else:
+        shutil_copy(src, dst)
     try:
         copystat(src, dst)
     except (IOError, OSError) as e:  # pragma: no cover
@@ -289,6 +392,51 @@ def create_link(src, dst, link_type=LinkType.hardlink, force=False):
         raise CondaError("Did not expect linktype=%r" % link_type)
 
 
+def hardlink_tree(src, dst, copy_directories=()):
+    """
+    Recreate the directory tree at src as dst, hardlinking files and recreating symlinks.
+    Files under copy_directories, given relative to src, are copied instead, for files that
+    will be modified in place.
+    """
+    copy_directories = tuple(join(src, d) for d in copy_directories)
+    for root, dirs, files in os.walk(src):
+        target_root = join(dst, os.path.relpath(root, src)) if root != src else dst
+        os.mkdir(target_root)
+        shutil_copymode(root, target_root)
+        copy_files = any(root == d or root.startswith(d + os.sep) for d in copy_directories)
+        for name in dirs:
+            # os.walk doesn't follow symlinks to directories, but lists them in dirs
+            if islink(join(root, name)):
+                symlink(readlink(join(root, name)), join(target_root, name))
+        for name in files:
+            path, target = join(root, name), join(target_root, name)
+            if islink(path):
+                symlink(readlink(path), target)
+            elif copy_files:
+                _do_copy(path, target)
+            else:
+                create_hard_link_or_copy(path, target)
+
+
+def unshare_hardlink(path):
+    """
+    If path is a regular file with other hard links, e.g. in a tree made by hardlink_tree(),
+    replace it with a copy of itself, so that changing it leaves the other links alone.
+    Returns True if the file was copied.
+    """
+    try:
+        st = os.lstat(path)
+    except (IOError, OSError):
+        return False
+    if not S_ISREG(st.st_mode) or st.st_nlink < 2:
+        return False
+    log.trace("copying hardlinked %s before it's changed", path)
+    temp_path = path + '.c~unshare'
+    _do_copy(path, temp_path)
+    os.rename(temp_path, path)
+    return True
+
+
 def compile_pyc(python_exe_full_path, py_full_path, pyc_full_path):
     if lexists(pyc_full_path):
         maybe_raise(BasicClobberError(None, pyc_full_path, context), context)
@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-from errno import ENOENT
+from errno import EEXIST, ENOENT, ENOTEMPTY
 from logging import getLogger
-from os import listdir, removedirs, rename, unlink, walk
+from os import listdir, removedirs, rename, rmdir, unlink, walk
 from os.path import abspath, dirname, isdir, join
 from shutil import rmtree as shutil_rmtree
 from uuid import uuid4
@@ -13,6 +13,7 @@ from .link import islink, lexists
 from .permissions import make_writable, recursive_make_writable
 from ...base.context import context
 from ...common.compat import PY2, on_win, text_type, ensure_binary
+from ...common.profiling import profiler
 
 log = getLogger(__name__)
 
@@ -160,6 +161,93 @@ def try_rmdir_all_empty(dirpath, max_tries=MAX_TRIES):
         log.trace('%r', e)
 
 
+def rm_paths(paths, directories=()):
+    """
+    Remove many files, then each of directories that is left empty.
+
+    Files are grouped by parent directory and each group is removed in a single task, with the
+    groups spread across a thread pool when context.concurrent allows.  Files that can't be
+    unlinked directly are handed to rm_rf().  Directories are tried bottom-up, and each is
+    removed along with any empty directories left inside it, such as untracked __pycache__
+    directories.  Unlike try_rmdir_all_empty(), parents not in directories are left alone.
+    """
+    def _unlink_all(group):
+        for path in group:
+            try:
+                unlink(path)
+            except (IOError, OSError) as e:
+                if e.errno != ENOENT:
+                    rm_rf(path)
+
+    map_by_directory(_unlink_all, paths)
+
+    # children sort after their parents
+    for path in sorted(set(directories), reverse=True):
+        # like try_rmdir_all_empty(), this only guarantees trying
+        _rmdir_empty_tree(path)
+
+
+def _rmdir_empty_tree(path):
+    # Removes path if it holds nothing but directories, however deeply nested, and returns
+    # True if it did.  The first file or symlink found ends the search.
+    try:
+        exp_backoff_fn(rmdir, path)
+        return True
+    except (IOError, OSError) as e:
+        if e.errno not in (ENOTEMPTY, EEXIST):
+            log.trace('%r', e)
+            return False
+    try:
+        names = listdir(path)
+    except (IOError, OSError) as e:
+        log.trace('%r', e)
+        return False
+    for name in names:
+        child = join(path, name)
+        if islink(child) or not isdir(child) or not _rmdir_empty_tree(child):
+            return False
+    try:
+        exp_backoff_fn(rmdir, path)
+        return True
+    except (IOError, OSError) as e:
+        log.trace('%r', e)
+        return False
+
+
+def map_by_directory(fn, items, key=dirname):
+    """
+    Call fn once for each group of items sharing key(item), by default the parent directory
+    of each path, and return when all calls are done.  Groups run concurrently when
+    context.concurrent allows; the first error raised by fn is re-raised.
+    """
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+
+    executor = None
+    if context.concurrent and len(groups) > 1:
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(10)
+        except (ImportError, RuntimeError) as e:
+            # concurrent.futures is only available in Python >= 3.2 or if futures is installed
+            # RuntimeError is thrown if number of threads are limited by OS
+            log.debug(repr(e))
+    if executor is None:
+        for group in groups.values():
+            fn(group)
+        return
+
+    try:
+        fn = profiler.in_current_phase(fn)
+        futures = [executor.submit(fn, group) for group in groups.values()]
+        for future in futures:
+            future.result()
+    finally:
+        # callers may need to roll back, so let every group finish first
+        executor.shutdown(wait=True)
+
+
 if not (on_win and PY2):
     rmtree = shutil_rmtree
 else:  # pragma: no cover
@@ -172,7 +260,6 @@ else:  # pragma: no cover
     from ctypes import (Structure, byref, WinDLL, c_int, c_ubyte, c_ssize_t, _SimpleCData,
                         cast, sizeof, WinError, POINTER as _POINTER)
     from ctypes.wintypes import DWORD, INT, LPWSTR, LONG, WORD, BYTE
-    from os import rmdir
     import sys
 
     if PY2:
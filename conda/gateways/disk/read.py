@@ -10,24 +10,37 @@ import hashlib
 from itertools import chain
 import json
 from logging import getLogger
+import os
 from os import listdir
 from os.path import isdir, isfile, join
 import shlex
 import tarfile
+from threading import current_thread
 
 from .link import islink, lexists
+from ... import __version__ as CONDA_VERSION
 from ..._vendor.auxlib.collection import first
 from ..._vendor.auxlib.ish import dals
 from ...base.constants import PREFIX_PLACEHOLDER
-from ...common.compat import ensure_text_type
+from ...common.compat import ensure_text_type, on_win
 from ...exceptions import CondaUpgradeError, CondaVerificationError, PathNotFoundError
 from ...models.channel import Channel
 from ...models.enums import FileMode, PathType
 from ...models.index_record import IndexJsonRecord, IndexRecord, PathData, PathDataV1, PathsData
 from ...models.package_info import PackageInfo, PackageMetadata
 
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle  # NOQA
+
 log = getLogger(__name__)
 
+# The parsed paths data for an extracted package is cached next to its paths.json; see
+# read_paths_json().
+PATHS_DATA_PICKLE_FILE = 'paths_data.pickle'
+PATHS_DATA_PICKLE_VERSION = 1
+
 listdir = listdir
 lexists, isdir, isfile = lexists, isdir, isfile
 
@@ -155,6 +168,67 @@ def read_package_metadata(extracted_package_directory):
 
 
 def read_paths_json(extracted_package_directory):
+    """
+    Return the PathsData for an extracted package, from info/paths.json or, for older packages,
+    the info/files, info/has_prefix, and info/no_link files.  The parsed result is pickled into
+    the info directory, and reused for as long as the files it was read from are unchanged.
+    """
+    info_dir = join(extracted_package_directory, 'info')
+    source_stamp = _paths_data_source_stamp(info_dir)
+    paths_data = read_pickled_paths_data(info_dir, source_stamp)
+    if paths_data is None:
+        paths_data = _read_paths_json(extracted_package_directory)
+        write_pickled_paths_data(info_dir, source_stamp, paths_data)
+    return paths_data
+
+
+def _paths_data_source_stamp(info_dir):
+    stamp = [PATHS_DATA_PICKLE_VERSION, CONDA_VERSION]
+    for fn in ('paths.json', 'files', 'has_prefix', 'no_link', 'no_softlink'):
+        try:
+            st = os.stat(join(info_dir, fn))
+        except (IOError, OSError):
+            continue
+        stamp.append((fn, st.st_size, st.st_mtime))
+    return tuple(stamp)
+
+
+def read_pickled_paths_data(info_dir, source_stamp):
+    pickle_path = join(info_dir, PATHS_DATA_PICKLE_FILE)
+    if not isfile(pickle_path):
+        return None
+    try:
+        with open(pickle_path, 'rb') as f:
+            stamp, paths_data = pickle.load(f)
+    except Exception:
+        log.debug("Failed to load pickled paths data.", exc_info=True)
+        return None
+    if stamp != source_stamp or not isinstance(paths_data, PathsData):
+        return None
+    return paths_data
+
+
+def write_pickled_paths_data(info_dir, source_stamp, paths_data):
+    # The package cache may be read-only or shared, so failures are only logged.  The pickle
+    # is moved into place so that other processes and threads never read a partial file.  The
+    # temp file isn't made by mkstemp(), which would leave the pickle readable only by its owner.
+    pickle_path = join(info_dir, PATHS_DATA_PICKLE_FILE)
+    temp_path = '%s.%d.%d.tmp' % (pickle_path, os.getpid(), current_thread().ident)
+    try:
+        with open(temp_path, 'wb') as f:
+            pickle.dump((source_stamp, paths_data), f, 2)
+        if on_win and lexists(pickle_path):
+            os.unlink(pickle_path)
+        os.rename(temp_path, pickle_path)
+    except Exception:
+        log.debug("Failed to dump pickled paths data.", exc_info=True)
+        try:
+            os.unlink(temp_path)
+        except (IOError, OSError):
+            pass
+
+
+def _read_paths_json(extracted_package_directory):
     info_dir = join(extracted_package_directory, 'info')
     paths_json_path = join(info_dir, 'paths.json')
     if isfile(paths_json_path):
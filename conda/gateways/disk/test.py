@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from collections import namedtuple
 from logging import getLogger
+import os
 from os import W_OK, access
 from os.path import basename, dirname, isdir, isfile, join
 
-from .create import create_link
+from .create import create_link, reflink_file
 from .delete import rm_rf, try_rmdir_all_empty
 from .link import islink, lexists
 from .read import find_first_existing
@@ -17,6 +19,8 @@ from ...models.enums import LinkType
 
 log = getLogger(__name__)
 
+LinkCapabilities = namedtuple('LinkCapabilities', ('hardlink', 'softlink', 'reflink'))
+
 
 def file_path_is_writable(path):
     path = expand(path)
@@ -128,3 +132,41 @@ def softlink_supported(source_file, dest_dir):
         return False
     finally:
         rm_rf(test_path)
+
+
+def reflink_supported(source_file, dest_dir):
+    # Copy-on-write clones only work within some filesystems (e.g. btrfs, xfs).  When they
+    # don't, copies between the two filesystems stop trying them.
+    log.trace("checking reflink capability for %s => %s", source_file, dest_dir)
+    test_path = join(dest_dir, '.tmp.' + basename(source_file))
+    assert isfile(source_file), source_file
+    assert isdir(dest_dir), dest_dir
+    if lexists(test_path):
+        rm_rf(test_path)
+    try:
+        return reflink_file(source_file, test_path)
+    except (IOError, OSError):
+        return False
+    finally:
+        rm_rf(test_path)
+
+
+def link_capabilities(source_file, dest_dir, cache):
+    """
+    Return the LinkCapabilities between the filesystems holding source_file and dest_dir.
+
+    Each capability is probed by creating and removing a link in dest_dir, so the result is
+    stored in cache, keyed by the st_dev of both, and reused for every other source file and
+    destination on the same pair of filesystems.
+    """
+    key = os.stat(source_file).st_dev, os.stat(dest_dir).st_dev
+    capabilities = cache.get(key)
+    if capabilities is None:
+        capabilities = cache[key] = LinkCapabilities(
+            hardlink=hardlink_supported(source_file, dest_dir),
+            softlink=softlink_supported(source_file, dest_dir),
+            reflink=reflink_supported(source_file, dest_dir),
+        )
+        log.debug("link capabilities for %s => %s: %s", dirname(source_file), dest_dir,
+                  capabilities)
+    return capabilities
@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from errno import EINVAL, ENOSYS
 from logging import getLogger
-from os import rename as os_rename, utime
+from os import rename as os_rename, strerror, utime
 from os.path import dirname, isdir
 import re
+import sys
 
 from . import exp_backoff_fn, mkdir_p
-from .delete import rm_rf
+from .delete import map_by_directory, rm_rf
 from .link import lexists
+from ...common.compat import ensure_binary
 from ...common.path import expand
 
 log = getLogger(__name__)
@@ -54,6 +57,60 @@ def backoff_rename(source_path, destination_path, force=False):
     exp_backoff_fn(rename, source_path, destination_path, force)
 
 
+def backoff_rename_all(path_pairs, force=False):
+    """
+    Rename each (source_path, destination_path) pair as backoff_rename() would, running the
+    renames for different source directories concurrently.
+    """
+    def _rename_all(group):
+        for source_path, destination_path in group:
+            try:
+                os_rename(source_path, destination_path)
+            except (IOError, OSError):
+                # the destination is in the way, the source is missing, or the rename needs
+                # retrying on Windows
+                backoff_rename(source_path, destination_path, force)
+
+    map_by_directory(_rename_all, path_pairs, key=lambda pair: dirname(pair[0]))
+
+
+def exchange_paths(path1, path2):
+    """
+    Swap what's at path1 and path2, which must be on the same filesystem.  Where the kernel
+    supports renameat2(RENAME_EXCHANGE), the swap is atomic; elsewhere, it's three renames and
+    path1 is briefly missing.
+    """
+    if _renameat2_exchange(path1, path2):
+        return
+    hold_path = path1 + '.c~'
+    os_rename(path1, hold_path)
+    try:
+        os_rename(path2, path1)
+    except (IOError, OSError):
+        os_rename(hold_path, path1)
+        raise
+    os_rename(hold_path, path2)
+
+
+def _renameat2_exchange(path1, path2):
+    # Returns False if renameat2(RENAME_EXCHANGE) isn't available for these paths.
+    if not sys.platform.startswith('linux'):
+        return False
+    import ctypes
+    renameat2 = getattr(ctypes.CDLL(None, use_errno=True), 'renameat2', None)
+    if renameat2 is None:
+        return False
+    at_fdcwd, rename_exchange = -100, 2  # from linux/fcntl.h and linux/fs.h
+    if renameat2(at_fdcwd, ensure_binary(path1), at_fdcwd,
+                 ensure_binary(path2), rename_exchange) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (EINVAL, ENOSYS):
+        # not supported by the kernel or the filesystem
+        return False
+    raise OSError(err, strerror(err), path1)
+
+
 def touch(path, mkdir=False):
     # returns
     #   True if the file did not exist but was created
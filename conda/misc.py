@@ -11,7 +11,7 @@ import shutil
 import sys
 
 from .base.context import context
-from .common.compat import iteritems, itervalues, on_win, open
+from .common.compat import iteritems, itervalues, odict, on_win, open
 from .common.path import expand
 from .common.url import is_url, join_url, path_to_url, unquote
 from .core.index import get_index
@@ -22,7 +22,7 @@ from .exceptions import PackagesNotFoundError, ParseError
 from .gateways.disk.delete import rm_rf
 from .gateways.disk.link import islink
 from .models.dist import Dist
-from .models.index_record import IndexRecord
+from .models.index_record import IndexRecord, PackageRecord
 from .models.match_spec import MatchSpec
 from .resolve import Resolve
 
@@ -165,6 +165,59 @@ def append_env(prefix):
         pass
 
 
+def _uncloneable_packages(drecs):
+    # Dict[package_name, Dist] of conda, conda-env, and every package depending on them
+    dists = {info['name']: dist for dist, info in iteritems(drecs)}
+    dependents = defaultdict(set)  # Dict[package_name, Set[package_name]]
+    for dist, info in iteritems(drecs):
+        for dep in info.combined_depends:
+            dependents[MatchSpec(dep).name].add(info['name'])
+
+    filter = odict()
+    names = [name for name in ('conda', 'conda-env') if name in dists]
+    while names:
+        name = names.pop()
+        if name not in filter:
+            filter[name] = dists[name]
+            names.extend(dependents[name])
+    return filter
+
+
+def _file_contains(path, data, bufsize=262144):
+    # Searches the file in chunks, overlapping by len(data) - 1 so that matches spanning two
+    # chunks are found.
+    tail = b''
+    with open(path, 'rb') as fi:
+        while True:
+            chunk = fi.read(bufsize)
+            if not chunk:
+                return False
+            chunk = tail + chunk
+            if data in chunk:
+                return True
+            tail = chunk[1 - len(data):] if len(data) > 1 else b''
+
+
+def _clone_untracked_file(src, dst, prefix1, prefix2):
+    if not _file_contains(src, prefix1.encode('utf-8')):
+        shutil.copy2(src, dst)
+        return
+
+    with open(src, 'rb') as fi:
+        data = fi.read()
+
+    try:
+        s = data.decode('utf-8')
+        s = s.replace(prefix1, prefix2)
+        data = s.encode('utf-8')
+    except UnicodeDecodeError:  # data is binary
+        pass
+
+    with open(dst, 'wb') as fo:
+        fo.write(data)
+    shutil.copystat(src, dst)
+
+
 def clone_env(prefix1, prefix2, verbose=True, quiet=False, index_args=None):
     """
     clone existing prefix1 into new prefix2
@@ -173,26 +226,7 @@ def clone_env(prefix1, prefix2, verbose=True, quiet=False, index_args=None):
 
     # Discard conda, conda-env and any package that depends on them
     drecs = linked_data(prefix1)
-    filter = {}
-    found = True
-    while found:
-        found = False
-        for dist, info in iteritems(drecs):
-            name = info['name']
-            if name in filter:
-                continue
-            if name == 'conda':
-                filter['conda'] = dist
-                found = True
-                break
-            if name == "conda-env":
-                filter["conda-env"] = dist
-                found = True
-                break
-            for dep in info.combined_depends:
-                if MatchSpec(dep).name in filter:
-                    filter[name] = dist
-                    found = True
+    filter = _uncloneable_packages(drecs)
 
     if filter:
         if not quiet:
@@ -200,7 +234,7 @@ def clone_env(prefix1, prefix2, verbose=True, quiet=False, index_args=None):
             print('The following packages cannot be cloned out of the root environment:', file=fh)
             for pkg in itervalues(filter):
                 print(' - ' + pkg.dist_name, file=fh)
-            drecs = {dist: info for dist, info in iteritems(drecs) if info['name'] not in filter}
+        drecs = {dist: info for dist, info in iteritems(drecs) if info['name'] not in filter}
 
     # Resolve URLs for packages that do not have URLs
     r = None
@@ -211,10 +245,12 @@ def clone_env(prefix1, prefix2, verbose=True, quiet=False, index_args=None):
         index_args = index_args or {}
         index = get_index(**index_args)
         r = Resolve(index, sort=True)
+        fn_index = defaultdict(list)  # Dict[fn, List[Dist]]
+        for dist, info in iteritems(index):
+            fn_index[info['fn']].append(dist)
         for dist in unknowns:
-            name = dist.dist_name
             fn = dist.to_filename()
-            fkeys = [d for d in r.index.keys() if r.index[d]['fn'] == fn]
+            fkeys = fn_index.get(fn)
             if fkeys:
                 del drecs[dist]
                 dist_str = sorted(fkeys, key=r.version_key, reverse=True)[0]
@@ -225,18 +261,14 @@ def clone_env(prefix1, prefix2, verbose=True, quiet=False, index_args=None):
         raise PackagesNotFoundError(notfound)
 
     # Assemble the URL and channel list
-    urls = {}
     for dist, info in iteritems(drecs):
-        fkey = dist
-        if fkey not in index:
-            index[fkey] = IndexRecord.from_objects(info, not_fetched=True)
+        if dist not in index:
+            index[dist] = IndexRecord.from_objects(info, not_fetched=True)
             r = None
-        urls[dist] = info['url']
 
     if r is None:
         r = Resolve(index)
-    dists = r.dependency_sort({d.quad[0]: d for d in urls.keys()})
-    urls = [urls[d] for d in dists]
+    dists = r.dependency_sort({d.quad[0]: d for d in drecs})
 
     if verbose:
         print('Packages: %d' % len(dists))
@@ -255,22 +287,23 @@ def clone_env(prefix1, prefix2, verbose=True, quiet=False, index_args=None):
             continue
 
         try:
-            with open(src, 'rb') as fi:
-                data = fi.read()
+            _clone_untracked_file(src, dst, prefix1, prefix2)
         except IOError:
             continue
 
-        try:
-            s = data.decode('utf-8')
-            s = s.replace(prefix1, prefix2)
-            data = s.encode('utf-8')
-        except UnicodeDecodeError:  # data is binary
-            pass
-
-        with open(dst, 'wb') as fo:
-            fo.write(data)
-        shutil.copystat(src, dst)
-
-    actions = explicit(urls, prefix2, verbose=not quiet, index=index,
-                       force_extract=False, index_args=index_args)
+    # Link the packages straight from the records, rather than going through explicit(),
+    # which parses URLs and queries the package caches once per spec.  Packages already
+    # extracted in a package cache are hard linked, and only files with a prefix placeholder
+    # are rewritten.
+    link_precs = tuple(PackageRecord.from_objects(drecs[dist]) for dist in dists)
+    specs = tuple(MatchSpec(prec.url, name=prec.name) for prec in link_precs)
+    prefix_data = PrefixData(prefix2)
+    unlink_precs = tuple(prefix_data.get(prec.name) for prec in link_precs
+                         if prefix_data.get(prec.name, None))
+    txn = UnlinkLinkTransaction(PrefixSetup(prefix2, unlink_precs, link_precs, (), specs))
+    pfe = txn.get_pfe()
+    actions = txn.make_legacy_action_groups(pfe)[0]
+    # packages no longer extracted in a package cache are downloaded and extracted again
+    pfe.execute()
+    txn.execute()
     return actions, untracked_files
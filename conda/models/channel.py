@@ -8,6 +8,7 @@ from logging import getLogger
 from ..base.constants import (DEFAULTS_CHANNEL_NAME, DEFAULT_CHANNELS_UNIX, DEFAULT_CHANNELS_WIN,
                               MAX_CHANNEL_PRIORITY, UNKNOWN_CHANNEL)
 from ..base.context import context
+from ..common.cache import LRUCache
 from ..common.compat import ensure_text_type, isiterable, iteritems, odict, with_metaclass
 from ..common.path import is_path, win_path_backout
 from ..common.url import (Url, has_scheme, is_url, join_url, path_to_url,
@@ -35,11 +36,10 @@ class ChannelType(type):
             value = args[0]
             if isinstance(value, Channel):
                 return value
-            elif value in Channel._cache_:
-                return Channel._cache_[value]
-            else:
-                c = Channel._cache_[value] = Channel.from_value(value)
-                return c
+            c = Channel._cache_.get(value)
+            if c is None:
+                c = Channel._cache_.setdefault(value, Channel.from_value(value))
+            return c
         else:
             if 'channels' in kwargs:
                 # presence of 'channels' kwarg indicates MultiChannel
@@ -61,11 +61,11 @@ class Channel(object):
     channel <> subchannel <> namespace <> package_name
 
     """
-    _cache_ = {}
+    _cache_ = LRUCache(maxsize=131072)
 
     @staticmethod
     def _reset_state():
-        Channel._cache_ = {}
+        Channel._cache_.clear()
 
     def __init__(self, scheme=None, auth=None, location=None, token=None, name=None,
                  platform=None, package_filename=None):
@@ -12,6 +12,7 @@ from .. import CondaError
 from .._vendor.auxlib.entity import Entity, EntityType, IntegerField, StringField
 from ..base.constants import CONDA_TARBALL_EXTENSION, DEFAULTS_CHANNEL_NAME, UNKNOWN_CHANNEL
 from ..base.context import context
+from ..common.cache import LRUCache
 from ..common.compat import ensure_text_type, text_type, with_metaclass
 from ..common.constants import NULL
 from ..common.url import has_platform, is_url, join_url
@@ -20,6 +21,9 @@ log = getLogger(__name__)
 DistDetails = namedtuple('DistDetails', ('name', 'version', 'build_string', 'build_number',
                                          'dist_name'))
 
+# interned Dist objects built by Dist.from_string, keyed by (string, channel_override)
+dist_cache = LRUCache(maxsize=131072)
+
 
 class DistType(EntityType):
 
@@ -128,6 +132,14 @@ class Dist(Entity):
         if is_url(string) and channel_override == NULL:
             return cls.from_url(string)
 
+        cache_key = string, channel_override
+        dist = dist_cache.get(cache_key)
+        if dist is None:
+            dist = dist_cache.setdefault(cache_key, cls._from_string(string, channel_override))
+        return dist
+
+    @classmethod
+    def _from_string(cls, string, channel_override):
         if string.endswith('@'):
             return cls(channel='@',
                        name=string,
@@ -27,8 +27,10 @@ from .channel import Channel
 from .enums import FileMode, LinkType, NoarchType, PackageType, PathType, Platform
 from .._vendor.auxlib.entity import (BooleanField, ComposableField, DictSafeMixin, Entity,
                                      EnumField, Field, IntegerField, ListField, StringField)
+from .._vendor.auxlib.exceptions import ValidationError
 from ..base.context import context
-from ..common.compat import isiterable, itervalues, string_types, text_type
+from ..common.compat import isiterable, iteritems, itervalues, string_types, text_type
+from ..common.constants import NULL
 
 
 @total_ordering
@@ -203,6 +205,57 @@ class BasePackageRef(DictSafeMixin, Entity):
     build = StringField(aliases=('build_string',))
     build_number = IntegerField()
 
+    @classmethod
+    def from_trusted_objects(cls, *objects, **override_fields):
+        """Fast-path constructor for data that has already been validated once.
+
+        Like `from_objects`, values from override_fields take precedence, followed by objects
+        in order.  Objects may be mappings or other records.  Values are still boxed into
+        their field types, but per-field validation and the required-field walk done by
+        `Entity.__init__` are skipped.  Use only for repodata and records conda has
+        produced itself; untrusted input should go through the regular constructor.
+        """
+        fields, aliases, required = cls._trusted_field_maps()
+        init_vars = {}
+        for obj in (override_fields,) + objects:
+            if isinstance(obj, Entity):
+                obj = obj.__dict__
+            for key, val in iteritems(obj):
+                name = key if key in fields else aliases.get(key)
+                if name is None or init_vars.get(name) is not None:
+                    continue
+                if name != key and obj.get(name) is not None:
+                    # a value under the canonical field name wins over its alias
+                    continue
+                init_vars[name] = val
+
+        missing = required.difference(init_vars)
+        if missing:
+            raise ValidationError(None, msg="%s requires fields %s"
+                                            % (cls.__name__, ', '.join(sorted(missing))))
+
+        record = cls.__new__(cls)
+        record_dict = record.__dict__
+        for name, val in iteritems(init_vars):
+            field = fields[name]
+            if val is not None:
+                val = field.box(record, val)
+            if val is not None or field.nullable:
+                record_dict[name] = val
+        setattr(record, '_%s__initd' % cls.__name__, True)
+        return record
+
+    @classmethod
+    def _trusted_field_maps(cls):
+        if '_trusted_field_maps_cache' not in cls.__dict__:
+            fields = dict(cls.__fields__)
+            aliases = {alias: name for name, field in iteritems(fields)
+                       for alias in field._aliases}
+            required = frozenset(name for name, field in iteritems(fields)
+                                 if field.required and field.default is NULL)
+            cls._trusted_field_maps_cache = fields, aliases, required
+        return cls._trusted_field_maps_cache
+
 
 class PackageRef(BasePackageRef):
     # the canonical code abbreviation for PackageRef is `pref`
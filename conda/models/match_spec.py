@@ -3,6 +3,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 from abc import ABCMeta, abstractmethod, abstractproperty
 from collections import Mapping
+from operator import attrgetter
 from os.path import basename
 import re
 
@@ -12,6 +13,8 @@ from .index_record import IndexRecord, PackageRef
 from .version import BuildNumberMatch, VersionSpec
 from .._vendor.auxlib.collection import frozendict
 from ..base.constants import CONDA_TARBALL_EXTENSION
+from ..base.context import context
+from ..common.cache import LRUCache
 from ..common.compat import isiterable, iteritems, string_types, text_type, with_metaclass
 from ..common.path import expand
 from ..common.url import is_url, path_to_url, unquote
@@ -171,6 +174,13 @@ class MatchSpec(object):
         'md5',
     )
 
+    _match_fn = None
+    _hash = None
+
+    @staticmethod
+    def _reset_state():
+        _parse_spec_str_cache.clear()
+
     def __init__(self, optional=False, target=None, **kwargs):
         self.optional = optional
         self.target = target
@@ -192,15 +202,14 @@ class MatchSpec(object):
         return self.__str__()
 
     def match(self, rec):
-        """f
+        """
         Accepts an `IndexRecord` or a dict, and matches can pull from any field
         in that record.  Returns True for a match, and False for no match.
         """
-        for f, v in iteritems(self._match_components):
-            val = getattr(rec, f)
-            if not (v.match(val) if hasattr(v, 'match') else v == val):
-                return False
-        return True
+        match_fn = self._match_fn
+        if match_fn is None:
+            match_fn = self._match_fn = _compile_match_fn(self._match_components)
+        return match_fn(rec)
 
     def _is_simple(self):
         return len(self._match_components) == 1 and self.get_exact_value('name') is not None
@@ -325,7 +334,11 @@ class MatchSpec(object):
             return False
 
     def __hash__(self):
-        return hash((self._match_components, self.optional, self.target))
+        # frozendict hashing sorts its items on every call; MatchSpec is immutable, so hash once
+        _hash = self._hash
+        if _hash is None:
+            _hash = self._hash = hash((self._match_components, self.optional, self.target))
+        return _hash
 
     def __contains__(self, field):
         return field in self._match_components
@@ -444,7 +457,26 @@ def _parse_channel(channel_val):
     return channel_name, chn.subdir
 
 
+# Parsing the same dependency strings (e.g. 'python >=3.6,<3.7.0a0') over and over again
+# dominates building MatchSpecs for a large index, so parse results are cached.  The cache is
+# bounded, and is dropped whenever context is reset because channel names resolve through
+# context.
+_parse_spec_str_cache = LRUCache(maxsize=32768)
+
+
 def _parse_spec_str(spec_str):
+    # callers mutate the returned dict, so always hand out a copy
+    components = _parse_spec_str_cache.get(spec_str)
+    if components is not None:
+        return dict(components)
+    components = _parse_spec_str_uncached(spec_str)
+    if CONDA_TARBALL_EXTENSION not in spec_str:
+        # tarball paths can be relative to the current working directory; don't cache those
+        _parse_spec_str_cache[spec_str] = dict(components)
+    return components
+
+
+def _parse_spec_str_uncached(spec_str):
     # Step 1. strip '#' comment
     if '#' in spec_str:
         ndx = spec_str.index('#')
@@ -586,6 +618,48 @@ def _parse_spec_str(spec_str):
     return components
 
 
+def _compile_match_fn(match_components):
+    """Build a single function testing a record against all of the match components.
+
+    Each component's test is specialized once here so that matching a record doesn't need to
+    re-inspect the matcher types for every call.
+    """
+    tests = tuple((attrgetter(field_name), _compile_component_test(matcher))
+                  for field_name, matcher in iteritems(match_components))
+
+    if not tests:
+        return lambda rec: True
+    elif len(tests) == 1:
+        (get_value, test), = tests
+        return lambda rec: bool(test(get_value(rec)))
+    elif len(tests) == 2:
+        (get_value0, test0), (get_value1, test1) = tests
+        return lambda rec: bool(test0(get_value0(rec)) and test1(get_value1(rec)))
+
+    def match_fn(rec):
+        for get_value, test in tests:
+            if not test(get_value(rec)):
+                return False
+        return True
+    return match_fn
+
+
+def _compile_component_test(matcher):
+    if type(matcher) in (StrMatch, LowerStrMatch):
+        general_match = matcher.match
+        re_match = matcher._re_match
+        if re_match is not None:
+            return lambda val: (re_match(val) if isinstance(val, string_types)
+                                else general_match(val))
+        raw_value = matcher._raw_value
+        return lambda val: (val == raw_value if isinstance(val, string_types)
+                            else general_match(val))
+    elif hasattr(matcher, 'match'):
+        return matcher.match
+    else:
+        return lambda val: matcher == val
+
+
 @with_metaclass(ABCMeta)
 class MatchInterface(object):
 
@@ -746,3 +820,6 @@ _implementors = {
     'build_number': BuildNumberMatch,
     'channel': ChannelMatch,
 }
+
+
+context.register_reset_callaback(MatchSpec._reset_state)
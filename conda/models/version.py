@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
+from bisect import bisect_left, bisect_right
 from logging import getLogger
 import operator as op
 import re
 
+from ..common.cache import LRUCache
 from ..common.compat import string_types, zip, zip_longest, text_type
 from ..exceptions import CondaValueError, InvalidVersionSpecError
 
@@ -27,7 +29,8 @@ def ver_eval(vtest, spec):
 
 version_check_re = re.compile(r'^[\*\.\+!_0-9a-z]+$')
 version_split_re = re.compile('([0-9]+|[*]+|[^0-9*]+)')
-version_cache = {}
+# interned VersionOrder objects, keyed by both the raw and normalized version strings
+version_cache = LRUCache(maxsize=65536)
 
 
 class VersionOrder(object):
@@ -168,7 +171,7 @@ class VersionOrder(object):
 
         # when fillvalue ==  0  =>  1.1 == 1.1.0
         # when fillvalue == -1  =>  1.1  < 1.1.0
-        self = version_cache[vstr] = version_cache[version] = object.__new__(cls)
+        self = object.__new__(cls)
         self.norm_version = version
         self.fillvalue = 0
 
@@ -223,6 +226,10 @@ class VersionOrder(object):
                     # strings in phase => prepend fillvalue
                     v[k] = [self.fillvalue] + c
 
+        # only fully-parsed objects are published to the cache; if another thread won the race
+        # for this version, use its object
+        self = version_cache.setdefault(self.norm_version, self)
+        version_cache[vstr] = self
         return self
 
     def __str__(self):
@@ -399,6 +406,15 @@ opdict = {'==': op.__eq__, '!=': op.__ne__, '<=': op.__le__,
           '>=': op.__ge__, '<': op.__lt__, '>': op.__gt__}
 
 
+_bisect_ranges = {
+    op.__eq__: lambda vos, cmp, n: (bisect_left(vos, cmp), bisect_right(vos, cmp)),
+    op.__ge__: lambda vos, cmp, n: (bisect_left(vos, cmp), n),
+    op.__gt__: lambda vos, cmp, n: (bisect_right(vos, cmp), n),
+    op.__le__: lambda vos, cmp, n: (0, bisect_right(vos, cmp)),
+    op.__lt__: lambda vos, cmp, n: (0, bisect_left(vos, cmp)),
+}
+
+
 class VersionSpec(object):
     def exact_match_(self, vspec):
         return self.spec == vspec
@@ -470,6 +486,31 @@ class VersionSpec(object):
     def is_exact(self):
         return self.match == self.exact_match_
 
+    def match_sorted(self, versions, version_orders):
+        """Match many versions at once.
+
+        Args:
+            versions: distinct version strings, sorted ascending by VersionOrder
+            version_orders: the VersionOrder for each entry of versions
+
+        Returns:
+            A bytearray with 1 at each position of versions matching this spec, else 0.
+            Relational specs resolve to a contiguous range by bisection; everything else
+            is evaluated once per distinct version.
+        """
+        n = len(versions)
+        if self.depth == 2:
+            masks = [s.match_sorted(versions, version_orders) for s in self.tup]
+            combine = all if self.match == self.all_match_ else any
+            return bytearray(combine(flags) for flags in zip(*masks))
+        elif self.match == self.triv_match_:
+            return bytearray(b'\x01') * n
+        elif self.match == self.veval_match_ and self.op in _bisect_ranges:
+            lo, hi = _bisect_ranges[self.op](version_orders, self.cmp, n)
+            return bytearray(lo) + bytearray(b'\x01') * (hi - lo) + bytearray(n - hi)
+        else:
+            return bytearray(bool(self.match(v)) for v in versions)
+
     def __eq__(self, other):
         try:
             other = VersionSpec(other)
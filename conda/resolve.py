@@ -1,17 +1,20 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from array import array
 from itertools import chain
 import logging
 
 from .base.constants import DEFAULTS_CHANNEL_NAME, MAX_CHANNEL_PRIORITY
 from .base.context import context
-from .common.compat import isiterable, iteritems, iterkeys, itervalues, string_types, text_type
+from .common.cache import LRUCache
+from .common.compat import isiterable, iteritems, iterkeys, itervalues, string_types
 from .common.logic import Clauses, minimal_unsatisfiable_subset
+from .common.profiling import profiler
 from .common.toposort import toposort
 from .exceptions import ResolvePackageNotFound, UnsatisfiableError
 from .models.dist import Dist
 from .models.match_spec import MatchSpec
-from .models.version import normalized_version
+from .models.version import VersionOrder, normalized_version
 
 log = logging.getLogger(__name__)
 stdoutlog = logging.getLogger('conda.stdoutlog')
@@ -42,6 +45,16 @@ class Resolve(object):
         self.trackers = trackers  # Dict[track_feature, List[Dist]]
         self.find_matches_ = {}  # Dict[MatchSpec, List[Dist]]
         self.ms_depends_ = {}  # Dict[Dist, List[MatchSpec]]
+        # Dict[package_name, Tuple[List[str], List[VersionOrder], array]]
+        self._version_ranks_ = {}
+        self._version_masks_ = {}  # Dict[Tuple[package_name, VersionSpec], bytearray]
+        self.dist_vars_ = {}  # Dict[Dist, int]; SAT variables, assigned by gen_clauses
+        self.var_dists_ = {}  # Dict[int, Dist]; excludes feature packages
+        self._clauses_ = None  # Clauses; the base clauses, built once by gen_clauses
+        # Memoized subproblems, so that repeated solves for the same specs or environment
+        # don't rerun the index reduction or regenerate clauses
+        self._reduced_index_cache_ = LRUCache(maxsize=64)  # Dict[FrozenSet[MatchSpec], Dists]
+        self._sub_resolve_cache_ = LRUCache(maxsize=16)  # Dict[Tuple, Resolve]
 
         if sort:
             for name, group in iteritems(groups):
@@ -223,6 +236,19 @@ class Resolve(object):
         raise UnsatisfiableError(bad_deps)
 
     def get_reduced_index(self, specs):
+        # Memoized by the set of specs.  Only the packages are cached; the records are looked up
+        # again, in case they have been replaced in the index.
+        key = frozenset(map(MatchSpec, specs))
+        dists = self._reduced_index_cache_.get(key)
+        if dists is None:
+            with profiler.phase('get_reduced_index'):
+                dists = self._reduced_index_cache_.setdefault(
+                    key, tuple(self._get_reduced_index(specs)))
+                profiler.count('records', len(dists))
+        index = self.index
+        return {dist: index[dist] for dist in dists}
+
+    def _get_reduced_index(self, specs):
         log.debug('Retrieving packages for: %s', specs)
 
         specs, features = self.verify_specs(specs)
@@ -332,20 +358,72 @@ class Resolve(object):
         rec = self.index[fkey]
         return MatchSpec(ms).match(rec)
 
+    def _version_ranks(self, name):
+        # type: (str) -> Tuple[List[str], List[VersionOrder], array]
+        # For a package name group, the distinct versions sorted ascending, and for each dist in
+        # the group (in group order) the rank of its version within that sorted list.
+        ranks = self._version_ranks_.get(name)
+        if ranks is None:
+            group = self.groups.get(name, [])
+            try:
+                versions = sorted(set(self.index[dist]['version'] for dist in group),
+                                  key=VersionOrder)
+                version_orders = [VersionOrder(v) for v in versions]
+            except Exception as e:
+                # e.g. an invalid version string; fall back to matching record by record
+                log.debug('cannot rank versions for %s: %r', name, e)
+                ranks = None, None, None
+            else:
+                rank_of = {v: i for i, v in enumerate(versions)}
+                group_ranks = array('i', (rank_of[self.index[dist]['version']]
+                                          for dist in group))
+                ranks = versions, version_orders, group_ranks
+            self._version_ranks_[name] = ranks
+        return ranks
+
+    def _find_matches_by_version(self, ms):
+        # type: (MatchSpec) -> List[Dist]
+        # Match a spec with an exact name and a version component against its package group.
+        # The version component is resolved once against the distinct versions in the group;
+        # only the remaining components, if any, are matched record by record.
+        name = ms.name
+        group = self.groups.get(name, [])
+        versions, version_orders, group_ranks = self._version_ranks(name)
+        if versions is None:
+            return [p for p in group if self.match(ms, p)]
+
+        vspec = ms.version
+        mask_key = name, vspec
+        mask = self._version_masks_.get(mask_key)
+        if mask is None:
+            mask = self._version_masks_[mask_key] = vspec.match_sorted(versions, version_orders)
+        res = [dist for dist, rank in zip(group, group_ranks) if mask[rank]]
+
+        other_components = {k: v for k, v in iteritems(ms._match_components)
+                            if k not in ('name', 'version')}
+        if other_components:
+            other_ms = MatchSpec(**other_components)
+            res = [p for p in res if self.match(other_ms, p)]
+        return res
+
     def find_matches(self, ms):
         # type: (MatchSpec) -> List[Dist]
         assert isinstance(ms, MatchSpec)
         res = self.find_matches_.get(ms, None)
         if res is None:
-            if ms.get_exact_value('name'):
-                res = self.groups.get(ms.name, [])
-            elif ms.get_exact_value('track_features'):
-                res = list(chain.from_iterable(self.trackers[tf]
-                                               for tf in ms.get_exact_value('track_features') or ()
-                                               if tf in self.trackers))
+            if ms.get_exact_value('name') and 'version' in ms:
+                res = self._find_matches_by_version(ms)
             else:
-                res = self.index.keys()
-            res = [p for p in res if self.match(ms, p)]
+                if ms.get_exact_value('name'):
+                    res = self.groups.get(ms.name, [])
+                elif ms.get_exact_value('track_features'):
+                    res = list(chain.from_iterable(
+                        self.trackers[tf] for tf in ms.get_exact_value('track_features') or ()
+                        if tf in self.trackers
+                    ))
+                else:
+                    res = self.index.keys()
+                res = [p for p in res if self.match(ms, p)]
             self.find_matches_[ms] = res
         return res
 
@@ -424,16 +502,18 @@ class Resolve(object):
         return sorted(dists, key=self.version_key)
 
     @staticmethod
-    def ms_to_v(ms):
-        ms = MatchSpec(ms)
-        return '@s@' + text_type(ms) + ('?' if ms.optional else '')
+    def _ms_key(ms):
+        # Spec variables are named in the Clauses object by the MatchSpec itself.  The target
+        # doesn't affect which packages match, so it isn't part of the name.
+        return ms if ms.target is None else MatchSpec(ms, target=None)
 
     def push_MatchSpec(self, C, ms):
+        # returns the literal (an integer, or a boolean constant) for the spec
         ms = MatchSpec(ms)
-        name = self.ms_to_v(ms)
-        m = C.from_name(name)
+        key = self._ms_key(ms)
+        m = C.from_name(key)
         if m is not None:
-            return name
+            return m
         simple = ms._is_single()
         nm = ms.get_exact_value('name')
         tf = ms.get_exact_value('track_features')
@@ -454,68 +534,122 @@ class Resolve(object):
                 m = True
             elif not simple:
                 ms2 = MatchSpec(track_features=tf) if tf else nm
-                m = C.from_name(self.push_MatchSpec(C, ms2))
+                m = self.push_MatchSpec(C, ms2)
         if m is None:
-            dists = [dist.full_name for dist in libs]
+            dist_vars = self.dist_vars_
+            lits = [dist_vars[dist] for dist in libs]
             if ms.optional:
                 ms2 = MatchSpec(track_features=tf) if tf else nm
-                dists.append('!' + self.ms_to_v(ms2))
-            m = C.Any(dists)
-        C.name_var(m, name)
-        return name
+                lits.append(C.Not_(self.push_MatchSpec(C, ms2)))
+            m = C.Any(lits)
+        C.name_var(m, key)
+        return m
+
+    def sub_resolve(self, index):
+        # type: (Dict[Dist, Record]) -> Resolve
+        # A Resolve for a subset of the index, e.g. a reduced index, memoized so that its caches
+        # and base clauses are reused by later calls.  The key covers the records themselves
+        # (kept alive by the cached instance) and channel_priority, which orders versions.
+        key = (frozenset((dist, id(rec)) for dist, rec in iteritems(index)),
+               context.channel_priority)
+        r2 = self._sub_resolve_cache_.get(key)
+        if r2 is None:
+            r2 = self._sub_resolve_cache_.setdefault(key, Resolve(index, True, True))
+        return r2
 
     def gen_clauses(self):
+        # The base clauses are generated once per instance.  Each call returns a copy, which the
+        # caller is free to add to.
+        if self._clauses_ is None:
+            with profiler.phase('gen_clauses'):
+                self._clauses_ = self._gen_clauses()
+                profiler.count('clauses', len(self._clauses_.clauses))
+                profiler.count('variables', self._clauses_.m)
+        return self._clauses_.copy()
+
+    def _gen_clauses(self):
+        # Package variables are plain integers, recorded in dist_vars_ and var_dists_ rather
+        # than named in the Clauses object, so the mappings are shared by all copies.
         C = Clauses()
+        dist_vars = self.dist_vars_
+        var_dists = self.var_dists_
         for name, group in iteritems(self.groups):
-            group = [dist.full_name for dist in group]
             # Create one variable for each package
-            for fkey in group:
-                C.new_var(fkey)
+            group_vars = []
+            for dist in group:
+                v = C.new_var()
+                dist_vars[dist] = v
+                if not dist.is_feature_package:
+                    var_dists[v] = dist
+                group_vars.append(v)
             # Create one variable for the group
-            m = C.new_var(self.ms_to_v(name))
+            m = C.new_var(MatchSpec(name))
             # Exactly one of the package variables, OR
             # the negation of the group variable, is true
-            C.Require(C.ExactlyOne, group + [C.Not(m)])
+            group_vars.append(-m)
+            C.Require(C.ExactlyOne, group_vars)
         # If a package is installed, its dependencies must be as well
         for dist in iterkeys(self.index):
-            nkey = C.Not(dist.full_name)
+            nkey = -dist_vars[dist]
             for ms in self.ms_depends(dist):
                 C.Require(C.Or, nkey, self.push_MatchSpec(C, ms))
 
         return C
 
+    def dists_from_solution(self, solution):
+        # type: (Iterable[int]) -> List[Dist]
+        var_dists = self.var_dists_
+        return [var_dists[v] for v in solution if v in var_dists]
+
     def generate_spec_constraints(self, C, specs):
         return [(self.push_MatchSpec(C, ms),) for ms in specs]
 
+    # The objectives below are C.minimize() objectives: Dict[literal, coeff].  Constant literals
+    # contribute the same amount to every solution, so they are left out.
+
     def generate_feature_count(self, C):
-        return {self.push_MatchSpec(C, MatchSpec(track_features=name)): 1
-                for name in iterkeys(self.trackers)}
+        lits = (self.push_MatchSpec(C, MatchSpec(track_features=name))
+                for name in iterkeys(self.trackers))
+        return {m: 1 for m in lits if type(m) is not bool}
 
     def generate_update_count(self, C, specs):
-        return {'!'+ms.target: 1 for ms in specs if ms.target and C.from_name(ms.target)}
+        dist_vars = self.dist_vars_
+        lits = (dist_vars.get(Dist(ms.target)) for ms in specs if ms.target)
+        return {-m: 1 for m in lits if m}
+
+    def generate_target_hint(self, specs):
+        # the dists currently installed, as a solution hint; see Clauses.sat()
+        dist_vars = self.dist_vars_
+        lits = (dist_vars.get(Dist(ms.target)) for ms in specs if ms.target)
+        return [m for m in lits if m]
 
     def generate_feature_metric(self, C):
-        eq = {}  # a C.minimize() objective: Dict[varname, coeff]
+        eq = {}  # a C.minimize() objective: Dict[literal, coeff]
         total = 0
+        dist_vars = self.dist_vars_
         for name, group in iteritems(self.groups):
             nf = [len(self.features(dist)) for dist in group]
             maxf = max(nf)
-            eq.update({dist.full_name: maxf-fc for dist, fc in zip(group, nf) if fc < maxf})
+            eq.update({dist_vars[dist]: maxf-fc for dist, fc in zip(group, nf) if fc < maxf})
             total += maxf
         return eq, total
 
     def generate_removal_count(self, C, specs):
-        return {'!'+self.push_MatchSpec(C, ms.name): 1 for ms in specs}
+        lits = (self.push_MatchSpec(C, ms.name) for ms in specs)
+        return {-m: 1 for m in lits if type(m) is not bool}
 
     def generate_install_count(self, C, specs):
-        return {self.push_MatchSpec(C, ms.name): 1 for ms in specs if ms.optional}
+        lits = (self.push_MatchSpec(C, ms.name) for ms in specs if ms.optional)
+        return {m: 1 for m in lits if type(m) is not bool}
 
     def generate_package_count(self, C, missing):
-        return {self.push_MatchSpec(C, nm): 1 for nm in missing}
+        lits = (self.push_MatchSpec(C, nm) for nm in missing)
+        return {m: 1 for m in lits if type(m) is not bool}
 
     def generate_version_metrics(self, C, specs, include0=False):
-        eqv = {}  # a C.minimize() objective: Dict[varname, coeff]
-        eqb = {}  # a C.minimize() objective: Dict[varname, coeff]
+        eqv = {}  # a C.minimize() objective: Dict[literal, coeff]
+        eqb = {}  # a C.minimize() objective: Dict[literal, coeff]
+        dist_vars = self.dist_vars_
         sdict = {}  # Dict[package_name, Dist]
 
         for s in specs:
@@ -550,9 +684,9 @@ class Resolve(object):
                     ib += 1
 
                 if iv or include0:
-                    eqv[dist.full_name] = iv
+                    eqv[dist_vars[dist]] = iv
                 if ib or include0:
-                    eqb[dist.full_name] = ib
+                    eqb[dist_vars[dist]] = ib
                 pkey = version_key
 
         return eqv, eqb
@@ -620,7 +754,7 @@ class Resolve(object):
             rec = self.index[dist]
             dists[dist] = rec
             specs.append(MatchSpec(' '.join(self.package_quad(dist)[:3])))
-        r2 = Resolve(dists, True, True)
+        r2 = self.sub_resolve(dists)
         C = r2.gen_clauses()
         constraints = r2.generate_spec_constraints(C, specs)
         solution = C.sat(constraints)
@@ -636,14 +770,28 @@ class Resolve(object):
             constraints = r2.generate_spec_constraints(C, specs)
             return C.sat(constraints, add_if)
 
-        r2 = Resolve(reduced_index, True, True)
+        r2 = self.sub_resolve(reduced_index)
         C = r2.gen_clauses()
         solution = mysat(specs, True)
         if solution:
             return ()
         else:
-            specs = minimal_unsatisfiable_subset(specs, sat=mysat)
-            return specs
+            return r2.minimal_unsatisfiable_specs(C, specs)
+
+    def minimal_unsatisfiable_specs(self, C, specs):
+        # Each spec is guarded by a selector variable, an assumption that enables it, so that
+        # checking a subset of the specs only adds a unit clause per spec to C.
+        selectors = {}
+        for ms in specs:
+            if ms not in selectors:
+                sel = selectors[ms] = C.new_var()
+                C.Require(C.Or, -sel, self.push_MatchSpec(C, ms))
+
+        def sat(subset):
+            return C.sat([(selectors[ms],) for ms in subset]) is not None
+
+        log.debug('Searching for a minimal set of conflicting specs among %d', len(specs))
+        return minimal_unsatisfiable_subset(specs, sat, context.unsatisfiable_core_timeout_secs)
 
     def bad_installed(self, installed, new_specs):
         log.debug('Checking if the current environment is consistent')
@@ -656,7 +804,7 @@ class Resolve(object):
             rec = self.index[dist]
             dists[dist] = rec
             specs.append(MatchSpec(' '.join(self.package_quad(dist)[:3])))
-        r2 = Resolve(dists, True, True)
+        r2 = self.sub_resolve(dists)
         C = r2.gen_clauses()
         constraints = r2.generate_spec_constraints(C, specs)
         solution = C.sat(constraints)
@@ -674,9 +822,7 @@ class Resolve(object):
             snames = set()
             eq_optional_c = r2.generate_removal_count(C, specs)
             solution, _ = C.minimize(eq_optional_c, C.sat())
-            snames.update(dists[Dist(q)]['name']
-                          for q in (C.from_index(s) for s in solution)
-                          if q and q[0] != '!' and '@' not in q)
+            snames.update(dists[dist]['name'] for dist in r2.dists_from_solution(solution))
             # Existing behavior: keep all specs and their dependencies
             for spec in new_specs:
                 get_(MatchSpec(spec).name, snames)
@@ -776,11 +922,11 @@ class Resolve(object):
             constraints = r2.generate_spec_constraints(C, specs)
             return C.sat(constraints, add_if)
 
-        r2 = Resolve(reduced_index, True, True)
+        r2 = self.sub_resolve(reduced_index)
         C = r2.gen_clauses()
         solution = mysat(specs, True)
         if not solution:
-            specs = minimal_unsatisfiable_subset(specs, sat=mysat)
+            specs = r2.minimal_unsatisfiable_specs(C, specs)
             self.find_conflicts(specs)
 
         speco = []  # optional packages
@@ -798,64 +944,69 @@ class Resolve(object):
                 speca.append(s)
         speca.extend(MatchSpec(s) for s in specm)
 
+        # Build every objective first, since this may add clauses, then minimize them in
+        # order of priority.  Each entry is (log message, objective).
+        objectives = []
+
         # Removed packages: minimize count
         if _remove:
-            eq_optional_c = r2.generate_removal_count(C, speco)
-            solution, obj7 = C.minimize(eq_optional_c, solution)
-            log.debug('Package removal metric: %d', obj7)
+            objectives.append(('Package removal metric',
+                               r2.generate_removal_count(C, speco)))
 
         # Requested packages: maximize versions
         eq_req_v, eq_req_b = r2.generate_version_metrics(C, specr)
-        solution, obj3 = C.minimize(eq_req_v, solution)
-        log.debug('Initial package version metric: %d', obj3)
+        objectives.append(('Initial package version metric', eq_req_v))
 
         # Track features: minimize feature count
-        eq_feature_count = r2.generate_feature_count(C)
-        solution, obj1 = C.minimize(eq_feature_count, solution)
-        log.debug('Track feature count: %d', obj1)
+        objectives.append(('Track feature count', r2.generate_feature_count(C)))
 
         # Featured packages: maximize featured package count
         eq_feature_metric, ftotal = r2.generate_feature_metric(C)
-        solution, obj2 = C.minimize(eq_feature_metric, solution)
-        obj2 = ftotal - obj2
-        log.debug('Package feature count: %d', obj2)
+        objectives.append(('Package feature count', eq_feature_metric))
 
         # Requested packages: maximize builds
-        solution, obj4 = C.minimize(eq_req_b, solution)
-        log.debug('Initial package build metric: %d', obj4)
+        objectives.append(('Initial package build metric', eq_req_b))
 
         # Optional installations: minimize count
         if not _remove:
-            eq_optional_install = r2.generate_install_count(C, speco)
-            solution, obj49 = C.minimize(eq_optional_install, solution)
-            log.debug('Optional package install metric: %d', obj49)
+            objectives.append(('Optional package install metric',
+                               r2.generate_install_count(C, speco)))
 
         # Dependencies: minimize the number of packages that need upgrading
-        eq_u = r2.generate_update_count(C, speca)
-        solution, obj50 = C.minimize(eq_u, solution)
-        log.debug('Dependency update count: %d', obj50)
+        objectives.append(('Dependency update count', r2.generate_update_count(C, speca)))
 
         # Remaining packages: maximize versions, then builds
         eq_v, eq_b = r2.generate_version_metrics(C, speca)
-        solution, obj5 = C.minimize(eq_v, solution)
-        solution, obj6 = C.minimize(eq_b, solution)
-        log.debug('Additional package version/build metrics: %d/%d', obj5, obj6)
+        objectives.append(('Additional package version metric', eq_v))
+        objectives.append(('Additional package build metric', eq_b))
 
         # Prune unnecessary packages
-        eq_c = r2.generate_package_count(C, specm)
-        solution, obj7 = C.minimize(eq_c, solution, trymax=True)
-        log.debug('Weak dependency count: %d', obj7)
+        objectives.append(('Weak dependency count', r2.generate_package_count(C, specm)))
+
+        solution, values = C.minimize_lexicographic([eq for _, eq in objectives], solution,
+                                                    trymax=True,
+                                                    hint=r2.generate_target_hint(specs),
+                                                    names=[msg for msg, _ in objectives])
+        for (msg, eq), value in zip(objectives, values):
+            if eq is eq_feature_metric:
+                value = ftotal - value
+            log.debug('%s: %d', msg, value)
+
+        # Alternate solutions cost a SAT call each, and are only used for the warning below,
+        # so they are enumerated only when asked for or when the warning would be shown.
+        if not (returnall or context.verbosity and not context.json):
+            return sorted(r2.dists_from_solution(solution))
 
         def clean(sol):
-            return [q for q in (C.from_index(s) for s in sol)
-                    if q and q[0] != '!' and '@' not in q]
+            var_dists = r2.var_dists_
+            return [v for v in sol if v in var_dists]
         log.debug('Looking for alternate solutions')
         nsol = 1
         psolutions = []
         psolution = clean(solution)
         psolutions.append(psolution)
         while True:
-            nclause = tuple(C.Not(C.from_name(q)) for q in psolution)
+            nclause = tuple(-v for v in psolution)
             solution = C.sat((nclause,), True)
             if solution is None:
                 break
@@ -866,8 +1017,9 @@ class Resolve(object):
             psolution = clean(solution)
             psolutions.append(psolution)
 
+        psolutions = [r2.dists_from_solution(psol) for psol in psolutions]
         if nsol > 1:
-            psols2 = list(map(set, psolutions))
+            psols2 = [set(dist.full_name for dist in psol) for psol in psolutions]
             common = set.intersection(*psols2)
             diffs = [sorted(set(sol) - common) for sol in psols2]
             if not context.json:
@@ -878,10 +1030,7 @@ class Resolve(object):
                      dashlist(', '.join(diff) for diff in diffs),
                      '\n  ... and others' if nsol > 10 else ''))
 
-        def stripfeat(sol):
-            return sol.split('[')[0]
-
         if returnall:
-            return [sorted(Dist(stripfeat(dname)) for dname in psol) for psol in psolutions]
+            return [sorted(psol) for psol in psolutions]
         else:
-            return sorted(Dist(stripfeat(dname)) for dname in psolutions[0])
+            return sorted(psolutions[0])
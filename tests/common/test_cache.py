@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from logging import getLogger
+from threading import Thread
+
+import pytest
+
+from conda.common.cache import CacheInfo, LRUCache
+from conda.models.dist import Dist, dist_cache
+from conda.models.version import VersionOrder, version_cache
+
+log = getLogger(__name__)
+
+
+def test_lru_cache_eviction_and_stats():
+    cache = LRUCache(maxsize=2)
+    cache['a'] = 1
+    cache['b'] = 2
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache['c'] = 3
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    assert cache.get('b') is None
+    with pytest.raises(KeyError):
+        cache['b']
+    assert cache.cache_info() == CacheInfo(hits=1, misses=2, maxsize=2, currsize=2)
+
+    assert cache.setdefault('a', 100) == 1
+    assert cache.setdefault('d', 4) == 4
+    assert 'c' not in cache
+
+    assert cache.pop('a') == 1
+    assert cache.pop('a', None) is None
+    cache.maxsize = 0
+    assert len(cache) == 0
+
+    cache.clear()
+    assert cache.cache_info() == CacheInfo(hits=0, misses=0, maxsize=0, currsize=0)
+
+
+def test_lru_cache_unbounded():
+    cache = LRUCache()
+    for q in range(1000):
+        cache[q] = q
+    assert len(cache) == 1000
+    assert cache[0] == 0
+
+
+def test_lru_cache_concurrent_setdefault():
+    cache = LRUCache(maxsize=64)
+    results = []
+
+    def worker():
+        for q in range(500):
+            results.append((q % 10, cache.setdefault(q % 10, object())))
+
+    threads = [Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # every thread sees the one interned object per key
+    interned = {}
+    for key, value in results:
+        assert interned.setdefault(key, value) is value
+    assert len(cache) == 10
+
+
+def test_version_order_interning():
+    version_cache.clear()
+    v1 = VersionOrder('1.2.3a')
+    assert VersionOrder('1.2.3A') is v1
+    assert VersionOrder(' 1.2.3a') is v1
+    assert version_cache.cache_info().hits >= 1
+    assert version_cache.maxsize is not None
+
+
+def test_dist_interning():
+    dist_cache.clear()
+    d1 = Dist('defaults::numpy-1.7.1-py27_0')
+    assert Dist('defaults::numpy-1.7.1-py27_0') is d1
+    assert Dist('defaults::numpy-1.7.1-py27_0.tar.bz2') == d1
+    assert dist_cache.cache_info().hits == 1
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+from logging import getLogger
+from threading import Thread
+
+from conda.common.profiling import Profiler, profiler
+from conda.resolve import Resolve
+from tests.helpers import get_index_r_1
+
+log = getLogger(__name__)
+
+
+def test_profiler_phases_and_counts(tmpdir):
+    p = Profiler()
+    with p.phase('ignored'):
+        p.count('ignored')
+    assert not p.report()['phases']
+
+    p.enable()
+    p.count('loose', 2)
+    for _ in range(2):
+        with p.phase('outer'):
+            p.count('records', 10)
+            with p.phase('inner'):
+                p.count('sat_calls')
+
+    @p.profiled('decorated')
+    def decorated(x):
+        return x + 1
+    assert decorated(1) == 2
+
+    report_path = tmpdir.join('profile.json').strpath
+    p.write_report(report_path)
+    with open(report_path) as fh:
+        report = json.load(fh)
+    assert [phase['name'] for phase in report['phases']] == ['outer', 'outer/inner',
+                                                             'decorated']
+    outer, inner, _ = report['phases']
+    assert outer['calls'] == inner['calls'] == 2
+    assert outer['counts'] == {'records': 20}
+    assert inner['counts'] == {'sat_calls': 2}
+    assert outer['wall_time'] >= inner['wall_time'] >= 0
+    assert report['counts'] == {'loose': 2}
+    assert report['wall_time'] >= outer['wall_time']
+
+
+def test_profiler_records_solver_phases():
+    index, _ = get_index_r_1()
+    r = Resolve(index)
+    profiler.enable()
+    try:
+        r.solve(['numpy 1.7*', 'python 2.7*'])
+    finally:
+        profiler.disable()
+    phases = {phase['name']: phase for phase in profiler.report()['phases']}
+    assert phases['get_reduced_index']['counts']['records'] > 0
+    assert phases['gen_clauses']['counts']['clauses'] > 0
+    minimize = [name for name in phases if name.startswith('minimize: ')]
+    assert 'minimize: Additional package version metric' in minimize
+    assert sum(phase['counts'].get('sat_calls', 0) for phase in phases.values()) > 0
+
+
+def test_profiler_counts_from_other_threads():
+    p = Profiler()
+    p.enable()
+
+    def work():
+        p.count('files')
+        with p.phase('worker'):
+            p.count('files')
+
+    with p.phase('outer'):
+        threads = [Thread(target=p.in_current_phase(work)), Thread(target=work)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # a wrapped function called on the same thread leaves its stack as it was
+        p.in_current_phase(work)()
+        p.count('records')
+
+    report = p.report()
+    phases = {phase['name']: phase for phase in report['phases']}
+    assert phases['outer']['counts'] == {'files': 2, 'records': 1}
+    assert phases['outer/worker']['counts'] == {'files': 2}
+    assert phases['worker']['counts'] == {'files': 1}
+    assert report['counts'] == {'files': 1}
@@ -12,11 +12,13 @@ import pytest
 
 from conda import CondaError
 from conda._vendor.auxlib.collection import AttrDict
-from conda.base.constants import ROOT_ENV_NAME
+from conda.base.constants import PREFIX_MAGIC_FILE, ROOT_ENV_NAME
 from conda.base.context import context, reset_context
 from conda.common.io import env_var
 from conda.common.path import ensure_pad
 from conda.core.envs_manager import EnvsDirectory
+from conda.core.path_actions import (RegisterEnvironmentLocationAction,
+                                     UnregisterEnvironmentLocationAction)
 from conda.gateways.disk import mkdir_p
 from conda.gateways.disk.delete import rm_rf
 from conda.gateways.disk.update import touch
@@ -113,6 +115,40 @@ class EnvsManagerUnitTests(TestCase):
         assert ed.get_registered_env_by_location(root_location) is None
         assert ed.get_registered_env_by_name('root') is None
 
+    def test_environment_location_actions_reverse_only_their_prefix(self):
+        envs_dir = join(self.prefix, 'envs')
+        locations = [join(envs_dir, name) for name in ('one', 'two')]
+        for location in locations:
+            mkdir_p(join(location, 'conda-meta'))
+            touch(join(location, PREFIX_MAGIC_FILE))
+
+        with env_var('CONDA_ENVS_DIRS', envs_dir, reset_context):
+            ed = EnvsDirectory(envs_dir)
+            axns = [RegisterEnvironmentLocationAction({}, location) for location in locations]
+            for axn in axns:
+                axn.execute()
+
+            # as when the prefixes run concurrently, and the first one fails
+            axns[0].reverse()
+            assert ed.get_registered_env_by_location(locations[0]) is None
+            assert ed.get_registered_env_by_location(locations[1])
+
+            # registering an already registered location doesn't unregister it on reverse
+            axn = RegisterEnvironmentLocationAction({}, locations[1])
+            axn.execute()
+            axn.reverse()
+            assert ed.get_registered_env_by_location(locations[1])
+
+            axn = UnregisterEnvironmentLocationAction({}, locations[1])
+            axn.execute()
+            assert ed.get_registered_env_by_location(locations[1]) is None
+            ed.register_env(locations[0])
+            axn.reverse()
+            assert ed.get_registered_env_by_location(locations[0])
+            assert ed.get_registered_env_by_location(locations[1])
+
+        EnvsDirectory._cache_.pop(envs_dir)
+
     # def test_leased_paths(self):
     #     with env_var('CONDA_ROOT_PREFIX', self.prefix, reset_context):
     #         alamos_env = EnvsDirectory.preferred_env_to_prefix('alamos')
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from contextlib import contextmanager
+import json
+import os
+from os.path import isdir, join
+
+import pytest
+
+from conda.base.context import context, reset_context
+from conda.common.compat import on_win
+from conda.common.io import env_vars
+from conda.core import link
+from conda.core.link import PrefixSetup, UnlinkLinkTransaction
+from conda.core.linked_data import PrefixData
+from conda.core.package_cache import PackageCache
+from conda.exceptions import CondaMultiError
+from conda.models.index_record import PackageRecord
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+PLACEHOLDER = '/opt/anaconda1anaconda2anaconda3'
+
+staging_only = pytest.mark.skipif(on_win, reason="transactions are not staged on Windows")
+
+
+@contextmanager
+def transaction_env(tmpdir, staged=True, threads=1):
+    pkgs_dir, envs_dir = tmpdir.mkdir('pkgs').strpath, tmpdir.mkdir('envs').strpath
+    PackageCache.clear()
+    PrefixData._cache_ = {}
+    try:
+        with env_vars({
+            'CONDA_PKGS_DIRS': pkgs_dir,
+            'CONDA_ENVS_DIRS': envs_dir,
+            'CONDA_STAGED_TRANSACTIONS': 'true' if staged else 'false',
+            'CONDA_TRANSACTION_THREADS': threads,
+        }, reset_context):
+            yield pkgs_dir, envs_dir
+    finally:
+        reset_context()
+        PackageCache.clear()
+        PrefixData._cache_ = {}
+
+
+def make_package(pkgs_dir, name, version, post_link=None):
+    # an extracted package, with a bin/NAME file whose shebang has a prefix placeholder
+    fn = '%s-%s-0' % (name, version)
+    extracted_dir = join(pkgs_dir, fn)
+    os.makedirs(join(extracted_dir, 'info'))
+    os.makedirs(join(extracted_dir, 'bin'))
+    record = dict(name=name, version=version, build='0', build_number=0, depends=[],
+                  subdir='linux-64', channel='local', fn=fn + '.tar.bz2',
+                  url='file://%s/%s.tar.bz2' % (pkgs_dir, fn), md5='0' * 32)
+    paths = [
+        {'_path': 'bin/' + name, 'path_type': 'hardlink',
+         'prefix_placeholder': PLACEHOLDER, 'file_mode': 'text'},
+        {'_path': 'share/%s.txt' % name, 'path_type': 'hardlink'},
+    ]
+    with open(join(extracted_dir, 'bin', name), 'w') as fh:
+        fh.write('#!%s/bin/python\n' % PLACEHOLDER)
+    os.makedirs(join(extracted_dir, 'share'))
+    with open(join(extracted_dir, 'share', '%s.txt' % name), 'w') as fh:
+        fh.write(version)
+    if post_link:
+        script = 'bin/.%s-post-link.sh' % name
+        with open(join(extracted_dir, script), 'w') as fh:
+            fh.write(post_link)
+        paths.append({'_path': script, 'path_type': 'hardlink'})
+    for info_file in ('index.json', 'repodata_record.json'):
+        with open(join(extracted_dir, 'info', info_file), 'w') as fh:
+            json.dump(record, fh)
+    with open(join(extracted_dir, 'info', 'paths.json'), 'w') as fh:
+        json.dump({'paths_version': 1, 'paths': paths}, fh)
+    return PackageRecord(**record)
+
+
+def read(prefix, path):
+    with open(join(prefix, path)) as fh:
+        return fh.read()
+
+
+def installed(prefix):
+    return sorted((rec.name, rec.version) for rec in PrefixData(prefix).iter_records())
+
+
+@staging_only
+def test_staged_transaction(tmpdir):
+    with transaction_env(tmpdir) as (pkgs_dir, envs_dir):
+        a1, a2, b1 = (make_package(pkgs_dir, 'a', '1'), make_package(pkgs_dir, 'a', '2'),
+                      make_package(pkgs_dir, 'b', '1'))
+        prefix = join(envs_dir, 'env')
+        UnlinkLinkTransaction(PrefixSetup(prefix, (), (a1, b1), (), ())).execute()
+        b_inode = os.stat(join(prefix, 'share', 'b.txt')).st_ino
+
+        with patch.object(link, 'exchange_paths', wraps=link.exchange_paths) as exchange_paths:
+            UnlinkLinkTransaction(PrefixSetup(prefix, (a1,), (a2,), (), ())).execute()
+        exchange_paths.assert_called_once_with(prefix, prefix + '.c~staging')
+        assert not isdir(prefix + '.c~staging')
+        assert read(prefix, 'share/a.txt') == '2'
+        assert read(prefix, 'bin/a') == '#!%s/bin/python\n' % prefix
+        assert os.stat(join(prefix, 'share', 'b.txt')).st_ino == b_inode
+        assert installed(prefix) == [('a', '2'), ('b', '1')]
+
+
+@staging_only
+def test_new_prefix_is_staged_and_renamed_into_place(tmpdir):
+    with transaction_env(tmpdir) as (pkgs_dir, envs_dir):
+        a1, b1 = make_package(pkgs_dir, 'a', '1'), make_package(pkgs_dir, 'b', '1')
+        prefix = join(envs_dir, 'env')
+
+        stage_prefixes = UnlinkLinkTransaction._stage_prefixes
+        with patch.object(link, 'exchange_paths') as exchange_paths, \
+                patch.object(link, 'hardlink_tree') as hardlink_tree, \
+                patch.object(UnlinkLinkTransaction, '_stage_prefixes',
+                             wraps=stage_prefixes) as _stage_prefixes:
+            UnlinkLinkTransaction(PrefixSetup(prefix, (), (a1, b1), (), ())).execute()
+        _stage_prefixes.assert_called_once_with({prefix: prefix + '.c~staging'})
+        assert not exchange_paths.called
+        assert not hardlink_tree.called
+        assert not isdir(prefix + '.c~staging')
+        assert read(prefix, 'bin/a') == '#!%s/bin/python\n' % prefix
+        assert installed(prefix) == [('a', '1'), ('b', '1')]
+
+
+@staging_only
+def test_transaction_with_scripts_is_not_staged(tmpdir):
+    post_link = 'echo "$PREFIX" > "$PREFIX/post-link-prefix.txt"\n'
+    with transaction_env(tmpdir) as (pkgs_dir, envs_dir):
+        a1 = make_package(pkgs_dir, 'a', '1', post_link=post_link)
+        prefix = join(envs_dir, 'env')
+        os.makedirs(join(prefix, 'conda-meta'))
+
+        with patch.object(link, 'hardlink_tree') as hardlink_tree:
+            UnlinkLinkTransaction(PrefixSetup(prefix, (), (a1,), (), ())).execute()
+        assert not hardlink_tree.called
+        assert read(prefix, 'post-link-prefix.txt') == prefix + '\n'
+        assert not isdir(prefix + '.c~staging')
+        assert installed(prefix) == [('a', '1')]
+
+
+@staging_only
+def test_failed_swap_swaps_back(tmpdir):
+    with transaction_env(tmpdir) as (pkgs_dir, envs_dir):
+        a1, b1 = make_package(pkgs_dir, 'a', '1'), make_package(pkgs_dir, 'b', '1')
+        prefix1, prefix2 = join(envs_dir, 'env1'), join(envs_dir, 'env2')
+        for prefix in (prefix1, prefix2):
+            os.makedirs(join(prefix, 'conda-meta'))
+
+        exchange_paths = link.exchange_paths
+        swaps = []
+
+        def fail_second_swap(path1, path2):
+            swaps.append(path1)
+            if len(swaps) == 2:
+                raise OSError("swap failed")
+            exchange_paths(path1, path2)
+
+        setups = (PrefixSetup(prefix1, (), (a1,), (), ()), PrefixSetup(prefix2, (), (b1,), (), ()))
+        with patch.object(link, 'exchange_paths', side_effect=fail_second_swap):
+            with pytest.raises(CondaMultiError):
+                UnlinkLinkTransaction(*setups).execute()
+        # the first prefix was swapped back before the staging directories were removed
+        assert swaps == [prefix1, prefix2, prefix1]
+        for prefix in (prefix1, prefix2):
+            assert os.listdir(prefix) == ['conda-meta']
+            assert installed(prefix) == []
+            assert not isdir(prefix + '.c~staging')
+
+
+@staging_only
+def test_failed_swap_renames_new_prefix_back(tmpdir):
+    with transaction_env(tmpdir) as (pkgs_dir, envs_dir):
+        a1, b1 = make_package(pkgs_dir, 'a', '1'), make_package(pkgs_dir, 'b', '1')
+        prefix1, prefix2 = join(envs_dir, 'env1'), join(envs_dir, 'env2')
+        os.makedirs(join(prefix2, 'conda-meta'))
+
+        setups = (PrefixSetup(prefix1, (), (a1,), (), ()), PrefixSetup(prefix2, (), (b1,), (), ()))
+        with patch.object(link, 'exchange_paths', side_effect=OSError("swap failed")):
+            with pytest.raises(CondaMultiError):
+                UnlinkLinkTransaction(*setups).execute()
+        # the new prefix is left as the empty directory the transaction created for it
+        assert os.listdir(prefix1) == []
+        assert os.listdir(prefix2) == ['conda-meta']
+        for prefix in (prefix1, prefix2):
+            assert installed(prefix) == []
+            assert not isdir(prefix + '.c~staging')
+
+
+def test_concurrent_transaction_rolls_back_every_prefix(tmpdir):
+    with transaction_env(tmpdir, staged=False, threads=2) as (pkgs_dir, envs_dir):
+        a1, a2 = make_package(pkgs_dir, 'a', '1'), make_package(pkgs_dir, 'a', '2')
+        b1, b2 = make_package(pkgs_dir, 'b', '1'), make_package(pkgs_dir, 'b', '2')
+        prefix1, prefix2 = join(envs_dir, 'env1'), join(envs_dir, 'env2')
+        UnlinkLinkTransaction(PrefixSetup(prefix1, (), (a1,), (), ()),
+                              PrefixSetup(prefix2, (), (b1,), (), ())).execute()
+
+        create_prefix_record = link.CreatePrefixRecordAction.execute
+
+        def fail_b2(action):
+            record = action.package_info.repodata_record
+            if (record.name, record.version) == ('b', '2'):
+                raise RuntimeError("link failed")
+            create_prefix_record(action)
+
+        setups = (PrefixSetup(prefix1, (a1,), (a2,), (), ()),
+                  PrefixSetup(prefix2, (b1,), (b2,), (), ()))
+        assert context.transaction_threads == 2
+        with patch.object(link.CreatePrefixRecordAction, 'execute', autospec=True,
+                          side_effect=fail_b2):
+            with pytest.raises(CondaMultiError):
+                UnlinkLinkTransaction(*setups).execute()
+
+        PrefixData._cache_ = {}
+        for prefix, name in ((prefix1, 'a'), (prefix2, 'b')):
+            assert read(prefix, 'share/%s.txt' % name) == '1'
+            assert read(prefix, 'bin/' + name) == '#!%s/bin/python\n' % prefix
+            assert installed(prefix) == [(name, '1')]
@@ -2,7 +2,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 from logging import getLogger
-from os.path import basename, dirname, isdir, isfile, join, lexists, getsize
+import os
+from os.path import basename, dirname, isdir, isfile, join, lexists, getsize, relpath
 from shlex import split as shlex_split
 from subprocess import check_output
 import sys
@@ -13,7 +14,7 @@ from uuid import uuid4
 import pytest
 
 from conda._vendor.auxlib.collection import AttrDict
-from conda._vendor.toolz.itertoolz import groupby
+from conda._vendor.toolz.itertoolz import concatv, groupby
 from conda.base.constants import PREFIX_MAGIC_FILE
 from conda.base.context import context, reset_context
 from conda.common.compat import PY2, on_win
@@ -21,7 +22,8 @@ from conda.common.io import env_var
 from conda.common.path import get_bin_directory_short_path, get_python_noarch_target_path, \
     get_python_short_path, get_python_site_packages_short_path, parse_entry_point_def, pyc_path, \
     win_path_ok
-from conda.core.path_actions import CompilePycAction, CreatePythonEntryPointAction, LinkPathAction
+from conda.core.path_actions import CompilePycAction, CreatePythonEntryPointAction, LinkPathAction, \
+    UnlinkPathAction
 from conda.exceptions import ParseError
 from conda.gateways.disk.create import create_link, mkdir_p
 from conda.gateways.disk.delete import rm_rf
@@ -331,6 +333,39 @@ class PathActionsTests(TestCase):
         axn.reverse()
         assert not lexists(axn.target_full_path)
 
+    def test_UnlinkPathAction_batched(self):
+        target_full_paths = [make_test_file(join(self.prefix, subdir))
+                             for subdir in ('a', 'a', join('a', 'b'), 'c') for _ in range(3)]
+        target_short_paths = sorted(relpath(p, self.prefix).replace('\\', '/')
+                                    for p in target_full_paths)
+        directories = ('a/b', 'a', 'c')
+        axns = tuple(concatv(
+            (UnlinkPathAction({}, None, self.prefix, short_path)
+             for short_path in target_short_paths),
+            (UnlinkPathAction({}, None, self.prefix, d, LinkType.directory)
+             for d in directories),
+        ))
+        keep = make_test_file(join(self.prefix, 'c'))
+
+        UnlinkPathAction.execute_all(axns)
+        for axn in axns[:-3]:
+            assert not lexists(axn.target_full_path)
+            assert isfile(axn.holding_full_path)
+
+        for axn in axns:
+            axn.reverse()
+        for axn in axns[:-3]:
+            assert isfile(axn.target_full_path)
+            assert not lexists(axn.holding_full_path)
+
+        UnlinkPathAction.execute_all(axns)
+        os.makedirs(join(self.prefix, 'a', 'b', '__pycache__'))
+        UnlinkPathAction.cleanup_all(axns)
+        for axn in axns[:-3]:
+            assert not lexists(axn.holding_full_path)
+        assert not lexists(join(self.prefix, 'a'))
+        assert isfile(keep)
+
     # @pytest.mark.skipif(on_win, reason="unix-only test")
     # def test_CreateApplicationSoftlinkAction_basic_symlink_unix(self):
     #     from conda.core.path_actions import CreateApplicationSoftlinkAction
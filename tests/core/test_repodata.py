@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from copy import deepcopy
+import json
 from logging import getLogger
+from os import makedirs
+from os.path import dirname, join
 from unittest import TestCase
 
 import pytest
@@ -11,7 +15,11 @@ from conda.common.compat import iteritems
 from conda.common.disk import temporary_content_in_file
 from conda.common.io import env_var
 from conda.core.index import get_index
-from conda.core.repodata import Response304ContentUnchanged, cache_fn_url, read_mod_and_etag
+from conda.core.repodata import (Response304ContentUnchanged, cache_fn_url,
+                                 fetch_repodata_sharded, process_repodata, read_mod_and_etag,
+                                 write_repodata_shards)
+from conda.models.match_spec import MatchSpec
+from tests.helpers import local_http_server, tempdir
 
 try:
     from unittest.mock import patch
@@ -145,3 +153,55 @@ class StaticFunctionTests(TestCase):
         hash6 = cache_fn_url("https://repo.continuum.io/pkgs/r/osx-64")
         assert hash4 != hash6
 
+
+
+class ShardedRepodataTests(TestCase):
+
+    def setUp(self):
+        with open(join(dirname(dirname(__file__)), 'index.json')) as fh:
+            self.repodata = {
+                'info': {'subdir': context.subdir},
+                'packages': json.load(fh),
+            }
+
+    def test_fetch_only_reachable_shards(self):
+        with tempdir() as channel_dir, tempdir() as cache_dir:
+            subdir_path = join(channel_dir, context.subdir)
+            makedirs(subdir_path)
+            shards_index = write_repodata_shards(deepcopy(self.repodata), subdir_path)
+            assert set(shards_index['shards']) == set(info['name'] for info in
+                                                      self.repodata['packages'].values())
+
+            with local_http_server(channel_dir) as base_url:
+                url = '%s/%s' % (base_url, context.subdir)
+                sharded = fetch_repodata_sharded(url, 'local', 1, ('python',),
+                                                 cache_dir=cache_dir)
+                # shards are served from the local cache the second time around
+                with patch('conda.core.repodata.CondaSession.get') as get:
+                    get.side_effect = lambda *args, **kwargs: self.fail(args)
+                    with patch('conda.core.repodata.fetch_repodata_shards_index') as fsi:
+                        fsi.return_value = shards_index
+                        again = fetch_repodata_sharded(url, 'local', 1, ('python',),
+                                                       cache_dir=cache_dir)
+                assert again['packages'] == sharded['packages']
+
+            full = deepcopy(self.repodata)
+            process_repodata(full, url, 'local', 1)
+
+        names = set(rec.name for rec in sharded['packages'].values())
+        assert {'python', 'openssl', 'readline', 'zlib'} <= names
+        assert 'numpy' not in names and 'anaconda' not in names
+        assert all(full['packages'][dist] == rec
+                   for dist, rec in iteritems(sharded['packages']))
+        for rec in sharded['packages'].values():
+            for dep in rec.depends:
+                assert MatchSpec(dep).name in names
+
+    def test_unsharded_channel_returns_none(self):
+        with tempdir() as channel_dir, tempdir() as cache_dir:
+            subdir_path = join(channel_dir, context.subdir)
+            makedirs(subdir_path)
+            with local_http_server(channel_dir) as base_url:
+                url = '%s/%s' % (base_url, context.subdir)
+                assert fetch_repodata_sharded(url, 'local', 1, ('numpy',),
+                                              cache_dir=cache_dir) is None
@@ -11,7 +11,8 @@ import pytest
 from conda.base.context import context, reset_context, Context
 from conda.common.io import env_var, env_vars
 from conda.core.linked_data import PrefixData
-from conda.core.solve import DepsModifier, Solver
+from conda.core import solve
+from conda.core.solve import DepsModifier, Solver, solve_final_states
 from conda.exceptions import UnsatisfiableError
 from conda.history import History
 from conda.models.channel import Channel
@@ -114,6 +115,56 @@ def test_solve_1():
         assert tuple(final_state) == tuple(solver._index[Dist(d)] for d in order)
 
 
+def test_solve_final_states():
+    spec_sets = (
+        (MatchSpec("numpy"),),
+        (MatchSpec("numpy"), MatchSpec("python=2")),
+        (MatchSpec("numpy"),),
+    )
+    expected = []
+    for specs in spec_sets:
+        with get_solver(specs) as solver:
+            expected.append(tuple(solver.solve_final_state()))
+
+    index, r = get_index_r_1()
+    with patch.object(History, 'get_requested_specs_map', return_value={}):
+        with patch.object(Solver, '_prepare', return_value=(index, r)):
+            for processes in (None, 2):
+                final_states = solve_final_states(TEST_PREFIX, (Channel('defaults'),),
+                                                  context.subdirs, spec_sets, processes)
+                assert [tuple(final_state) for final_state in final_states] == expected
+    assert expected[0] != expected[1] and expected[0] == expected[2]
+
+    # solved serially where workers can't be forked
+    with patch.object(History, 'get_requested_specs_map', return_value={}):
+        with patch.object(Solver, '_prepare', return_value=(index, r)):
+            with patch('multiprocessing.get_all_start_methods', return_value=['spawn']):
+                with patch('multiprocessing.get_context') as get_context:
+                    final_states = solve_final_states(TEST_PREFIX, (Channel('defaults'),),
+                                                      context.subdirs, spec_sets, 2)
+                    assert not get_context.called
+            assert [tuple(final_state) for final_state in final_states] == expected
+    assert not solve._batch_solvers
+
+
+def test_solve_final_states_returns_the_same_records_in_parallel():
+    spec_sets = (
+        (MatchSpec("numpy"), MatchSpec("python=2")),
+        (MatchSpec("accelerate"),),
+    )
+    index, r = get_index_r_1()
+    with patch.object(History, 'get_requested_specs_map', return_value={}):
+        with patch.object(Solver, '_prepare', return_value=(index, r)):
+            serial = solve_final_states(TEST_PREFIX, (Channel('defaults'),), context.subdirs,
+                                        spec_sets)
+            parallel = solve_final_states(TEST_PREFIX, (Channel('defaults'),), context.subdirs,
+                                          spec_sets, 2)
+    assert len(serial) == len(parallel) == 2
+    for serial_state, parallel_state in zip(serial, parallel):
+        assert len(serial_state) == len(parallel_state) > 0
+        assert all(rec1 is rec2 for rec1, rec2 in zip(serial_state, parallel_state))
+
+
 def test_prune_1():
     specs = MatchSpec("numpy=1.6"), MatchSpec("python=2.7.3"), MatchSpec("accelerate"),
 
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from errno import EIO, EOPNOTSUPP
+from logging import getLogger
+import os
+from os.path import join
+
+import pytest
+
+from conda.gateways.disk import create
+from conda.gateways.disk.create import create_link, hardlink_tree, unshare_hardlink
+from conda.common.compat import on_win
+from conda.models.enums import LinkType
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+log = getLogger(__name__)
+
+linux_only = pytest.mark.skipif(not create._FAST_COPY_METHODS, reason="linux only")
+
+
+def make_source(tmpdir):
+    src = tmpdir.join('src')
+    src.write_binary(b'\0conda\n' * 10000)
+    os.chmod(src.strpath, 0o755)
+    return src.strpath
+
+
+def assert_copied(src, dst):
+    with open(src, 'rb') as f1, open(dst, 'rb') as f2:
+        assert f1.read() == f2.read()
+    assert os.stat(src).st_mode == os.stat(dst).st_mode
+
+
+def test_copy_link_type(tmpdir):
+    src = make_source(tmpdir)
+    dst = join(tmpdir.strpath, 'dst')
+    create_link(src, dst, LinkType.copy)
+    assert_copied(src, dst)
+    assert os.stat(src).st_ino != os.stat(dst).st_ino
+
+
+@linux_only
+def test_fast_copy_unsupported_methods_are_dropped(tmpdir):
+    src = make_source(tmpdir)
+
+    def unsupported(fsrc, fdst):
+        raise OSError(EOPNOTSUPP, os.strerror(EOPNOTSUPP))
+
+    with patch.dict(create._copy_methods, clear=True):
+        with patch.object(create, '_reflink', unsupported):
+            create._do_copy(src, join(tmpdir.strpath, 'dst1'))
+            assert_copied(src, join(tmpdir.strpath, 'dst1'))
+            methods, = create._copy_methods.values()
+            assert 'reflink' not in methods
+
+        # not retried for the same pair of filesystems
+        with patch.object(create, '_reflink') as reflink:
+            create._do_copy(src, join(tmpdir.strpath, 'dst2'))
+            assert not reflink.called
+        assert_copied(src, join(tmpdir.strpath, 'dst2'))
+
+
+@linux_only
+def test_fast_copy_errors_fall_back(tmpdir):
+    src = make_source(tmpdir)
+
+    def failing(fsrc, fdst):
+        raise OSError(EIO, os.strerror(EIO))
+
+    def cloning(fsrc, fdst):
+        fdst.write(fsrc.read())
+
+    with patch.dict(create._copy_methods, clear=True):
+        with patch.object(create, '_reflink', failing):
+            create._do_copy(src, join(tmpdir.strpath, 'dst1'))
+            assert_copied(src, join(tmpdir.strpath, 'dst1'))
+            # a failure that isn't a lack of support keeps the method
+            methods, = create._copy_methods.values()
+            assert 'reflink' in methods
+
+        with patch.object(create, '_reflink', cloning):
+            assert create._fast_copy(src, join(tmpdir.strpath, 'dst2'))
+
+
+@linux_only
+def test_copy_file_range_short_copy_falls_back(tmpdir):
+    src = make_source(tmpdir)
+    dst = join(tmpdir.strpath, 'dst')
+
+    def short_copy_file_range(src_fd, dst_fd, count):
+        # copies part of the file, then reports no progress instead of an error
+        data = os.read(src_fd, min(count, 1000))
+        return os.write(dst_fd, data) if count > 50000 else 0
+
+    with patch.dict(create._copy_methods, clear=True):
+        with patch.object(create, '_FAST_COPY_METHODS', ('copy_file_range',)):
+            with patch.object(os, 'copy_file_range', short_copy_file_range, create=True):
+                create._do_copy(src, dst)
+            assert_copied(src, dst)
+            methods, = create._copy_methods.values()
+            assert methods == ()
+
+
+@pytest.mark.skipif(on_win, reason="symlinks and hardlinks")
+def test_hardlink_tree(tmpdir):
+    src = tmpdir.mkdir('src')
+    src.mkdir('bin').join('python').write('python')
+    src.mkdir('conda-meta').join('history').write('history')
+    src.join('lib').mksymlinkto('bin')
+    src.join('python').mksymlinkto(join('bin', 'python'))
+    dst = join(tmpdir.strpath, 'dst')
+
+    hardlink_tree(src.strpath, dst, copy_directories=('conda-meta',))
+    assert sorted(os.listdir(dst)) == ['bin', 'conda-meta', 'lib', 'python']
+    assert os.readlink(join(dst, 'lib')) == 'bin'
+    assert os.readlink(join(dst, 'python')) == join('bin', 'python')
+    assert os.stat(join(dst, 'bin', 'python')).st_ino == src.join('bin', 'python').stat().ino
+    assert os.stat(join(dst, 'conda-meta', 'history')).st_ino != \
+        src.join('conda-meta', 'history').stat().ino
+    with open(join(dst, 'conda-meta', 'history')) as fh:
+        assert fh.read() == 'history'
+
+
+@pytest.mark.skipif(on_win, reason="hardlinks")
+def test_unshare_hardlink(tmpdir):
+    src = tmpdir.mkdir('src')
+    src.join('python').write('python')
+    dst = join(tmpdir.strpath, 'dst')
+    hardlink_tree(src.strpath, dst)
+
+    assert unshare_hardlink(join(dst, 'python'))
+    with open(join(dst, 'python'), 'w') as fh:
+        fh.write('changed')
+    assert src.join('python').read() == 'python'
+    assert sorted(os.listdir(dst)) == ['python']
+    assert not unshare_hardlink(join(dst, 'python'))
+    assert not unshare_hardlink(join(dst, 'missing'))
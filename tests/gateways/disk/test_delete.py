@@ -9,7 +9,7 @@ import pytest
 
 from conda.compat import TemporaryDirectory
 from conda.gateways.disk.create import create_link
-from conda.gateways.disk.delete import move_to_trash, rm_rf
+from conda.gateways.disk.delete import move_to_trash, rm_paths, rm_rf
 from conda.gateways.disk.link import islink, symlink
 from conda.gateways.disk.update import touch
 from conda.models.enums import LinkType
@@ -164,3 +164,25 @@ def test_try_rmdir_all_empty_doesnt_exist():
         assert isdir(td)
         try_rmdir_all_empty(td)
         assert not isdir(td)
+
+
+def test_rm_paths():
+    with tempdir() as td:
+        paths = [join(td, *parts) for parts in (('a', 'f1'), ('a', 'f2'), ('a', 'b', 'f3'),
+                                                ('c', 'f4'), ('c', 'f5'))]
+        for path in paths:
+            if not isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            _write_file(path, 'content')
+        keep = join(td, 'c', 'keep')
+        _write_file(keep, 'content')
+        # empty directories that aren't listed, e.g. left by python
+        os.makedirs(join(td, 'a', 'b', '__pycache__', 'nested'))
+        os.makedirs(join(td, 'c', '__pycache__'))
+
+        directories = [join(td, 'a'), join(td, 'a', 'b'), join(td, 'c')]
+        rm_paths(paths + [join(td, 'a', 'missing')], directories)
+        assert not any(lexists(path) for path in paths)
+        assert not lexists(join(td, 'a'))
+        assert isfile(keep)
+        assert not lexists(join(td, 'c', '__pycache__'))
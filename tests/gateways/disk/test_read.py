@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+from logging import getLogger
+import os
+from os.path import isfile, join
+from threading import Thread
+
+from conda.gateways.disk import read
+from conda.gateways.disk.read import PATHS_DATA_PICKLE_FILE, read_paths_json
+from conda.models.enums import FileMode, PathType
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+log = getLogger(__name__)
+
+
+def make_package(tmpdir, paths):
+    info = tmpdir.mkdir('pkg').mkdir('info')
+    info.join('paths.json').write(json.dumps({'paths_version': 1, 'paths': paths}))
+    return tmpdir.join('pkg').strpath
+
+
+def test_read_paths_json_pickles_paths_data(tmpdir):
+    epd = make_package(tmpdir, [
+        {'_path': 'bin/foo', 'path_type': 'hardlink', 'prefix_placeholder': '/opt/placeholder',
+         'file_mode': 'text', 'sha256': 'a' * 64, 'size_in_bytes': 3},
+    ])
+    paths_data = read_paths_json(epd)
+    assert isfile(join(epd, 'info', PATHS_DATA_PICKLE_FILE))
+
+    with patch.object(read, '_read_paths_json') as _read_paths_json:
+        cached = read_paths_json(epd)
+        assert not _read_paths_json.called
+    assert cached.dump() == paths_data.dump()
+    path_data, = cached.paths
+    assert path_data.path == 'bin/foo'
+    assert path_data.path_type == PathType.hardlink
+    assert path_data.file_mode == FileMode.text
+
+    # a changed paths.json invalidates the pickle
+    with open(join(epd, 'info', 'paths.json'), 'w') as fh:
+        json.dump({'paths_version': 1, 'paths': [
+            {'_path': 'bin/bar', 'path_type': 'softlink'},
+            {'_path': 'bin/baz', 'path_type': 'hardlink'},
+        ]}, fh)
+    assert [p.path for p in read_paths_json(epd).paths] == ['bin/bar', 'bin/baz']
+
+
+def test_read_paths_json_ignores_bad_pickle(tmpdir):
+    epd = make_package(tmpdir, [{'_path': 'bin/foo', 'path_type': 'hardlink'}])
+    with open(join(epd, 'info', PATHS_DATA_PICKLE_FILE), 'wb') as fh:
+        fh.write(b'not a pickle')
+    assert [p.path for p in read_paths_json(epd).paths] == ['bin/foo']
+    assert [p.path for p in read.read_pickled_paths_data(
+        join(epd, 'info'), read._paths_data_source_stamp(join(epd, 'info'))).paths] == ['bin/foo']
+
+
+def test_read_paths_json_read_only_package(tmpdir):
+    epd = make_package(tmpdir, [{'_path': 'bin/foo', 'path_type': 'hardlink'}])
+    with patch.object(read.pickle, 'dump', side_effect=IOError()):
+        assert [p.path for p in read_paths_json(epd).paths] == ['bin/foo']
+    assert os.listdir(join(epd, 'info')) == ['paths.json']
+
+
+def test_write_pickled_paths_data_from_threads(tmpdir):
+    epd = make_package(tmpdir, [{'_path': 'bin/foo', 'path_type': 'hardlink'}])
+    info_dir = join(epd, 'info')
+    stamp = read._paths_data_source_stamp(info_dir)
+    paths_data = read._read_paths_json(epd)
+    threads = [Thread(target=read.write_pickled_paths_data, args=(info_dir, stamp, paths_data))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(os.listdir(info_dir)) == sorted(['paths.json', PATHS_DATA_PICKLE_FILE])
+    assert [p.path for p in read.read_pickled_paths_data(info_dir, stamp).paths] == ['bin/foo']
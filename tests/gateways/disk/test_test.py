@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from errno import EOPNOTSUPP
+from logging import getLogger
+import os
+
+import pytest
+
+from conda.common.compat import on_win
+from conda.gateways.disk import create, test
+from conda.gateways.disk.test import LinkCapabilities, link_capabilities
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+log = getLogger(__name__)
+
+
+def test_link_capabilities_probed_once_per_filesystem_pair(tmpdir):
+    src1 = tmpdir.mkdir('pkg1').join('index.json')
+    src1.write('{}')
+    src2 = tmpdir.mkdir('pkg2').join('index.json')
+    src2.write('{}')
+    dest = tmpdir.mkdir('prefix')
+
+    cache = {}
+    with patch.object(test, 'hardlink_supported', wraps=test.hardlink_supported) as hardlink:
+        caps1 = link_capabilities(src1.strpath, dest.strpath, cache)
+        caps2 = link_capabilities(src2.strpath, dest.strpath, cache)
+    assert hardlink.call_count == 1
+    assert caps1 is caps2
+    assert isinstance(caps1, LinkCapabilities)
+    assert caps1.hardlink
+    assert caps1.softlink == (not on_win)
+    assert os.listdir(dest.strpath) == []
+
+
+@pytest.mark.skipif('reflink' not in create._FAST_COPY_METHODS, reason="linux only")
+def test_reflink_unsupported_drops_copy_method(tmpdir):
+    src = tmpdir.join('index.json')
+    src.write('{}')
+    dest = tmpdir.mkdir('prefix')
+
+    def unsupported(fsrc, fdst):
+        raise OSError(EOPNOTSUPP, os.strerror(EOPNOTSUPP))
+
+    with patch.dict(create._copy_methods, clear=True):
+        with patch.object(create, '_reflink', unsupported):
+            assert not link_capabilities(src.strpath, dest.strpath, {}).reflink
+        methods, = create._copy_methods.values()
+        assert 'reflink' not in methods
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from logging import getLogger
+from os.path import join
+
+import pytest
+
+from conda.gateways.disk import update
+from conda.gateways.disk.update import exchange_paths
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+log = getLogger(__name__)
+
+
+def make_directories(tmpdir):
+    live, staged = tmpdir.mkdir('live'), tmpdir.mkdir('staged')
+    live.join('old').write('old')
+    staged.join('new').write('new')
+    return live, staged
+
+
+def test_exchange_paths(tmpdir):
+    live, staged = make_directories(tmpdir)
+    exchange_paths(live.strpath, staged.strpath)
+    assert live.listdir() == [live.join('new')]
+    assert staged.listdir() == [staged.join('old')]
+
+
+def test_exchange_paths_without_renameat2(tmpdir):
+    live, staged = make_directories(tmpdir)
+    with patch.object(update, '_renameat2_exchange', return_value=False):
+        exchange_paths(live.strpath, staged.strpath)
+    assert live.listdir() == [live.join('new')]
+    assert staged.listdir() == [staged.join('old')]
+    assert sorted(p.basename for p in tmpdir.listdir()) == ['live', 'staged']
+
+    # a failed swap leaves the original in place
+    with patch.object(update, '_renameat2_exchange', return_value=False):
+        with pytest.raises(OSError):
+            exchange_paths(live.strpath, join(tmpdir.strpath, 'missing'))
+    assert live.listdir() == [live.join('new')]
@@ -109,6 +109,35 @@ def run_inprocess_conda_command(command):
     return c.stdout, c.stderr, exit_code
 
 
+@contextmanager
+def local_http_server(directory):
+    """Serve `directory` over http on a free localhost port; yields the base url."""
+    try:
+        from http.server import HTTPServer, SimpleHTTPRequestHandler
+    except ImportError:
+        from BaseHTTPServer import HTTPServer
+        from SimpleHTTPServer import SimpleHTTPRequestHandler
+    from threading import Thread
+
+    class Handler(SimpleHTTPRequestHandler):
+        def translate_path(self, path):
+            path = path.split('?', 1)[0].split('#', 1)[0]
+            return join(directory, *[p for p in path.split('/') if p and p != '..'])
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:%d' % server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
 @contextmanager
 def tempdir():
     tempdirdir = gettempdir()
@@ -3,8 +3,12 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 from logging import getLogger
 from unittest import TestCase
 
+import pytest
+
+from conda._vendor.auxlib.exceptions import ValidationError
 from conda.common.compat import text_type
 from conda.models.channel import Channel
+from conda.models.index_record import IndexRecord, Priority
 from conda.models.prefix_record import PrefixRecord
 
 log = getLogger(__name__)
@@ -43,3 +47,59 @@ class PrefixRecordTests(TestCase):
             constrains=(),
             depends=(),
         )
+
+
+class TrustedConstructionTests(TestCase):
+
+    def test_from_trusted_objects_matches_constructor(self):
+        info = dict(
+            name='austin',
+            version='1.2.3',
+            build='py34_2',
+            build_number=2,
+            depends=['python 3.4*'],
+            features='mkl debug',
+            platform='win',
+            arch=None,
+            channel="https://repo.continuum.io/pkgs/free/win-32",
+            schannel='defaults',
+            subdir="win-32",
+            fn='austin-1.2.3-py34_2.tar.bz2',
+            url="https://repo.continuum.io/pkgs/free/win-32/austin-1.2.3-py34_2.tar.bz2",
+            md5='0123456789',
+            priority=Priority(1),
+            not_a_field='ignored',
+        )
+        rec = IndexRecord(**info)
+        trusted_rec = IndexRecord.from_trusted_objects(info)
+        assert trusted_rec.__dict__ == rec.__dict__
+        assert trusted_rec.dump() == rec.dump()
+        assert trusted_rec.depends == ('python 3.4*',)
+        assert trusted_rec.features == ('mkl', 'debug')
+        assert trusted_rec.channel.canonical_name == 'defaults'
+        assert trusted_rec._initd
+
+    def test_from_trusted_objects_precedence(self):
+        pr = PrefixRecord(
+            name='austin',
+            version='1.2.3',
+            build_string='py34_2',
+            build_number=2,
+            url="https://repo.continuum.io/pkgs/free/win-32/austin-1.2.3-py34_2.tar.bz2",
+            md5='0123456789',
+            files=('a', 'b'),
+            priority=3,
+        )
+        rec = IndexRecord.from_trusted_objects(pr, {'md5': 'abc', 'version': '1.0'},
+                                               priority=7)
+        assert type(rec) is IndexRecord
+        assert rec.version == '1.2.3'
+        assert rec.md5 == '0123456789'
+        assert rec.priority == 7
+        assert rec.build == 'py34_2'
+        assert 'files' not in rec.__dict__
+        assert rec.dump() == IndexRecord.from_objects(pr, priority=7).dump()
+
+    def test_from_trusted_objects_requires_fields(self):
+        with pytest.raises(ValidationError):
+            IndexRecord.from_trusted_objects(dict(name='austin', version='1.2.3'))
@@ -599,3 +599,36 @@ class SpecStrParsingTests(TestCase):
             # "target": "blarg",  # suppressing these for now
             # "optional": True,
         }
+
+    def test_parse_spec_str_cache_returns_copies(self):
+        spec_str = "conda-forge::foo >=1.0,<2.0 py27_0"
+        parsed = _parse_spec_str(spec_str)
+        parsed['name'] = 'bar'
+        parsed['md5'] = 'deadbeef'
+        assert _parse_spec_str(spec_str) == {
+            "channel": "conda-forge",
+            "name": "foo",
+            "version": ">=1.0,<2.0",
+            "build": "py27_0",
+        }
+        assert MatchSpec(spec_str, optional=True).optional
+        assert not MatchSpec(spec_str).optional
+
+
+class CompiledMatchTests(TestCase):
+
+    def test_compiled_match(self):
+        rec = DPkg('conda-forge::numpy-1.11.0-py27_0.tar.bz2')
+        assert MatchSpec('numpy').match(rec) is True
+        assert MatchSpec('NumPy').match(rec) is True
+        assert MatchSpec('num*').match(rec) is True
+        assert MatchSpec('numpy 1.11*').match(rec) is True
+        assert MatchSpec('numpy 1.11* py27*').match(rec) is True
+        assert MatchSpec('conda-forge::numpy >=1.10 py27_0').match(rec) is True
+        assert MatchSpec('numpy[build_number=0]').match(rec) is True
+
+        assert MatchSpec('scipy').match(rec) is False
+        assert MatchSpec('numpy 1.12*').match(rec) is False
+        assert MatchSpec('numpy 1.11* py34*').match(rec) is False
+        assert MatchSpec('defaults::numpy >=1.10 py27_0').match(rec) is False
+        assert MatchSpec('numpy[build_number=1]').match(rec) is False
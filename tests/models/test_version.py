@@ -228,6 +228,19 @@ class TestVersionSpec(unittest.TestCase):
             assert repr(m) == "VersionSpec('%s')" % vspec
             assert m.match('1.7.1') == res, vspec
 
+    def test_match_sorted(self):
+        versions = sorted(set([
+            '0.9', '1.5', '1.5.0', '1.7', '1.7.0', '1.7.1', '1.7.1.0', '1.7.1.post1', '1.7.2',
+            '1.8.0rc1', '1.8.0', '1.8', '1.10', '2.0.0dev', '2.0', '2!0.1',
+        ]), key=VersionOrder)
+        version_orders = [VersionOrder(v) for v in versions]
+        for vspec in ('1.7.*', '1.7.1', '>=1.5', '>1.7', '<1.8', '<=1.7.1', '==1.7.1', '==1.7',
+                      '!=1.7.1', '>1.7,<1.8', '1.5.*|>1.7,<1.8', '^1\.7\.[0-9]+$', '*',
+                      '1.*.1', '>=1.8.0rc1,<2.0', '>=2.0.0dev', '<2!0'):
+            m = VersionSpec(vspec)
+            expected = bytearray(bool(m.match(v)) for v in versions)
+            assert m.match_sorted(versions, version_orders) == expected, vspec
+
     def test_local_identifier(self):
         """The separator for the local identifier should be either `.` or `+`"""
         # a valid versionstr should match itself
@@ -6,11 +6,14 @@ from datetime import datetime
 from conda.base.context import context
 from conda.common.compat import text_type
 from conda.core.package_cache import download
-from conda.core.portability import _PaddingError, binary_replace, update_prefix
+from conda.core.portability import (_PaddingError, binary_replace, copy_and_update_prefix,
+                                    find_binary_prefix_segments, read_binary_prefix_segments,
+                                    record_binary_prefix_segments, update_prefix)
 from conda.gateways.disk.delete import move_path_to_trash
-from conda.gateways.disk.read import read_no_link, yield_lines
+from conda.gateways.disk.read import compute_sha256sum, read_no_link, yield_lines
 from conda.models.enums import FileMode
 from conda.utils import on_win
+import os
 from os import chdir, getcwd, makedirs
 from os.path import exists, join, relpath
 import pytest
@@ -174,6 +177,98 @@ class FileTests(unittest.TestCase):
                 b'\x7fELF.../usr/local/lib/libfoo.so\0\0\0\0\0\0\0\0'
             )
 
+    @pytest.mark.skipif(on_win, reason="no binary replacement done on win")
+    def test_binary_segments(self):
+        placeholder = '/some-placeholder'
+        original = (b'\x7fELF.../some-placeholder/lib/libfoo.so\0' + b'x' * 1000 +
+                    b'/some-placeholder\0/some-placeholder:/some-placeholder/a\0\0' +
+                    b'/some-placeholder without terminator')
+        segments = find_binary_prefix_segments(original, placeholder)
+        assert len(segments) == 3
+        expected = binary_replace(original, placeholder.encode('utf-8'), b'/usr/local')
+
+        copied = join(self.tmpdir, 'copied')
+        entry = {'placeholder': placeholder, 'size': len(original), 'segments': segments}
+        with open(self.tmpfname, 'wb') as fo:
+            fo.write(original)
+        copy_and_update_prefix(self.tmpfname, copied, '/usr/local', placeholder,
+                               FileMode.binary, entry)
+        with open(copied, 'rb') as fi:
+            self.assertEqual(fi.read(), expected)
+
+        # stale entries fall back to rewriting the whole file
+        for stale in (dict(entry, size=len(original) + 1),
+                      dict(entry, segments=[[start + 1, end] for start, end in segments]),
+                      dict(entry, placeholder='/other-placeholder')):
+            copy_and_update_prefix(self.tmpfname, copied, '/usr/local', placeholder,
+                                   FileMode.binary, stale)
+            with open(copied, 'rb') as fi:
+                self.assertEqual(fi.read(), expected)
+
+        with pytest.raises(_PaddingError):
+            copy_and_update_prefix(self.tmpfname, copied, '/usr/local/' + 'x' * 20,
+                                   placeholder, FileMode.binary, entry)
+
+    @pytest.mark.skipif(on_win, reason="test is invalid on windows")
+    def test_copy_and_update_prefix(self):
+        copied = join(self.tmpdir, 'copied')
+        with open(self.tmpfname, 'w') as fo:
+            fo.write('#!/opt/anaconda1anaconda2anaconda3/bin/python -O\n'
+                     'echo "Hello"\n')
+        os.chmod(self.tmpfname, 0o755)
+        new_prefix = '/usr/local/{0}'.format('1234567890'*12)
+        sha256 = copy_and_update_prefix(self.tmpfname, copied, new_prefix)
+        with open(copied, 'r') as fi:
+            self.assertEqual(fi.read(), '#!/usr/bin/env python -O\n'
+                                        'echo "Hello"\n')
+        self.assertEqual(sha256, compute_sha256sum(copied))
+        self.assertEqual(os.stat(copied).st_mode, os.stat(self.tmpfname).st_mode)
+
+        # the source is left alone, and matches an in-place update
+        update_prefix(self.tmpfname, new_prefix)
+        self.assertEqual(sha256, compute_sha256sum(self.tmpfname))
+
+        placeholder = '/some-placeholder'
+        original = (b'\x7fELF.../some-placeholder/lib/libfoo.so\0' + b'x' * 1000 +
+                    b'/some-placeholder\0' + b'y' * 300000)
+        expected = binary_replace(original, placeholder.encode('utf-8'), b'/usr/local')
+        entry = {'placeholder': placeholder, 'size': len(original),
+                 'segments': find_binary_prefix_segments(original, placeholder)}
+        with open(self.tmpfname, 'wb') as fo:
+            fo.write(original)
+        for segments in (entry, None, dict(entry, segments=[[0, 10]])):
+            sha256 = copy_and_update_prefix(self.tmpfname, copied, '/usr/local', placeholder,
+                                            FileMode.binary, segments)
+            with open(copied, 'rb') as fi:
+                self.assertEqual(fi.read(), expected)
+            self.assertEqual(sha256, compute_sha256sum(copied))
+
+        with pytest.raises(_PaddingError):
+            copy_and_update_prefix(self.tmpfname, copied, '/usr/local/' + 'x' * 20,
+                                   placeholder, FileMode.binary, entry)
+
+    @pytest.mark.skipif(on_win, reason="no binary replacement done on win")
+    def test_record_binary_prefix_segments(self):
+        info_dir = join(self.tmpdir, 'info')
+        makedirs(info_dir)
+        with open(join(info_dir, 'has_prefix'), 'w') as fo:
+            fo.write('/some-placeholder binary lib/libfoo.so\n'
+                     '/some-placeholder text bin/foo\n')
+        with open(join(info_dir, 'files'), 'w') as fo:
+            fo.write('lib/libfoo.so\nbin/foo\n')
+        makedirs(join(self.tmpdir, 'lib'))
+        data = b'\x7fELF.../some-placeholder/lib\0'
+        with open(join(self.tmpdir, 'lib', 'libfoo.so'), 'wb') as fo:
+            fo.write(data)
+
+        record_binary_prefix_segments(self.tmpdir)
+        segments = read_binary_prefix_segments(self.tmpdir)
+        self.assertEqual(segments, {'lib/libfoo.so': {
+            'placeholder': '/some-placeholder',
+            'size': len(data),
+            'segments': [[7, len(data)]],
+        }})
+
     def test_trash_outside_prefix(self):
         tmp_dir = tempfile.mkdtemp()
         rel = relpath(tmp_dir, context.root_dir)
@@ -1,9 +1,11 @@
 from itertools import chain, combinations, permutations, product
+import random
 
 import pytest
 
 from conda.common.compat import iteritems, string_types
-from conda.common.logic import (Clauses, evaluate_eq, minimal_unsatisfiable_subset)
+from conda.common.logic import (ClauseArray, Clauses, LB_ENCODINGS, evaluate_eq,
+                                minimal_unsatisfiable_subset)
 from tests.helpers import raises
 
 
@@ -144,6 +146,38 @@ def my_TEST(Mfunc, Cfunc, mmin, mmax, is_iter):
                 assert qsol is False, (ij, sol,'Prevent(%s)' % Cfunc.__name__, Cneg.clauses)
 
 
+def test_names():
+    C = Clauses()
+    x1 = C.new_var('x1')
+    key = frozenset(('spec',))
+    x2 = C.new_var(key)
+    t = C.name_var(True, 'always')
+    assert C.from_name('x1') == x1 and C.from_name('!x1') == -x1
+    assert C.from_name(key) == x2
+    assert C.from_name('always') is True and C.from_name('!always') is False
+    assert C.from_name('!missing') is None
+    assert C.from_index(x1) == 'x1' and C.from_index(-x1) == '!x1'
+    assert C.from_index(x2) == key
+    assert C.Convert_(['!x1', key, x2, True]) == [-x1, x2, x2, True]
+    assert t is True
+
+
+def test_clause_array():
+    clauses = [(1, -2), (3,), (-1, 2, -3), (4, 5)]
+    ca = ClauseArray(clauses)
+    assert len(ca) == 4 and ca == clauses
+    assert ca[0] == (1, -2) and ca[-1] == (4, 5)
+    cb = ca.copy()
+    ca.truncate(2)
+    assert ca == clauses[:2] and cb == clauses
+    ca.truncate(5)
+    assert len(ca) == 2
+    ca.append((6, -7))
+    assert list(map(tuple, ca)) == [(1, -2), (3,), (6, -7)]
+    ca.truncate(0)
+    assert not ca and ca == ClauseArray()
+
+
 def test_NOT():
     my_TEST(my_NOT, Clauses.Not, 1, 1, False)
 
@@ -185,6 +219,34 @@ def test_AMONE():
     assert x1 == x2 and C1.clauses == C2.clauses
 
 
+def test_AMONE_XONE_auxiliary():
+    # These encodings add auxiliary variables, so check equisatisfiability: every assignment
+    # of the original variables extends to a solution exactly when the constraint holds.
+    # The literals include a negation and a duplicate.
+    funcs = [
+        (Clauses.AtMostOne_Seq, 0), (Clauses.AtMostOne_Commander, 0),
+        (Clauses.AtMostOne_Product, 0), (Clauses.AtMostOne, 0),
+        (Clauses.ExactlyOne_Seq, 1), (Clauses.ExactlyOne_Commander, 1),
+        (Clauses.ExactlyOne_Product, 1), (Clauses.ExactlyOne, 1),
+    ]
+    for N in (2, 3, 5, 7):
+        for vals in (list(range(1, N + 1)), [-1] + list(range(2, N + 1)) + [N]):
+            for func, lo in funcs:
+                C = Clauses(N)
+                C.Require(func.__get__(C, Clauses), vals)
+                for sol in product(*[(k, -k) for k in range(1, N + 1)]):
+                    count = sum(v in sol for v in vals)
+                    expected = lo <= count <= 1
+                    assert (C.sat([(k,) for k in sol]) is not None) == expected, \
+                        (func.__name__, vals, sol)
+    # other polarities fall back to the BDD encoding
+    C1 = Clauses(10)
+    x1 = C1.AtMostOne_Product(range(1, 11))
+    C2 = Clauses(10)
+    x2 = C2.AtMostOne_BDD(range(1, 11))
+    assert x1 == x2 and C1.clauses == C2.clauses
+
+
 @pytest.mark.integration  # only because this test is slow
 def test_XONE():
     my_TEST(my_XONE, Clauses.ExactlyOne_NSQ, 0,3, True)
@@ -246,6 +308,67 @@ def test_LinearBound():
             assert not(rhs[0] <= my_EVAL(eq2,sol) <= rhs[1]), ('Cneg',Cneg.clauses)
 
 
+def LinearBound_models(eq, lo, hi, polarity, encoding):
+    # The (input assignment, result) pairs that satisfy the clauses of a LinearBound with
+    # the given polarity: Require and Prevent for True and False, both results for None.
+    N = len(eq)
+    C = Clauses(N)
+    if polarity is None:
+        x = C.LinearBound(eq, lo, hi, encoding=encoding)
+        results = [(True, [(x,)]), (False, [(x is False,) if type(x) is bool else (-x,)])]
+    else:
+        (C.Require if polarity else C.Prevent)(C.LinearBound, eq, lo, hi, encoding=encoding)
+        results = [(polarity, [])]
+    models = set()
+    for sol in product(*[(k, -k) for k in range(1, N + 1)]):
+        for result, extra in results:
+            if C.sat([(k,) for k in sol] + extra) is not None:
+                models.add((sol, result))
+    return models
+
+
+def test_LinearBound_encodings():
+    rng = random.Random(34)
+    checked = 0
+    while checked < 150:
+        N = rng.randint(1, 5)
+        if rng.random() < 0.3:
+            coeffs = [rng.choice((1, 2, 3))] * N
+        else:
+            coeffs = [rng.choice((1, 1, 2, 3, 5, -1, -2)) for _ in range(N)]
+        eq = [(c, rng.choice((k, -k))) for c, k in zip(coeffs, range(1, N + 1))]
+        lo = rng.randint(-2, sum(abs(c) for c in coeffs) // 2 + 1)
+        hi = lo + rng.randint(0, 3)
+        uniform = all(c == eq[0][0] for c, a in eq)
+        truth = [(sol, lo <= my_EVAL(eq, sol) <= hi)
+                 for sol in product(*[(k, -k) for k in range(1, N + 1)])]
+        for polarity in (None, True, False):
+            # the BDD is the reference; check it against the bound itself first
+            expected = LinearBound_models(eq, lo, hi, polarity, 'bdd')
+            assert expected == set(m for m in truth if polarity in (None, m[1])), \
+                (eq, lo, hi, polarity)
+            for encoding in LB_ENCODINGS[1:] + (None,):
+                if encoding == 'sortnet' and not uniform:
+                    continue
+                assert LinearBound_models(eq, lo, hi, polarity, encoding) == expected, \
+                    (eq, lo, hi, polarity, encoding)
+        # the automatic choice is never estimated to be larger than the BDD
+        if lo <= hi and sum(1 for c, a in eq if c > 0) == N:
+            C = Clauses(N)
+            costs = C.LB_Costs_(sorted(eq), N, max(lo, 0), min(hi, sum(coeffs)), True)
+            assert min(costs.values()) <= costs['bdd']
+        checked += 1
+    # bounds with terms pruned for exceeding hi, with inputs 1 and 2 true, 3 and 4 false
+    for eq, rhs in (([(3, 1), (2, 2), (3, 3), (2, 4)], 2),
+                    ([(1, 1), (2, 2), (3, 3), (3, 4)], 2),
+                    ([(1, 1), (3, 2), (2, 3), (1, 4)], 1)):
+        C = Clauses(4)
+        x = C.LinearBound(eq, rhs, rhs)
+        assert C.sat([(1,), (2,), (-3,), (-4,), (-x,)]) is not None
+    with pytest.raises(ValueError):
+        Clauses(3).LinearBound([(1, 1), (1, 2), (1, 3)], 1, 2, encoding='unknown')
+
+
 def test_sat():
     C = Clauses()
     C.new_var('x1')
@@ -289,6 +412,56 @@ def test_minimize():
     assert sval == 11
 
 
+def test_minimize_lexicographic():
+    # at most two of x1..x6, at least one of x1..x3 and one of x4..x6;
+    # then x1 + 2 x2 + 3 x3, peak of 2 x4 + 4 x5 + 6 x6, and x1 + x2 + x4 + x5 + x6
+    objectives = [
+        [(1, 1), (2, 2), (3, 3)],
+        {4: 2, 5: 4, 6: 6},
+        [],
+        [(1, 1), (1, 2), (1, 4), (1, 5), (1, 6)],
+    ]
+
+    def clauses():
+        C = Clauses(6)
+        C.Require(C.LinearBound, [(1, k) for k in range(1, 7)], 0, 2)
+        C.Require(C.Any, (1, 2, 3))
+        C.Require(C.Any, (4, 5, 6))
+        return C
+
+    C = clauses()
+    expected = []
+    sol = None
+    for objective in objectives:
+        sol, sval = C.minimize(objective, sol)
+        expected.append(sval)
+    assert expected == [1, 2, 0, 2]
+
+    C = clauses()
+    sol, values = C.minimize_lexicographic(objectives)
+    assert values == expected
+    assert 1 in sol and 4 in sol
+
+    C = clauses()
+    C.unsat = True
+    assert C.minimize_lexicographic(objectives)[1] == [7, 13, 1, 6]
+
+
+def test_sat_hint():
+    C = Clauses(3)
+    C.Require(C.ExactlyOne, (1, 2, 3))
+    for k in (1, 2, 3):
+        assert k in C.sat(hint=[k])
+    # an infeasible hint is dropped
+    assert C.sat(hint=[1, 2]) is not None
+    assert C.sat([[-1]], hint=[1]) is not None
+    assert C.sat([[-1], [-2], [-3]], hint=[1]) is None
+
+    # the hint picks the starting solution, but not the optimum
+    sol, value = C.minimize({1: 1, 2: 2, 3: 3}, hint=[3])
+    assert value == 1 and 1 in sol
+
+
 def test_minimal_unsatisfiable_subset():
     def sat(val):
         return Clauses(max(abs(v) for v in chain(*val))).sat(val)
@@ -311,3 +484,9 @@ def test_minimal_unsatisfiable_subset():
         res = minimal_unsatisfiable_subset(perm, sat)
         assert sorted(res) in [[[-1], [1]], [[-2], [2]]]
         assert not sat(res)
+
+    # out of time: still unsatisfiable, but not necessarily minimal
+    clauses = [[1], [2], [-1], [3]]
+    res = minimal_unsatisfiable_subset(clauses, sat, timeout=0)
+    assert not sat(res) and len(res) >= 2
+    assert sorted(minimal_unsatisfiable_subset(clauses, sat, timeout=60)) == [[-1], [1]]
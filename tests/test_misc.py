@@ -1,9 +1,25 @@
+import hashlib
+from io import BytesIO
+import json
 import os.path
 import sys
+import tarfile
 import unittest
 
+from conda.base.context import reset_context
+from conda.cli.install import clone
+from conda.common.io import captured, env_var, env_vars
+from conda.common.url import path_to_url
+from conda.core.link import PrefixSetup, UnlinkLinkTransaction
+from conda.core.linked_data import PrefixData
+from conda.core.package_cache import PackageCache
 from conda.core.repodata import cache_fn_url
-from conda.misc import url_pat, walk_prefix
+from conda.gateways.disk.delete import rm_rf
+from conda.misc import (_clone_untracked_file, _file_contains, _uncloneable_packages,
+                        clone_env, url_pat, walk_prefix)
+from conda.models.dist import Dist
+from conda.models.index_record import PackageRecord
+from conda.models.prefix_record import PrefixRecord
 
 
 class TestMisc(unittest.TestCase):
@@ -69,5 +85,120 @@ def test_walk_prefix(tmpdir):  # tmpdir is a py.test utility
     assert walk_prefix(tmpdir.strpath) == answer
 
 
+def test_file_contains(tmpdir):
+    path = tmpdir.join('data')
+    path.write_binary(b'x' * 10 + b'/old/prefix' + b'y' * 10)
+    for bufsize in (1, 4, 15, 1024):
+        assert _file_contains(path.strpath, b'/old/prefix', bufsize)
+        assert not _file_contains(path.strpath, b'/new/prefix', bufsize)
+        assert _file_contains(path.strpath, b'x', bufsize)
+
+
+def test_clone_untracked_file(tmpdir):
+    src, dst = tmpdir.mkdir('old'), tmpdir.mkdir('new')
+    text = 'prefix=%s/lib\n' % src.strpath
+    src.join('text').write(text)
+    binary = b'\xff\xfe' + src.strpath.encode('utf-8')
+    src.join('binary').write_binary(binary)
+    src.join('plain').write('nothing to see')
+    for fn in ('text', 'binary', 'plain'):
+        _clone_untracked_file(src.join(fn).strpath, dst.join(fn).strpath,
+                              src.strpath, dst.strpath)
+    assert dst.join('text').read() == text.replace(src.strpath, dst.strpath)
+    assert dst.join('binary').read_binary() == binary
+    assert dst.join('plain').read() == 'nothing to see'
+
+
+def test_uncloneable_packages():
+    def rec(name, *depends):
+        return PrefixRecord(name=name, version='1.0', build='0', build_number=0,
+                            channel='defaults', depends=depends)
+    drecs = {Dist(r): r for r in (
+        rec('python'), rec('conda', 'python'), rec('conda-build', 'conda >=4', 'python'),
+        rec('anaconda', 'conda-build', 'python'), rec('numpy', 'python'),
+    )}
+    assert set(_uncloneable_packages(drecs)) == {'conda', 'conda-build', 'anaconda'}
+    drecs = {dist: r for dist, r in drecs.items() if r.name in ('python', 'numpy')}
+    assert not _uncloneable_packages(drecs)
+
+
+def make_package_tarball(channel_dir, name, placeholder):
+    # a noarch package with one script whose shebang has a prefix placeholder
+    fn = '%s-1.0-0.tar.bz2' % name
+    index_json = dict(name=name, version='1.0', build='0', build_number=0, depends=[],
+                      subdir='noarch')
+    members = (
+        ('info/index.json', json.dumps(index_json)),
+        ('info/paths.json', json.dumps({'paths_version': 1, 'paths': [{
+            '_path': 'bin/' + name, 'path_type': 'hardlink',
+            'prefix_placeholder': placeholder, 'file_mode': 'text',
+        }]})),
+        ('bin/' + name, '#!%s/bin/python\n' % placeholder),
+    )
+    tarball = channel_dir.join(fn).strpath
+    with tarfile.open(tarball, 'w:bz2') as tf:
+        for path, data in members:
+            data = data.encode('utf-8')
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            info.mode = 0o755
+            tf.addfile(info, BytesIO(data))
+    with open(tarball, 'rb') as fh:
+        md5 = hashlib.md5(fh.read()).hexdigest()
+    return PackageRecord(channel=path_to_url(channel_dir.strpath), fn=fn,
+                         url=path_to_url(tarball), md5=md5, **index_json)
+
+
+def test_clone_env_extracts_missing_packages(tmpdir):
+    placeholder = '/opt/anaconda1anaconda2anaconda3'
+    prec = make_package_tarball(tmpdir.mkdir('channel'), 'clonetest', placeholder)
+    pkgs_dir = tmpdir.join('pkgs').strpath
+    prefix1, prefix2 = tmpdir.join('env1').strpath, tmpdir.join('env2').strpath
+    with env_var('CONDA_PKGS_DIRS', pkgs_dir, reset_context):
+        PackageCache.clear()
+        try:
+            txn = UnlinkLinkTransaction(PrefixSetup(prefix1, (), (prec,), (), ()))
+            txn.get_pfe().execute()
+            txn.execute()
+
+            # as after `conda clean --packages --tarballs`
+            rm_rf(pkgs_dir)
+            PackageCache.clear()
+
+            clone_env(prefix1, prefix2, verbose=False, quiet=True)
+        finally:
+            PackageCache.clear()
+    with open(os.path.join(prefix2, 'bin', 'clonetest')) as fh:
+        assert fh.read() == '#!%s/bin/python\n' % prefix2
+    assert PrefixData(prefix2).get('clonetest').dist_str() == prec.dist_str()
+
+
+
+def test_clone_json_reports_actions(tmpdir):
+    prec = make_package_tarball(tmpdir.mkdir('channel'), 'clonetest', '/opt/placeholder')
+    prefix1, prefix2 = tmpdir.join('env1').strpath, tmpdir.join('env2').strpath
+    with env_vars({'CONDA_PKGS_DIRS': tmpdir.join('pkgs').strpath, 'CONDA_JSON': 'true'},
+                  reset_context):
+        PackageCache.clear()
+        try:
+            txn = UnlinkLinkTransaction(PrefixSetup(prefix1, (), (prec,), (), ()))
+            txn.get_pfe().execute()
+            txn.execute()
+
+            with captured() as c:
+                clone(prefix1, prefix2, json=True, quiet=True)
+        finally:
+            PackageCache.clear()
+    reset_context()
+    result = json.loads(c.stdout)
+    assert result['success']
+    assert result['src_prefix'] == prefix1
+    assert result['dst_prefix'] == prefix2
+    assert result['actions']['PREFIX'] == prefix2
+    link, = result['actions']['LINK']
+    assert (link['name'], link['version'], link['url']) == ('clonetest', '1.0', prec.url)
+    assert 'UNLINK' not in result['actions']
+
+
 if __name__ == '__main__':
     unittest.main()
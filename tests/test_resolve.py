@@ -154,6 +154,18 @@ def test_get_dists():
     assert Dist('defaults::dynd-python-0.3.0-np17py33_0.tar.bz2') in dists
 
 
+def test_find_matches_by_version():
+    r2 = Resolve(index)
+    for spec in ('numpy', 'numpy 1.7*', 'numpy >=1.6,<1.8', 'numpy 1.7.1', 'numpy ==1.7.0',
+                 'numpy 1.6*|>=1.8', 'numpy !=1.7.1', 'python 2.7* 1', 'numpy 1.7* py27*',
+                 'scipy 0.12.0 np16py26_0', 'python >3.3.2', 'nonexistent 1.0'):
+        ms = MatchSpec(spec)
+        expected = [dist for dist in r2.groups.get(ms.name, ()) if ms.match(index[dist])]
+        assert r2.find_matches(ms) == expected, spec
+    assert r2.find_matches(MatchSpec('numpy 1.7.1'))
+    assert not r2.find_matches(MatchSpec('numpy 1.7.1 py34*'))
+
+
 def test_generate_eq():
     reduced_index = r.get_reduced_index(['anaconda'])
     r2 = Resolve(reduced_index, True, True)
@@ -167,8 +179,8 @@ def test_generate_eq():
     # - a package that only has one version should not appear, unless
     #   include=True as it will have a 0 coefficient. The same is true of the
     #   latest version of a package.
-    eqv = {Dist(key).to_filename(): value for key, value in iteritems(eqv)}
-    eqb = {Dist(key).to_filename(): value for key, value in iteritems(eqb)}
+    eqv = {r2.var_dists_[key].to_filename(): value for key, value in iteritems(eqv)}
+    eqb = {r2.var_dists_[key].to_filename(): value for key, value in iteritems(eqb)}
     assert eqv == {
         'anaconda-1.4.0-np15py26_0.tar.bz2': 1,
         'anaconda-1.4.0-np15py27_0.tar.bz2': 1,
@@ -912,6 +924,11 @@ def test_multiple_solution():
     index2 = {Dist(key): value for key, value in iteritems(index2)}
     r = Resolve(index2)
     res = r.solve(['pandas', 'python 2.7*', 'numpy 1.6*'], returnall=True)
+    assert len(res) > 1
+    # alternate solutions are only enumerated when requested, or to warn about them
+    assert r.solve(['pandas', 'python 2.7*', 'numpy 1.6*']) == res[0]
+    with env_var('CONDA_VERBOSITY', '1', reset_context):
+        assert r.solve(['pandas', 'python 2.7*', 'numpy 1.6*']) == res[0]
     res = set([y for x in res for y in x if r.package_name(y).startswith('pandas')])
     assert len(res) <= len(res1)
 
@@ -1111,3 +1128,29 @@ def test_update_deps():
         'tk-8.5.13-0.tar.bz2',
         'zlib-1.2.7-0.tar.bz2',
     ]]]
+
+
+def test_get_conflicting_specs():
+    specs = ['python 2.7*', 'numpy 1.5*', 'zlib', 'numpy >=1.6', 'scipy']
+    conflicts = r.get_conflicting_specs([MatchSpec(s) for s in specs])
+    assert set(conflicts) == {MatchSpec('numpy 1.5*'), MatchSpec('numpy >=1.6')}
+    assert r.get_conflicting_specs([MatchSpec('python 2.7*'), MatchSpec('numpy 1.7*')]) == ()
+
+
+def test_memoized_subproblems():
+    specs = ['anaconda 1.5.0', 'python 2.7*', 'numpy 1.7*']
+    r = Resolve(index)
+    installed = r.install(specs)
+    reduced_index = r.get_reduced_index(specs)
+    assert r.get_reduced_index(reversed(specs)) == reduced_index
+    r2 = r.sub_resolve(reduced_index)
+    assert r.sub_resolve(dict(reduced_index)) is r2
+    assert r.install(specs) == installed
+
+    # each caller gets its own copy of the base clauses
+    C1 = r2.gen_clauses()
+    C2 = r2.gen_clauses()
+    nz, m = len(C1.clauses), C1.m
+    C1.Require(C1.Or, 1, C1.new_var('x'))
+    assert C1.m > m and len(C1.clauses) > nz
+    assert C2.m == m and len(C2.clauses) == nz and C2.from_name('x') is None
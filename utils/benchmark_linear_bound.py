@@ -0,0 +1,107 @@
+"""
+Compare the LinearBound encodings on solver objectives.
+
+    python utils/benchmark_linear_bound.py [path/to/index.json] [spec ...]
+
+Run from the root of the repository, since it loads the index with the test helpers.
+
+Builds the clauses for the given specs (by default, a few environments from the test index),
+then for the version, build, and package count objectives that Resolve.solve minimizes, adds
+a bound halfway between zero and the objective's current value with each encoding.  Reports
+the clauses and variables each encoding adds, the time to build them, and the time for one SAT
+call on the result.  A synthetic objective over many versions of one package is also included,
+since that is where the BDD encoding grows fastest.
+"""
+from __future__ import absolute_import, division, print_function
+
+import json
+from os.path import dirname, join
+import sys
+from time import time
+
+from conda.base.context import context
+from conda.common.logic import Clauses, LB_ENCODINGS
+from conda.models.channel import Channel
+from conda.models.match_spec import MatchSpec
+from conda.resolve import Resolve
+from tests.helpers import add_feature_records, supplement_index_with_repodata
+
+DEFAULT_INDEX = join(dirname(dirname(__file__)), 'tests', 'index.json')
+DEFAULT_SPECS = (
+    ('anaconda 1.5.0', 'python 2.7*', 'numpy 1.7*'),
+    ('scipy', 'python 3.3*'),
+    ('anaconda', 'mkl'),
+)
+
+
+def load_resolve(index_path):
+    with open(index_path) as fh:
+        repodata = {
+            'info': {'subdir': context.subdir},
+            'packages': json.load(fh),
+        }
+    index = {}
+    supplement_index_with_repodata(index, repodata, Channel('defaults'), 1)
+    add_feature_records(index)
+    return Resolve(index)
+
+
+def solver_objectives(r, specs):
+    specs = [MatchSpec(s) for s in specs]
+    r2 = Resolve(r.get_reduced_index(specs), True, True)
+    C = r2.gen_clauses()
+    missing = set(r2.groups) - set(s.name for s in specs)
+    eq_v, eq_b = r2.generate_version_metrics(C, list(r2.groups))
+    objectives = [
+        ('version', eq_v),
+        ('build', eq_b),
+        ('package count', r2.generate_package_count(C, missing)),
+    ]
+    C.sat(r2.generate_spec_constraints(C, specs), True)
+    return C, [(name, eq) for name, eq in objectives if eq]
+
+
+def many_versions(nversions=200):
+    # one package with many versions: exactly one installed, weighted by version age
+    C = Clauses(nversions)
+    C.Require(C.ExactlyOne, range(1, nversions + 1))
+    return C, [('%d versions' % nversions, {k: k - 1 for k in range(2, nversions + 1)})]
+
+
+def bench(label, C, objective):
+    objective, offset = C.LB_Preprocess_(objective)
+    solution = C.sat()
+    value = sum(c for c, a in objective if a in set(solution))
+    hi = value // 2
+    print('%s: %d terms, bound [0, %d]' % (label, len(objective), hi))
+    uniform = objective[0][0] == objective[-1][0]
+    for encoding in (None,) + LB_ENCODINGS:
+        if encoding == 'sortnet' and not uniform:
+            continue
+        nz, m = len(C.clauses), C.m
+        start = time()
+        C.Require(C.LinearBound, objective, 0, hi, False, encoding=encoding)
+        build = time() - start
+        start = time()
+        C.sat()
+        solve = time() - start
+        print('  %-10s %8d clauses %7d vars %8.1f ms build %8.1f ms sat'
+              % (encoding or 'auto', len(C.clauses) - nz, C.m - m, build * 1000, solve * 1000))
+        C.clauses.truncate(nz)
+        C.m = m
+        C.unsat = False
+
+
+def main(index_path=DEFAULT_INDEX, *specs):
+    r = load_resolve(index_path)
+    for spec_set in ([specs] if specs else DEFAULT_SPECS):
+        C, objectives = solver_objectives(r, spec_set)
+        for name, objective in objectives:
+            bench('%s [%s]' % (name, ', '.join(spec_set)), C, objective)
+    C, objectives = many_versions()
+    for name, objective in objectives:
+        bench(name, C, objective)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,29 @@
+"""
+Split a channel subdir's repodata.json into per-package-name shards.
+
+    python utils/shard_repodata.py path/to/channel/linux-64
+
+Writes repodata_shards.json and a shards/ directory next to the existing repodata.json,
+producing the layout conda fetches when use_sharded_repodata is enabled.
+"""
+from __future__ import absolute_import, division, print_function
+
+import json
+from os.path import join
+import sys
+
+from conda.core.repodata import write_repodata_shards
+
+
+def main(subdir_path):
+    with open(join(subdir_path, 'repodata.json')) as fh:
+        repodata = json.load(fh)
+    shards_index = write_repodata_shards(repodata, subdir_path)
+    print("wrote %d shards for %d packages to %s"
+          % (len(shards_index['shards']), len(repodata.get('packages', {})), subdir_path))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    main(sys.argv[1])